@@ -0,0 +1,177 @@
+"""
+Backfill - 历史回放
+按日期顺序回放数据库中的全部快照，用当前的趋势逻辑重算 rank_delta / installs_rate、
+物化趋势分区、统计状态、分位数草图和 owner 聚合
+
+- 变化值只依赖相邻两期快照：把日期切成连续区间，由进程池并行读取和计算
+- 统计状态（EWMA / z-score）和分位数阈值依赖此前所有日期：在主进程按日期顺序增量推进
+- 所有写入经同一个 DBWriter 线程入队，合并为少量事务提交
+- 回放期间切换到 WAL 日志模式，工作进程读取与写线程提交互不阻塞，结束后切回
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from src.config import SURGE_MODE, SURGE_WINDOW_DAYS
+from src.database import Database
+from src.db_writer import DBWriter
+from src.quantile_sketch import TDigest
+from src.skill_record import SkillRecord, as_records
+from src.trend_analyzer import TrendAnalyzer, surge_window_start
+from src.trend_engine import TrendEngine, delta_records
+
+# 每个工作进程分到的区间数（区间越多，主进程越早开始写入）
+RANGES_PER_WORKER = 4
+
+
+def split_ranges(dates: List[str], parts: int) -> List[Tuple[Optional[str], List[str]]]:
+    """
+    把升序日期切成连续区间
+
+    Args:
+        dates: 快照日期（升序）
+        parts: 区间数
+
+    Returns:
+        [(区间前一期日期, [区间内日期, ...]), ...]；第一个区间的前一期为 None
+    """
+    parts = max(1, min(parts, len(dates)))
+    size, extra = divmod(len(dates), parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            ranges.append((dates[start - 1] if start else None, dates[start:end]))
+        start = end
+    return ranges
+
+
+def replay_range(task: Tuple[str, Optional[str], List[str]]) -> List[Tuple[str, List[SkillRecord]]]:
+    """
+    工作进程：读取一个日期区间的快照并计算相对前一期的变化
+
+    Args:
+        task: (数据库路径, 区间前一期日期, 区间内日期)
+
+    Returns:
+        [(日期, 带变化值的记录), ...]，按日期升序
+    """
+    db_path, previous_date, dates = task
+    results = []
+    with Database(db_path) as db:
+        previous = db.get_skills_by_date(previous_date) if previous_date else []
+        for date in dates:
+            today = as_records(db.get_skills_by_date(date))
+            engine = TrendEngine(today)
+            engine.add_snapshot(previous_date, previous)
+            today_with_delta = delta_records(today, engine.compute())
+            results.append((date, today_with_delta))
+            previous_date, previous = date, today
+    return results
+
+
+class SketchHistory:
+    """回放时维护的历史 installs_rate 草图（与 TrendAnalyzer._resolve_surge_threshold 的窗口一致）"""
+
+    def __init__(self):
+        self.sketches: List[Tuple[str, TDigest]] = []
+        self.running = TDigest()
+
+    def add(self, date: str, sketch: TDigest) -> None:
+        """加入一期草图（日期需递增）"""
+        if SURGE_WINDOW_DAYS:
+            self.sketches.append((date, sketch))
+        else:
+            self.running.merge(sketch)
+
+    def before(self, date: str) -> TDigest:
+        """早于 date 且在统计窗口内的合并草图"""
+        if not SURGE_WINDOW_DAYS:
+            return self.running
+        since = surge_window_start(date)
+        self.sketches = [(d, s) for d, s in self.sketches if d >= since]
+        return TDigest.merge_all(s for _, s in self.sketches)
+
+
+def backfill(db_path: str = None, workers: int = None) -> Dict:
+    """
+    回放全部快照，重算变化值和所有派生数据
+
+    Args:
+        db_path: 数据库路径，默认使用配置中的路径
+        workers: 工作进程数，默认 CPU 核数
+
+    Returns:
+        {"dates": 日期数, "rows": 技能行数, "elapsed": 秒, "dates_per_sec": ..., "rows_per_sec": ..., "writer": {...}}
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    db = Database(db_path)
+    db.init_db()
+    dates = db.get_snapshot_dates()
+    if not dates:
+        db.close()
+        print("⚠️ 没有可回放的快照")
+        return {"dates": 0, "rows": 0, "elapsed": 0.0, "dates_per_sec": 0.0, "rows_per_sec": 0.0, "writer": {}}
+
+    analyzer = TrendAnalyzer(db)
+    tasks = [(db.db_path, prev, chunk) for prev, chunk in split_ranges(dates, workers * RANGES_PER_WORKER)]
+    print(f"[回放] {len(dates)} 个快照 ({dates[0]} ~ {dates[-1]})，{len(tasks)} 个区间，{workers} 个进程")
+
+    db.conn.execute("PRAGMA journal_mode=WAL")
+    try:
+        writer_stats, rows = _replay(db, analyzer, tasks, workers)
+    finally:
+        # 切回默认日志模式（同时把 WAL 检查点写回主文件，artifact 只需上传 .db）
+        db.conn.execute("PRAGMA journal_mode=DELETE")
+        db.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "dates": len(dates),
+        "rows": rows,
+        "elapsed": elapsed,
+        "dates_per_sec": len(dates) / elapsed if elapsed else 0.0,
+        "rows_per_sec": rows / elapsed if elapsed else 0.0,
+        "writer": writer_stats,
+    }
+
+
+def _replay(db: Database, analyzer: TrendAnalyzer, tasks: List[Tuple], workers: int) -> Tuple[Dict, int]:
+    """
+    并行计算变化值，按日期顺序推进统计状态并经单一写线程写入
+
+    Returns:
+        (写线程统计, 回放的技能行数)
+    """
+    history = SketchHistory()
+    state: Dict[str, Dict] = {}
+    previous: List[SkillRecord] = []
+    rows = 0
+
+    with DBWriter(db.db_path) as writer, ProcessPoolExecutor(max_workers=workers) as pool:
+        # 统计状态按日期顺序从零重建
+        writer.clear_skill_stats()
+
+        # map 按提交顺序返回，前面的区间可在后面的区间计算时开始写入
+        for chunk in pool.map(replay_range, tasks):
+            for date, today_with_delta in chunk:
+                yesterday_map = {s.name: s for s in previous}
+                threshold = analyzer._resolve_surge_threshold(
+                    date, history.before(date) if SURGE_MODE == "percentile" else None
+                )
+                scored = analyzer.score_snapshot(date, today_with_delta, yesterday_map, state, threshold)
+                writer.save_today_data(date, today_with_delta, **analyzer.snapshot_writes(scored))
+
+                state.update((row["name"], row) for row in scored["stats"])
+                history.add(date, scored["rate_sketch"])
+                previous = today_with_delta
+                rows += len(today_with_delta)
+
+        writer.flush()
+        writer_stats = writer.stats()
+
+    return writer_stats, rows
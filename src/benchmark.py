@@ -0,0 +1,629 @@
+#!/usr/bin/env python3
+"""
+性能基准
+
+用法:
+    # 趋势计算：dict 循环 vs 向量化引擎（100 / 10k / 1M 技能）
+    python src/benchmark.py trends
+    python src/benchmark.py trends --sizes 100 10000
+
+    # 内存：dict vs SkillRecord（每 10 万技能）
+    python src/benchmark.py records
+
+    # 邮件渲染：1000 份报告（每份不同日期/内容）
+    python src/benchmark.py reports --count 1000
+
+    # 峰值内存：完整榜单页面拼成字符串 vs 流式写入（5 万技能）
+    python src/benchmark.py stream --sizes 50000
+
+    # 订阅者分发：1000 个订阅者（分类 / 条数 / 语言各不相同）共享一份趋势数据
+    python src/benchmark.py fanout --subscribers 1000
+
+    # 多渠道通知：各渠道模拟不同延迟，并发投递的总耗时 vs 逐个渠道依次投递
+    python src/benchmark.py notify --subscribers 10 --latency telegram=0.05 resend=0.3 webhook=0.1
+
+    # Telegram 群发：本地模拟 Bot API（按限额返回 429），逐个会话顺序发送 vs 令牌桶群发器
+    python src/benchmark.py broadcast --chats 40 --parts 3 --scale 10
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+
+# 添加项目根目录到 Python 路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.email_optimizer import optimize_email_html
+from src.html_reporter import CATEGORY_NAMES_EN, LANGUAGES, HTMLReporter, write_chunks
+from src.notifiers import NOTIFIERS, Notifier, deliver_all
+from src.subscriptions import ReportFanout, filter_trends, make_subscription
+from src.skill_record import SkillRecord
+from src.telegram_broadcaster import TelegramBroadcaster, TokenBucket, is_group_chat
+from src.telegram_sender import TelegramSender
+from src.trend_engine import TrendEngine, apply_deltas, delta_records
+
+
+def timed(fn: Callable, repeat: int = 3) -> Tuple[float, object]:
+    """运行 repeat 次，返回最短耗时（秒）和最后一次的结果"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def make_leaderboard(n: int, seed: int = 0, churn: float = 0.1) -> Tuple[List[Dict], List[Dict]]:
+    """
+    生成相邻两期的模拟榜单
+
+    Args:
+        n: 每期技能数
+        seed: 随机种子
+        churn: 新旧榜单之间替换掉的比例
+
+    Returns:
+        (上一期, 本期)
+    """
+    rng = random.Random(seed)
+    previous = [
+        {"rank": i + 1, "name": f"skill-{i}", "owner": f"owner-{i % 997}/skills",
+         "installs": rng.randint(0, 100000), "url": ""}
+        for i in range(n)
+    ]
+    survivors = rng.sample(previous, int(n * (1 - churn)))
+    today = [
+        {"name": s["name"], "owner": s["owner"], "installs": s["installs"] + rng.randint(0, 5000), "url": ""}
+        for s in survivors
+    ]
+    today += [
+        {"name": f"new-skill-{i}", "owner": "new-owner/skills", "installs": rng.randint(0, 100000), "url": ""}
+        for i in range(n - len(today))
+    ]
+    today.sort(key=lambda s: -s["installs"])
+    for rank, skill in enumerate(today, 1):
+        skill["rank"] = rank
+    return previous, today
+
+
+def legacy_calculate_deltas(today: List[Dict], yesterday: List[Dict]) -> List[Dict]:
+    """向量化之前 TrendAnalyzer._calculate_deltas 的 dict 循环实现（基准对照）"""
+    yesterday_map = {s["name"]: s for s in yesterday}
+    for skill in today:
+        yesterday_skill = yesterday_map.get(skill["name"])
+        if yesterday_skill is not None:
+            skill["rank_delta"] = yesterday_skill.get("rank", skill["rank"]) - skill["rank"]
+            yesterday_installs = yesterday_skill.get("installs", skill["installs"])
+            installs_delta = skill["installs"] - yesterday_installs
+            skill["installs_delta"] = installs_delta
+            skill["installs_rate"] = round(installs_delta / yesterday_installs, 4) if yesterday_installs > 0 else 0
+        else:
+            skill["rank_delta"] = 0
+            skill["installs_delta"] = 0
+            skill["installs_rate"] = 0
+    return today
+
+
+def bench_trends(args: argparse.Namespace) -> None:
+    """
+    趋势计算基准
+
+    对比 1 个窗口（上一期）和 3 个窗口（上一期 / 7 天 / 30 天）下，
+    dict 循环与向量化引擎的端到端耗时（含取数和写回技能字典）
+    """
+    print(f"{'skills':>10}{'dict 1w':>12}{'engine 1w':>12}{'dict 3w':>12}{'engine 3w':>12}{'speedup 3w':>12}  equal")
+    for n in args.sizes:
+        previous, today = make_leaderboard(n)
+        week_ago, _ = make_leaderboard(n, seed=1)
+        month_ago, _ = make_leaderboard(n, seed=2)
+        windows = [previous, week_ago, month_ago]
+        repeat = 1 if n >= 1000000 else 3
+
+        def run_dict(snapshots):
+            result = None
+            for snapshot in snapshots:
+                result = legacy_calculate_deltas([dict(s) for s in today], snapshot)
+            return result
+
+        def run_engine(snapshots):
+            engine = TrendEngine(today)
+            for i, snapshot in enumerate(snapshots):
+                engine.add_snapshot(str(i), snapshot)
+            deltas = engine.compute()
+            return apply_deltas([dict(s) for s in today], deltas, column=len(snapshots) - 1)
+
+        dict_1w, legacy = timed(lambda: run_dict(windows[:1]), repeat)
+        engine_1w, vectorised = timed(lambda: run_engine(windows[:1]), repeat)
+        dict_3w, _ = timed(lambda: run_dict(windows), repeat)
+        engine_3w, _ = timed(lambda: run_engine(windows), repeat)
+
+        speedup = dict_3w / engine_3w if engine_3w else float("inf")
+        print(f"{n:>10}{dict_1w * 1000:>10.1f}ms{engine_1w * 1000:>10.1f}ms"
+              f"{dict_3w * 1000:>10.1f}ms{engine_3w * 1000:>10.1f}ms{speedup:>11.1f}x  {legacy == vectorised}")
+
+
+def measure_memory(build: Callable) -> Tuple[int, object]:
+    """返回 build() 结果占用的内存（字节，tracemalloc 统计）和结果本身"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, result
+
+
+def bench_records(args: argparse.Namespace) -> None:
+    """
+    榜单记录内存基准
+
+    模拟抓取结果（owner 为解析时新建的字符串）并写入变化值，对比
+    dict 原地修改与 SkillRecord（__slots__ + owner 驻留）的内存占用
+    """
+    print(f"{'skills':>10}{'dict':>12}{'record':>12}{'dict/skill':>12}{'rec/skill':>12}{'saving':>9}")
+    for n in args.sizes:
+        previous, today = make_leaderboard(n)
+        # 与解析器一致：每条记录持有独立的 owner / url 字符串
+        rows = [(s["rank"], s["name"], "".join(s["owner"]), s["installs"], "".join(s["url"])) for s in today]
+        keys = ("rank", "name", "owner", "installs", "url")
+        engine = TrendEngine(today)
+        engine.add_snapshot(None, previous)
+        deltas = engine.compute()
+
+        def build_dicts():
+            return apply_deltas([dict(zip(keys, row)) for row in rows], deltas)
+
+        def build_records():
+            return delta_records([SkillRecord(*row) for row in rows], deltas)
+
+        dict_bytes, dicts = measure_memory(build_dicts)
+        record_bytes, records = measure_memory(build_records)
+        assert [r.to_dict() for r in records] == dicts
+
+        saving = 1 - record_bytes / dict_bytes if dict_bytes else 0
+        print(f"{n:>10}{dict_bytes / 1e6:>10.1f}MB{record_bytes / 1e6:>10.1f}MB"
+              f"{dict_bytes / n:>11.0f}B{record_bytes / n:>11.0f}B{saving:>8.0%}")
+
+
+# 模拟数据使用的分类
+CATEGORY_KEYS = tuple(key for key in CATEGORY_NAMES_EN if key != "unclassified")
+
+
+def make_report_trends(seed: int) -> Dict:
+    """生成一份模拟的报告数据（各分区条数与默认 TREND_SECTION_LIMITS 相当）"""
+    rng = random.Random(seed)
+
+    def skill(rank: int) -> Dict:
+        return {
+            "rank": rank, "name": f"skill-{seed}-{rank}", "owner": f"owner-{rank % 17}", "url": "",
+            "installs": rng.randint(0, 100000), "rank_delta": rng.randint(-10, 10),
+            "installs_rate": rng.random(), "momentum_7d": rng.random(), "zscore": rng.uniform(-5, 5),
+            "projected_rank": rng.randint(1, 20),
+            "summary": "Summarises the skill in one sentence " * 2, "description": "Longer description " * 5,
+            "category": CATEGORY_KEYS[rank % len(CATEGORY_KEYS)], "category_zh": "开发工具",
+            "solves": ["problem one", "problem two", "problem three"],
+        }
+
+    return {
+        "top_20": [skill(r) for r in range(1, 21)],
+        "rising_top5": [skill(r) for r in range(21, 26)],
+        "falling_top5": [skill(r) for r in range(26, 31)],
+        "new_entries": [skill(r) for r in range(31, 34)],
+        "dropped_entries": [{"name": f"gone-{seed}-{i}", "yesterday_rank": i} for i in range(1, 4)],
+        "surging": [skill(r) for r in range(34, 36)],
+        "momentum": [skill(r) for r in range(36, 41)],
+        "owner_leaders": [
+            {"owner": f"owner-{i}", "installs_delta": rng.randint(0, 50000), "best_rank": i,
+             "top_skill": f"skill-{seed}-{i}", "skills": rng.randint(1, 9)}
+            for i in range(1, 6)
+        ],
+        "predicted_entrants": [skill(r) for r in range(41, 46)],
+        "categories": [
+            {"category": CATEGORY_KEYS[i], "category_zh": f"分类{i}", "count": rng.randint(1, 50),
+             "installs_share": rng.random() / 5, "share_delta": rng.uniform(-0.01, 0.01),
+             "momentum": rng.uniform(-0.2, 0.5), "new_skills": rng.randint(0, 3)}
+            for i in range(8)
+        ],
+    }
+
+
+def bench_reports(args: argparse.Namespace) -> None:
+    """
+    邮件渲染基准
+
+    渲染 count 份内容各不相同的报告（模拟按日期回放 / 多订阅者），
+    与只含静态页头页尾的空报告对比，得到静态部分占单份报告的开销比例
+    """
+    reporter = HTMLReporter()
+    reports = [(make_report_trends(seed), f"2026-01-{seed % 28 + 1:02d}") for seed in range(args.count)]
+
+    def render_all():
+        return [reporter.generate_email_html(trends, date) for trends, date in reports]
+
+    def render_static():
+        return [reporter.generate_email_html({}, date) for _, date in reports]
+
+    full, html = timed(render_all)
+    static, _ = timed(render_static)
+    size = sum(len(h.encode("utf-8")) for h in html)
+
+    print(f"{'reports':>10}{'total':>12}{'per report':>14}{'static':>12}{'static %':>10}{'MB/s':>10}")
+    print(f"{args.count:>10}{full * 1000:>10.1f}ms{full / args.count * 1e6:>12.1f}µs"
+          f"{static / args.count * 1e6:>10.1f}µs{static / full:>10.1%}{size / full / 1e6:>10.1f}")
+
+
+def measure_peak(run: Callable) -> Tuple[int, object]:
+    """返回 run() 执行期间的峰值内存（字节，tracemalloc 统计）和结果"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = run()
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return peak, result
+
+
+def iter_report_skills(n: int) -> Iterator[Dict]:
+    """逐条生成榜单技能（模拟数据库游标，输入本身不占内存）"""
+    rng = random.Random(n)
+    for rank in range(1, n + 1):
+        yield {"rank": rank, "name": f"skill-{rank}", "owner": f"owner-{rank % 97}/skills", "url": "",
+               "installs": rng.randint(0, 100000), "installs_delta": rng.randint(-500, 500),
+               "rank_delta": rng.randint(-10, 10)}
+
+
+def bench_stream(args: argparse.Namespace) -> None:
+    """
+    大报告峰值内存基准
+
+    同一份完整榜单页面分别以「拼成字符串后写出」和「iter_leaderboard_html + write_chunks
+    流式写出」两种方式写入 gzip 文件，对比渲染期间的峰值内存
+    """
+    reporter = HTMLReporter()
+    path = os.devnull
+
+    def build_then_write(n):
+        html = "".join(reporter.iter_leaderboard_html(iter_report_skills(n), "2026-01-01"))
+        with gzip.open(path, "wt", encoding="utf-8") as out:
+            out.write(html)
+        return len(html)
+
+    def stream(n):
+        with gzip.open(path, "wt", encoding="utf-8") as out:
+            return write_chunks(reporter.iter_leaderboard_html(iter_report_skills(n), "2026-01-01"), out)
+
+    print(f"{'skills':>10}{'html':>10}{'string':>12}{'stream':>12}{'ratio':>9}{'string t':>11}{'stream t':>11}")
+    for n in args.sizes:
+        string_peak, size = measure_peak(lambda: build_then_write(n))
+        stream_peak, streamed = measure_peak(lambda: stream(n))
+        assert size == streamed
+        string_time, _ = timed(lambda: build_then_write(n), repeat=1)
+        stream_time, _ = timed(lambda: stream(n), repeat=1)
+        print(f"{n:>10}{size / 1e6:>8.1f}MB{string_peak / 1e6:>10.1f}MB{stream_peak / 1e6:>10.2f}MB"
+              f"{string_peak / stream_peak:>8.0f}x{string_time * 1000:>9.0f}ms{stream_time * 1000:>9.0f}ms")
+
+
+def make_subscriptions(n: int, seed: int = 0) -> List[Dict]:
+    """生成 n 个订阅者：一半不过滤分类，其余订阅 1~3 个分类；条数、语言、渠道随机"""
+    rng = random.Random(seed)
+    subscriptions = []
+    for i in range(n):
+        categories = rng.sample(CATEGORY_KEYS, rng.randint(1, 3)) if rng.random() < 0.5 else []
+        subscriptions.append(make_subscription(
+            rng.choice(("telegram", "resend")), f"subscriber-{i}", categories,
+            rng.choice((5, 10, 20)), rng.choice(LANGUAGES),
+        ))
+    return subscriptions
+
+
+def bench_fanout(args: argparse.Namespace) -> None:
+    """
+    订阅者分发基准
+
+    同一份趋势数据为每个订阅者渲染过滤后的报告（Telegram 分页 / 邮件优化 + 字节预算），
+    对比每个订阅者独立渲染（抽样 --baseline 个，按订阅者平均耗时折算），并校验两者输出一致
+    """
+    trends = make_report_trends(0)
+    date = "2026-01-01"
+    subscriptions = make_subscriptions(args.subscribers)
+
+    def independent(subscription):
+        reporter = HTMLReporter(subscription["language"])
+        view = filter_trends(trends, subscription["categories"], subscription["top_n"])
+        if subscription["channel"] == "telegram":
+            return {"messages": reporter.generate_telegram_messages(view, date)}
+        return optimize_email_html(reporter.generate_email_html(view, date))
+
+    sample = subscriptions[:args.baseline]
+    baseline, expected = timed(lambda: [independent(sub) for sub in sample], repeat=1)
+
+    def run_fanout():
+        fanout = ReportFanout(trends, date, max_bytes=0)
+        return fanout, fanout.render_all(subscriptions)
+
+    elapsed, (fanout, reports) = timed(run_fanout)
+    for want, (subscription, report) in zip(expected, reports):
+        assert want == (report if subscription["channel"] == "telegram" else report["html"])
+
+    stats = fanout.stats()
+    per_subscriber = baseline / len(sample)
+    print(f"{'subscribers':>12}{'views':>8}{'cards':>8}{'fanout':>11}{'independent':>14}{'speedup':>9}")
+    print(f"{args.subscribers:>12}{stats['views']:>8}{stats['cards']:>8}{elapsed * 1000:>9.1f}ms"
+          f"{per_subscriber * args.subscribers * 1000:>12.0f}ms{per_subscriber * args.subscribers / elapsed:>8.0f}x")
+    print(f"   chunk cache: {stats['chunk_hits']} hits / {stats['chunk_misses']} misses")
+
+
+def make_stub_notifier(channel: str, latency: float, fail_every: int) -> type:
+    """模拟渠道：每次请求阻塞 latency 秒，每 fail_every 次请求失败一次（0 不失败）"""
+
+    class StubNotifier(Notifier):
+        report_format = NOTIFIERS[channel].report_format
+        calls = 0
+
+        def send(self, subscription, report, date, delivered):
+            time.sleep(latency)
+            StubNotifier.calls += 1
+            if fail_every and StubNotifier.calls % fail_every == 0:
+                return {"success": False, "message": "HTTP 503"}
+            delivered.append(f"{channel}-{StubNotifier.calls}")
+            return {"success": True, "message": "ok"}
+
+    StubNotifier.channel = channel
+    return StubNotifier
+
+
+def bench_notify(args: argparse.Namespace) -> None:
+    """
+    多渠道通知基准
+
+    各渠道替换为按 --latency 阻塞的模拟发送器（不发出网络请求），每个渠道 --subscribers 个订阅者，
+    对比并发投递的总耗时和逐个渠道依次投递的耗时
+    """
+    latencies = dict(item.split("=", 1) for item in args.latency)
+    trends = make_report_trends(0)
+    date = "2026-01-01"
+    subscriptions = [make_subscription(channel, f"{channel}-{i}") for channel in latencies
+                     for i in range(args.subscribers)]
+    settings = {channel: {"timeout": 30.0, "retries": 2, "rate": 0} for channel in latencies}
+    registered = dict(NOTIFIERS)
+
+    def run(members):
+        for channel, latency in latencies.items():
+            NOTIFIERS[channel] = make_stub_notifier(channel, float(latency), args.fail_every)
+        fanout = ReportFanout(trends, date, max_bytes=0)
+        return asyncio.run(deliver_all(fanout, members, settings, backoff=0.01))
+
+    try:
+        result = run(subscriptions)
+        serial = sum(run([sub for sub in subscriptions if sub["channel"] == channel])["elapsed"]
+                     for channel in latencies)
+    finally:
+        NOTIFIERS.clear()
+        NOTIFIERS.update(registered)
+
+    print(f"{'channel':>10}{'latency':>10}{'sent':>6}{'failed':>8}{'retries':>9}{'elapsed':>10}")
+    for channel, stats in result["channels"].items():
+        retries = sum(d["attempts"] - 1 for d in result["deliveries"] if d["channel"] == channel)
+        print(f"{channel:>10}{float(latencies[channel]) * 1000:>8.0f}ms{stats['sent']:>6}{stats['failed']:>8}"
+              f"{retries:>9}{stats['elapsed'] * 1000:>8.0f}ms")
+    print(f"   concurrent: {result['elapsed'] * 1000:.0f}ms | one channel at a time: {serial * 1000:.0f}ms "
+          f"| {serial / result['elapsed']:.1f}x")
+
+
+class StubBotAPI:
+    """
+    本地模拟 Bot API（sendMessage），按与 Telegram 相同的规则限流：超出全局 / 会话限额时返回 429 和 retry_after
+
+    chat_id 为 "blocked" 时返回 403（模拟用户拉黑 Bot）；收到的消息按会话记录在 received 中。
+    faults > 0 时按该比例让消息的首次请求失败：一半返回 429（retry_after=1），一半返回 502（非 JSON 响应体），
+    每个会话的请求时刻和结果记录在 requests 中，用于检查重试是否等够了 retry_after
+    """
+
+    def __init__(self, global_rate: float, chat_rate: float, group_per_minute: float, latency: float = 0.0,
+                 slack: float = 1.1, faults: float = 0.0, seed: int = 0):
+        self.global_rate = global_rate * slack
+        self.chat_rate = chat_rate * slack
+        self.group_rate = group_per_minute / 60.0 * slack
+        self.latency = latency
+        self.faults = faults
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.received: Dict[str, List[str]] = {}
+        self.requests: Dict[str, List[Tuple[float, int, int]]] = {}  # chat_id -> [(时刻, 状态码, retry_after)]
+        self.faulted = set()  # 已注入过故障的 (chat_id, text)
+        self.throttled = 0
+        self.server_errors = 0
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.global_bucket = TokenBucket(self.global_rate, max(1.0, self.global_rate), time.monotonic())
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status, data = stub.handle(body)
+                raw = data.encode() if isinstance(data, str) else json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain" if isinstance(data, str) else "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def handle(self, body: Dict) -> Tuple[int, Union[Dict, str]]:
+        """处理一次 sendMessage，返回 (HTTP 状态码, 响应体：JSON 对象或纯文本)"""
+        time.sleep(self.latency)
+        chat_id = str(body["chat_id"])
+        if chat_id == "blocked":
+            return 403, {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"}
+        with self.lock:
+            status, data = self._handle(chat_id, body["text"])
+            retry_after = (data.get("parameters") or {}).get("retry_after", 0) if isinstance(data, dict) else 0
+            self.requests.setdefault(chat_id, []).append((time.monotonic(), status, retry_after))
+            return status, data
+
+    def _handle(self, chat_id: str, text: str) -> Tuple[int, Union[Dict, str]]:
+        """加锁后的处理：先注入故障，再按限额放行"""
+        key = (chat_id, text)
+        if self.faults and key not in self.faulted and self.rng.random() < self.faults:
+            self.faulted.add(key)
+            if self.rng.random() < 0.5:
+                self.throttled += 1
+                return 429, {"ok": False, "error_code": 429, "parameters": {"retry_after": 1},
+                             "description": "Too Many Requests: retry after 1"}
+            self.server_errors += 1
+            return 502, "Bad Gateway"
+        now = time.monotonic()
+        if chat_id not in self.buckets:
+            rate = self.group_rate if is_group_chat(chat_id) else self.chat_rate
+            self.buckets[chat_id] = TokenBucket(rate, 1.0, now)
+        bucket = self.buckets[chat_id]
+        wait = max(bucket.available_at(now), self.global_bucket.available_at(now)) - now
+        if wait > 0:
+            self.throttled += 1
+            retry_after = math.ceil(wait)
+            return 429, {"ok": False, "error_code": 429, "parameters": {"retry_after": retry_after},
+                         "description": f"Too Many Requests: retry after {retry_after}"}
+        bucket.consume(now)
+        self.global_bucket.consume(now)
+        messages = self.received.setdefault(chat_id, [])
+        messages.append(text)
+        return 200, {"ok": True, "result": {"message_id": len(messages), "chat": {"id": chat_id}}}
+
+    def __enter__(self) -> "StubBotAPI":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_broadcast_jobs(chats: int, parts: int) -> List[Dict]:
+    """生成群发任务：每 4 个会话中 1 个是群组（其中一半发到话题），最后一个会话已拉黑 Bot"""
+    jobs = []
+    for i in range(chats):
+        group = i % 4 == 3
+        chat_id = "blocked" if i == chats - 1 else (f"-100{i}" if group else str(1000 + i))
+        jobs.append({"chat_id": chat_id, "thread_id": 7 if group and i % 8 == 7 else None,
+                     "texts": [f"report part {p + 1}/{parts} for chat {i}" for p in range(parts)]})
+    return jobs
+
+
+def bench_broadcast(args: argparse.Namespace) -> None:
+    """
+    Telegram 群发基准
+
+    本地模拟 Bot API 按 Telegram 的限额（全局 30 条/秒、私聊 1 条/秒、群组 20 条/分钟，均乘以 --scale 加速）限流，
+    对比逐个会话顺序发送（会话内固定间隔，不感知全局限额和 429）与令牌桶群发器的送达数、429 次数和吞吐；
+    最后一轮让 --faults 比例的消息首次请求返回 429 / 502，检查群发器仍按顺序送达全部消息，且 429 后等够了 retry_after
+    """
+    global_rate, chat_rate, group_per_minute = 30 * args.scale, 1 * args.scale, 20 * args.scale
+    jobs = make_broadcast_jobs(args.chats, args.parts)
+    total = sum(len(job["texts"]) for job in jobs)
+
+    def sequential(url):
+        sender = TelegramSender("TOKEN", interval=1 / chat_rate, api_base=url)
+        start = time.monotonic()
+        results = [sender.send_messages(job["chat_id"], job["texts"], message_thread_id=job["thread_id"])
+                   for job in jobs]
+        sender.close()
+        elapsed = time.monotonic() - start
+        sent = sum(r["sent"] for r in results)
+        return {"sent": sent, "failed": sum(1 for r in results if not r["success"]), "requests": None,
+                "elapsed": elapsed, "throughput": sent / elapsed}
+
+    def broadcast(url):
+        broadcaster = TelegramBroadcaster("TOKEN", api_base=url, global_rate=global_rate, chat_rate=chat_rate,
+                                          group_per_minute=group_per_minute)
+        try:
+            return broadcaster.broadcast(jobs)
+        finally:
+            broadcaster.close()
+
+    print(f"{total} messages to {len(jobs)} chats | limits: {global_rate:g}/s global, {chat_rate:g}/s per chat, "
+          f"{group_per_minute:g}/min per group")
+    print(f"{'mode':>16}{'sent':>7}{'failed':>8}{'requests':>10}{'429s':>6}{'5xx':>5}{'elapsed':>10}{'msg/s':>8}")
+    runs = (("sequential", sequential, 0.0), ("broadcast", broadcast, 0.0), ("broadcast+faults", broadcast, args.faults))
+    for name, run, faults in runs:
+        with StubBotAPI(global_rate, chat_rate, group_per_minute, args.latency, faults=faults) as stub:
+            result = run(stub.url)
+        if run is broadcast:
+            # 除拉黑的会话外全部送达，且每个会话收到的消息与发送顺序一致
+            assert result["failed"] == 1, result["failed"]
+            for job in jobs:
+                if job["chat_id"] != "blocked":
+                    assert stub.received[job["chat_id"]] == job["texts"], job["chat_id"]
+            # 429 之后该会话的下一次请求至少间隔 retry_after 秒
+            for chat_id, log in stub.requests.items():
+                for (at, status, retry_after), (next_at, _, _) in zip(log, log[1:]):
+                    if status == 429:
+                        assert next_at - at >= retry_after, (chat_id, next_at - at, retry_after)
+        requests = sum(map(len, stub.requests.values())) + sum(1 for job in jobs if job["chat_id"] == "blocked")
+        print(f"{name:>16}{result['sent']:>7}{result['failed']:>8}{requests:>10}{stub.throttled:>6}{stub.server_errors:>5}"
+              f"{result['elapsed'] * 1000:>8.0f}ms{result['throughput']:>8.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Skills Trending 性能基准")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    trends = subparsers.add_parser("trends", help="趋势计算：dict 循环 vs 向量化引擎")
+    trends.add_argument("--sizes", type=int, nargs="+", default=[100, 10000, 1000000])
+    trends.set_defaults(func=bench_trends)
+
+    records = subparsers.add_parser("records", help="内存：dict vs SkillRecord")
+    records.add_argument("--sizes", type=int, nargs="+", default=[100000])
+    records.set_defaults(func=bench_records)
+
+    reports = subparsers.add_parser("reports", help="邮件渲染：预编译模板 + 单一缓冲区")
+    reports.add_argument("--count", type=int, default=1000)
+    reports.set_defaults(func=bench_reports)
+
+    stream = subparsers.add_parser("stream", help="峰值内存：完整榜单拼接 vs 流式写入")
+    stream.add_argument("--sizes", type=int, nargs="+", default=[50000])
+    stream.set_defaults(func=bench_stream)
+
+    fanout = subparsers.add_parser("fanout", help="订阅者分发：共享卡片缓存 vs 逐个独立渲染")
+    fanout.add_argument("--subscribers", type=int, default=1000)
+    fanout.add_argument("--baseline", type=int, default=50, help="独立渲染的抽样订阅者数")
+    fanout.set_defaults(func=bench_fanout)
+
+    notify = subparsers.add_parser("notify", help="多渠道通知：并发投递 vs 逐个渠道依次投递")
+    notify.add_argument("--subscribers", type=int, default=10, help="每个渠道的订阅者数")
+    notify.add_argument("--latency", nargs="+", default=["telegram=0.05", "resend=0.3", "webhook=0.1"],
+                        help="各渠道单次请求的模拟延迟（秒），格式 channel=seconds")
+    notify.add_argument("--fail-every", type=int, default=7, help="每 N 次请求模拟一次失败（0 不失败）")
+    notify.set_defaults(func=bench_notify)
+
+    broadcast = subparsers.add_parser("broadcast", help="Telegram 群发：逐个会话顺序发送 vs 令牌桶群发器（本地模拟 Bot API）")
+    broadcast.add_argument("--chats", type=int, default=40)
+    broadcast.add_argument("--parts", type=int, default=3, help="每个会话的消息条数")
+    broadcast.add_argument("--scale", type=float, default=10, help="限额倍数（加速模拟，1 为 Telegram 实际限额）")
+    broadcast.add_argument("--latency", type=float, default=0.002, help="模拟服务端处理延迟（秒）")
+    broadcast.add_argument("--faults", type=float, default=0.1, help="最后一轮中首次请求返回 429 / 502 的消息比例")
+    broadcast.set_defaults(func=bench_broadcast)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
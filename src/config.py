@@ -36,6 +36,11 @@ RSS_TIMEOUT = 30  # 秒
 # ============================================================================
 OUTPUT_DIR = os.getenv("OUTPUT_DIR", "docs")
 GITHUB_PAGES_URL = os.getenv("GITHUB_PAGES_URL", "")
+# 机器可读的趋势导出（NDJSON / JSON，供看板和 trending-skills 插件读取）
+EXPORT_ENABLED = os.getenv("EXPORT_ENABLED", "true").lower() == "true"
+EXPORT_DIR = _get_env_str("EXPORT_DIR", "data/export")
+# 每次运行后增量生成归档站点（输出到 OUTPUT_DIR，设置 GITHUB_PAGES_URL 时同时生成 sitemap.xml）
+SITE_ENABLED = os.getenv("SITE_ENABLED", "false").lower() == "true"
 
 # ============================================================================
 # 邮件通知配置
@@ -303,26 +308,116 @@ FETCH_REQUEST_DELAY = 2  # 抓取详情时的请求间隔（秒）
 # ============================================================================
 # 通知渠道配置
 # ============================================================================
-# notify channel: telegram | resend
+# notify channel: telegram | resend | webhook，逗号分隔可同时启用多个渠道（并发发送）
 NOTIFY_CHANNEL = os.getenv("NOTIFY_CHANNEL", "telegram")
+NOTIFY_CHANNELS = tuple(c.strip() for c in NOTIFY_CHANNEL.split(",") if c.strip())
 
 # Telegram
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 TELEGRAM_MESSAGE_THREAD_ID = os.getenv("TELEGRAM_MESSAGE_THREAD_ID")  # optional
+# 单条消息长度上限（Bot API 为 4096 个 UTF-16 码元），超出时按分区/行拆成多条
+TELEGRAM_MESSAGE_LIMIT = _get_env_int("TELEGRAM_MESSAGE_LIMIT", 4096)
+# 同一会话内连续发送的最小间隔（秒），Bot API 建议每个会话每秒不超过 1 条
+TELEGRAM_SEND_INTERVAL = float(os.getenv("TELEGRAM_SEND_INTERVAL", "1.0"))
+# Bot API 地址（可指向自建 Bot API 服务器或本地模拟服务）
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org").rstrip("/")
+# 群发限速（令牌桶）：全局每秒消息数、每个私聊每秒消息数、每个群组每分钟消息数
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+TELEGRAM_GROUP_PER_MINUTE = float(os.getenv("TELEGRAM_GROUP_PER_MINUTE", "20"))
 
 # Resend (email)
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
 RESEND_FROM_EMAIL = os.getenv("RESEND_FROM_EMAIL", "onboarding@resend.dev")
 EMAIL_TO = os.getenv("EMAIL_TO")
+# 邮件 HTML 字节预算：Gmail 对超过约 102KB 的邮件会截断显示，留出邮件头余量
+EMAIL_MAX_BYTES = _get_env_int("EMAIL_MAX_BYTES", 100000)
+# 超出预算时依次降级的分区（先减半再移除，靠前的先降级）；最后才精简 Top 20 的描述
+EMAIL_DEGRADE_SECTIONS = tuple(
+    s.strip() for s in _get_env_str(
+        "EMAIL_DEGRADE_SECTIONS",
+        "dropped_entries,surging,anomalies,categories,owner_leaders,predicted_entrants,momentum,new_entries",
+    ).split(",") if s.strip()
+)
+
+# Webhook：报告摘要（JSON）以 POST 发送到这些地址（逗号分隔）
+WEBHOOK_URLS = tuple(u.strip() for u in os.getenv("WEBHOOK_URL", "").split(",") if u.strip())
+
+# 各渠道的单次请求超时（秒）、失败重试次数和发送速率（每秒投递数），
+# 可用 NOTIFY_<渠道>_TIMEOUT / NOTIFY_<渠道>_RETRIES / NOTIFY_<渠道>_RATE 单独覆盖；
+# telegram 由 TELEGRAM_GLOBAL_RATE 等令牌桶限速（没有 RATE），RETRIES 为单条消息遇到 429 / 5xx 时的重试次数
+NOTIFY_SETTINGS = {
+    channel: {
+        "timeout": float(_get_env_str(f"NOTIFY_{channel.upper()}_TIMEOUT", "30")),
+        "retries": _get_env_int(f"NOTIFY_{channel.upper()}_RETRIES", 2),
+        "rate": float(_get_env_str(f"NOTIFY_{channel.upper()}_RATE", rate)),
+    }
+    for channel, rate in (("telegram", "0"), ("resend", "2"), ("webhook", "10"))
+}
+# 重试前的等待时间（秒），每次翻倍
+NOTIFY_RETRY_BACKOFF = float(_get_env_str("NOTIFY_RETRY_BACKOFF", "2.0"))
 
 # ============================================================================
 # 数据库配置
 # ============================================================================
 DB_PATH = os.getenv("DB_PATH", "data/trends.db")
 DB_RETENTION_DAYS = int(os.getenv("DB_RETENTION_DAYS", "30"))
+# 后台写入线程（write-behind）：网络阶段不等待 SQLite 提交
+DB_WRITE_BEHIND = os.getenv("DB_WRITE_BEHIND", "false").lower() == "true"
+DB_WRITE_QUEUE_SIZE = _get_env_int("DB_WRITE_QUEUE_SIZE", 64)
+# 技能详情全文检索默认返回数量
+SEARCH_RESULT_LIMIT = _get_env_int("SEARCH_RESULT_LIMIT", 10)
+# 趋势对比窗口（天）：0 表示与上一期快照对比
+TREND_LOOKBACK_DAYS = _get_env_int("TREND_LOOKBACK_DAYS", 0)
+# 报告中各趋势分区的条数上限（0 表示不限）
+TREND_SECTION_LIMITS = {
+    "top": _get_env_int("TREND_TOP_LIMIT", 20),
+    "rising": _get_env_int("TREND_RISING_LIMIT", 5),
+    "falling": _get_env_int("TREND_FALLING_LIMIT", 5),
+    "new": _get_env_int("TREND_NEW_LIMIT", 0),
+    "dropped": _get_env_int("TREND_DROPPED_LIMIT", 0),
+    "surging": _get_env_int("TREND_SURGING_LIMIT", 0),
+    "momentum": _get_env_int("TREND_MOMENTUM_LIMIT", 5),
+    "anomalies": _get_env_int("TREND_ANOMALIES_LIMIT", 0),
+    "owner_leaders": _get_env_int("TREND_OWNER_LEADERS_LIMIT", 5),
+    "predicted_entrants": _get_env_int("TREND_PREDICTED_ENTRANTS_LIMIT", 5),
+}
+# 物化到 trend_entries 的每个分区条数上限（0 表示完整列表）
+TREND_STORE_LIMIT = _get_env_int("TREND_STORE_LIMIT", 0)
 
 # ============================================================================
 # 告警阈值
 # ============================================================================
 SURGE_THRESHOLD = float(os.getenv("SURGE_THRESHOLD", "0.3"))  # 30% 暴涨阈值
+# 暴涨判定方式：fixed（固定 SURGE_THRESHOLD）| percentile（历史 installs_rate 分位数）
+SURGE_MODE = _get_env_str("SURGE_MODE", "fixed")
+SURGE_PERCENTILE = float(os.getenv("SURGE_PERCENTILE", "0.99"))
+# 分位数统计的历史窗口（天），0 表示所有保留的快照
+SURGE_WINDOW_DAYS = _get_env_int("SURGE_WINDOW_DAYS", 0)
+# 历史样本不足时回退到固定阈值
+SURGE_MIN_SAMPLES = _get_env_int("SURGE_MIN_SAMPLES", 200)
+# 异常检测：日均增长率相对自身历史基线的 |z-score| 阈值
+ANOMALY_Z_THRESHOLD = float(os.getenv("ANOMALY_Z_THRESHOLD", "3.0"))
+# 计算 z-score 所需的最少历史观测次数
+ANOMALY_MIN_OBSERVATIONS = _get_env_int("ANOMALY_MIN_OBSERVATIONS", 3)
+
+# ============================================================================
+# 安装量预测（Holt 双指数平滑）
+# ============================================================================
+FORECAST_ALPHA = float(os.getenv("FORECAST_ALPHA", "0.8"))  # 水平平滑系数
+FORECAST_BETA = float(os.getenv("FORECAST_BETA", "0.3"))  # 趋势平滑系数
+# 拟合使用的历史窗口（天）
+FORECAST_HISTORY_DAYS = _get_env_int("FORECAST_HISTORY_DAYS", 30)
+# 预测步长（天），0 表示取最近几期快照间隔的中位数（即下一次运行）
+FORECAST_HORIZON_DAYS = _get_env_int("FORECAST_HORIZON_DAYS", 0)
+# 预测进入的榜单范围（Top N）
+FORECAST_TOP_N = _get_env_int("FORECAST_TOP_N", 20)
+
+# ============================================================================
+# 迷你走势图（报告卡片中的内联 SVG）
+# ============================================================================
+# 走势图覆盖的最近快照期数，0 表示不生成
+SPARKLINE_POINTS = _get_env_int("SPARKLINE_POINTS", 10)
+# 进程内缓存的走势图数量上限（按 (技能, 快照日期) 缓存）
+SPARKLINE_CACHE_SIZE = _get_env_int("SPARKLINE_CACHE_SIZE", 4096)
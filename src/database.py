@@ -4,12 +4,173 @@ SQLite 数据库操作模块
 """
 import os
 import sqlite3
+import re
 import json
+import math
+import difflib
+import hashlib
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 from pathlib import Path
+from contextlib import contextmanager
+
+from src.config import DB_PATH, DB_RETENTION_DAYS, SEARCH_RESULT_LIMIT
+
+
+# 物化趋势分区名
+TREND_SECTIONS = ("rising", "falling", "new", "dropped", "surging")
+
+# skill_stats 表的列（顺序即写入顺序）
+SKILL_STATS_COLUMNS = (
+    "name", "last_date", "last_installs", "last_rank", "observations",
+    "growth_mean", "growth_var", "last_growth", "last_zscore",
+    "growth_ewma_3d", "growth_ewma_7d", "growth_ewma_30d",
+    "momentum_3d", "momentum_7d", "momentum_30d",
+)
+
+# 未分类技能（skills_details 中没有分类缓存）在分类统计中的名称
+UNCLASSIFIED_CATEGORY = ("unclassified", "未分类")
+
+# trend_categories 在初始版本之后新增的列（旧库在 init_db 中补齐）
+TREND_CATEGORY_EXTRA_COLUMNS = {
+    "installs": "INTEGER NOT NULL DEFAULT 0",
+    "installs_share": "REAL NOT NULL DEFAULT 0",
+    "share_delta": "REAL NOT NULL DEFAULT 0",
+    "installs_delta": "INTEGER NOT NULL DEFAULT 0",
+    "new_skills": "INTEGER NOT NULL DEFAULT 0",
+    "growth_ewma": "REAL NOT NULL DEFAULT 0",
+    "momentum": "REAL NOT NULL DEFAULT 0",
+}
+
+# 分类动量的 EWMA 时间常数（天）
+CATEGORY_MOMENTUM_DAYS = 7
+
+# owner_stats 表的列（顺序即写入顺序，date 之外）
+OWNER_STATS_COLUMNS = ("owner", "skills", "total_installs", "installs_delta", "best_rank", "top_skill", "momentum")
+
+# 快照差异的状态：新上榜 / 跌出 / 排名变化 / 排名不变
+DIFF_STATUSES = ("new", "dropped", "moved", "unchanged")
+
+# 快照差异：新一期左连接上一期（UNIQUE(date, name) 索引点查），按名次流式返回
+SNAPSHOT_DIFF_CURRENT_SQL = """
+    SELECT CASE WHEN p.name IS NULL THEN 'new'
+                WHEN p.rank != c.rank THEN 'moved'
+                ELSE 'unchanged' END AS status,
+           c.name, c.owner, c.url, c.rank, p.rank AS previous_rank, p.rank - c.rank AS rank_delta,
+           c.installs, p.installs AS previous_installs, c.installs - p.installs AS installs_delta
+    FROM skills_daily c
+    LEFT JOIN skills_daily p ON p.date = ? AND p.name = c.name
+    WHERE c.date = ?
+"""
+
+# 快照差异：上一期中不在新一期的技能（NOT EXISTS 反连接）
+SNAPSHOT_DIFF_DROPPED_SQL = """
+    SELECT 'dropped' AS status,
+           p.name, p.owner, p.url, NULL AS rank, p.rank AS previous_rank, NULL AS rank_delta,
+           NULL AS installs, p.installs AS previous_installs, NULL AS installs_delta
+    FROM skills_daily p
+    WHERE p.date = ?
+      AND NOT EXISTS (SELECT 1 FROM skills_daily c WHERE c.date = ? AND c.name = p.name)
+    ORDER BY p.rank
+"""
 
-from src.config import DB_PATH, DB_RETENTION_DAYS
+# 快照差异中各状态的过滤条件（新一期一侧）
+_DIFF_CONDITIONS = {
+    "new": "p.name IS NULL",
+    "moved": "p.rank != c.rank",
+    "unchanged": "p.rank = c.rank",
+}
+
+# 报告/查询使用的读语句（用于 EXPLAIN QUERY PLAN 审计）
+READ_QUERIES = {
+    "skills_by_date": (
+        "SELECT rank, name, owner, installs, installs_delta, installs_rate, rank_delta, url "
+        "FROM skills_daily WHERE date = ? ORDER BY rank",
+        ("2026-01-01",),
+    ),
+    "previous_snapshot": (
+        "SELECT date FROM snapshots WHERE date < ? ORDER BY date DESC LIMIT 1",
+        ("2026-01-01",),
+    ),
+    "available_dates": (
+        "SELECT date FROM snapshots ORDER BY date DESC LIMIT ?",
+        (30,),
+    ),
+    "top_n_names": (
+        "SELECT name FROM skills_daily WHERE date = ? ORDER BY rank ASC LIMIT ?",
+        ("2026-01-01", 20),
+    ),
+    "skill_details": (
+        "SELECT name, summary FROM skills_details WHERE name = ?",
+        ("x",),
+    ),
+    "skill_history": (
+        "SELECT date, rank, installs FROM skills_history WHERE skill_name = ? AND date >= ? ORDER BY date ASC",
+        ("x", "2026-01-01"),
+    ),
+    "installs_history": (
+        "SELECT date, name, installs FROM skills_daily WHERE date >= ? AND date <= ? ORDER BY date",
+        ("2025-12-01", "2026-01-01"),
+    ),
+    "trend_section": (
+        "SELECT t.name, t.rank, t.rank_delta, d.summary, d.category "
+        "FROM trend_entries t LEFT JOIN skills_details d ON t.name = d.name "
+        "WHERE t.date = ? AND t.section = ? ORDER BY t.position LIMIT ?",
+        ("2026-01-01", "rising", 5),
+    ),
+    "search_skill_details": (
+        "SELECT d.name, d.summary, f.rank FROM skills_details_fts f "
+        "JOIN skills_details d ON d.id = f.rowid "
+        "WHERE skills_details_fts MATCH ? ORDER BY f.rank LIMIT ?",
+        ('"remotion"*', 10),
+    ),
+    "rate_sketches": (
+        "SELECT data FROM rate_sketches WHERE date < ? AND date >= ? ORDER BY date",
+        ("2026-01-01", "2025-12-01"),
+    ),
+    "owner_leaders": (
+        "SELECT owner, skills, total_installs, installs_delta, best_rank, top_skill, momentum "
+        "FROM owner_stats WHERE date = ? ORDER BY installs_delta DESC, best_rank ASC LIMIT ?",
+        ("2026-01-01", 5),
+    ),
+    "snapshot_diff": (
+        SNAPSHOT_DIFF_CURRENT_SQL + " ORDER BY c.rank",
+        ("2025-12-01", "2026-01-01"),
+    ),
+    "snapshot_diff_dropped": (
+        SNAPSHOT_DIFF_DROPPED_SQL,
+        ("2025-12-01", "2026-01-01"),
+    ),
+    "category_stats": (
+        "SELECT category, category_zh, count, installs_share, momentum FROM trend_categories "
+        "WHERE date = ? ORDER BY position",
+        ("2026-01-01",),
+    ),
+    "recent_snapshot_dates": (
+        "SELECT date FROM snapshots WHERE date <= ? ORDER BY date DESC LIMIT ?",
+        ("2026-01-01", 10),
+    ),
+    "rank_history": (
+        "SELECT date, name, rank, installs FROM skills_daily "
+        "WHERE date >= ? AND date <= ? AND name IN (SELECT value FROM json_each(?)) ORDER BY date",
+        ("2025-12-01", "2026-01-01", '["x"]'),
+    ),
+    "sent_messages": (
+        "SELECT chat_id, part, message_id, sent_at FROM sent_messages "
+        "WHERE date = ? AND channel = ? ORDER BY chat_id, part",
+        ("2026-01-01", "telegram"),
+    ),
+    "notification_log": (
+        "SELECT channel, target, success, attempts, latency_ms, message FROM notification_log "
+        "WHERE date = ? ORDER BY channel, target",
+        ("2026-01-01",),
+    ),
+    "subscriptions": (
+        "SELECT channel, target, thread_id, categories, top_n, language, active FROM subscriptions "
+        "WHERE active = ? ORDER BY channel, target",
+        (1,),
+    ),
+}
 
 
 class Database:
@@ -25,6 +186,7 @@ class Database:
         self.db_path = db_path or DB_PATH
         self._ensure_db_dir()
         self.conn = None
+        self._transaction_depth = 0
 
     def _ensure_db_dir(self):
         """确保数据库目录存在"""
@@ -43,6 +205,35 @@ class Database:
             self.conn.close()
             self.conn = None
 
+    @contextmanager
+    def transaction(self):
+        """
+        把多次写操作合并为一个事务（期间写方法不单独提交，可嵌套）
+
+        用法:
+            with db.transaction():
+                db.save_skill_details(details)
+                db.save_today_data(date, skills)
+        """
+        self.connect()
+        self._transaction_depth += 1
+        try:
+            yield self
+        except Exception:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.conn.rollback()
+            raise
+        else:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.conn.commit()
+
+    def _commit(self):
+        """写方法的提交点：处于 transaction() 中时延迟到事务结束再提交"""
+        if self._transaction_depth == 0:
+            self.conn.commit()
+
     def __enter__(self):
         self.connect()
         return self
@@ -103,6 +294,200 @@ class Database:
             )
         """)
 
+        # 4. snapshots - 快照目录（每个快照日期一行，date 主键即索引）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                date TEXT PRIMARY KEY,
+                row_count INTEGER NOT NULL,
+                checksum TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # 5. trend_entries - 物化趋势结果（与快照同一事务写入）
+        #    section: rising / falling / new / dropped / surging，position 为榜内顺序
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS trend_entries (
+                date TEXT NOT NULL,
+                section TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                rank INTEGER,
+                previous_rank INTEGER,
+                rank_delta INTEGER DEFAULT 0,
+                installs INTEGER DEFAULT 0,
+                installs_delta INTEGER DEFAULT 0,
+                installs_rate REAL DEFAULT 0,
+                url TEXT,
+                PRIMARY KEY (date, section, position)
+            ) WITHOUT ROWID
+        """)
+
+        # 6. trend_categories - 物化分类统计（按 count 降序的 position）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS trend_categories (
+                date TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                category TEXT,
+                category_zh TEXT,
+                count INTEGER NOT NULL,
+                installs INTEGER NOT NULL DEFAULT 0,
+                installs_share REAL NOT NULL DEFAULT 0,
+                share_delta REAL NOT NULL DEFAULT 0,
+                installs_delta INTEGER NOT NULL DEFAULT 0,
+                new_skills INTEGER NOT NULL DEFAULT 0,
+                growth_ewma REAL NOT NULL DEFAULT 0,
+                momentum REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (date, position)
+            ) WITHOUT ROWID
+        """)
+        # 旧库迁移：补齐分类趋势列
+        cursor.execute("PRAGMA table_info(trend_categories)")
+        existing_columns = {row["name"] for row in cursor.fetchall()}
+        for column, definition in TREND_CATEGORY_EXTRA_COLUMNS.items():
+            if column not in existing_columns:
+                cursor.execute(f"ALTER TABLE trend_categories ADD COLUMN {column} {definition}")
+
+        # 7. skill_stats - 每个技能的增量统计状态（EWMA / 动量 / z-score 基线）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS skill_stats (
+                name TEXT PRIMARY KEY,
+                last_date TEXT NOT NULL,
+                last_installs INTEGER NOT NULL,
+                last_rank INTEGER NOT NULL,
+                observations INTEGER NOT NULL DEFAULT 0,
+                growth_mean REAL NOT NULL DEFAULT 0,
+                growth_var REAL NOT NULL DEFAULT 0,
+                last_growth REAL NOT NULL DEFAULT 0,
+                last_zscore REAL NOT NULL DEFAULT 0,
+                growth_ewma_3d REAL NOT NULL DEFAULT 0,
+                growth_ewma_7d REAL NOT NULL DEFAULT 0,
+                growth_ewma_30d REAL NOT NULL DEFAULT 0,
+                momentum_3d REAL NOT NULL DEFAULT 0,
+                momentum_7d REAL NOT NULL DEFAULT 0,
+                momentum_30d REAL NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """)
+
+        # 8. rate_sketches - 每期 installs_rate 分布的分位数草图（t-digest JSON，可合并）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rate_sketches (
+                date TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                data TEXT NOT NULL
+            ) WITHOUT ROWID
+        """)
+
+        # 9. owner_stats - 每期按 owner 聚合的统计（与快照同一事务写入）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS owner_stats (
+                date TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                skills INTEGER NOT NULL,
+                total_installs INTEGER NOT NULL,
+                installs_delta INTEGER NOT NULL DEFAULT 0,
+                best_rank INTEGER NOT NULL,
+                top_skill TEXT,
+                momentum REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (date, owner)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_owner_stats_delta
+            ON owner_stats(date, installs_delta DESC, best_rank)
+        """)
+
+        # 10. sent_messages - 已送达的通知消息（一份报告可能拆成多条，part 从 1 开始）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sent_messages (
+                date TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                chat_id TEXT NOT NULL,
+                part INTEGER NOT NULL,
+                message_id TEXT NOT NULL,
+                sent_at TEXT NOT NULL,
+                PRIMARY KEY (date, channel, chat_id, part)
+            ) WITHOUT ROWID
+        """)
+
+        # 11. subscriptions - 报告订阅者（每个订阅者收到按分类/条数/语言过滤的视图）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS subscriptions (
+                channel TEXT NOT NULL,
+                target TEXT NOT NULL,
+                thread_id INTEGER,
+                categories TEXT NOT NULL DEFAULT '[]',
+                top_n INTEGER NOT NULL DEFAULT 20,
+                language TEXT NOT NULL DEFAULT 'en',
+                active INTEGER NOT NULL DEFAULT 1,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (channel, target)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_subscriptions_active
+            ON subscriptions(active, channel, target)
+        """)
+
+        # 12. notification_log - 每次投递的结果和耗时（按日期、渠道、目标覆盖）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS notification_log (
+                date TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                target TEXT NOT NULL,
+                success INTEGER NOT NULL,
+                attempts INTEGER NOT NULL,
+                latency_ms INTEGER NOT NULL,
+                message TEXT,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (date, channel, target)
+            ) WITHOUT ROWID
+        """)
+
+        # 13. skills_details_fts - 技能详情全文索引（外部内容表，由触发器同步）
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'skills_details_fts'")
+        fts_exists = cursor.fetchone() is not None
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS skills_details_fts USING fts5(
+                name, summary, description, use_case, solves,
+                content='skills_details',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        """)
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS skills_details_vocab
+            USING fts5vocab(skills_details_fts, 'row')
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS skills_details_ai AFTER INSERT ON skills_details BEGIN
+                INSERT INTO skills_details_fts (rowid, name, summary, description, use_case, solves)
+                VALUES (new.id, new.name, new.summary, new.description, new.use_case, new.solves);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS skills_details_ad AFTER DELETE ON skills_details BEGIN
+                INSERT INTO skills_details_fts (skills_details_fts, rowid, name, summary, description, use_case, solves)
+                VALUES ('delete', old.id, old.name, old.summary, old.description, old.use_case, old.solves);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS skills_details_au AFTER UPDATE ON skills_details BEGIN
+                INSERT INTO skills_details_fts (skills_details_fts, rowid, name, summary, description, use_case, solves)
+                VALUES ('delete', old.id, old.name, old.summary, old.description, old.use_case, old.solves);
+                INSERT INTO skills_details_fts (rowid, name, summary, description, use_case, solves)
+                VALUES (new.id, new.name, new.summary, new.description, new.use_case, new.solves);
+            END
+        """)
+        if not fts_exists:
+            # 旧库迁移：为已有详情建立索引，并设置列权重（name > summary > 其他）
+            cursor.execute("INSERT INTO skills_details_fts (skills_details_fts) VALUES ('rebuild')")
+            cursor.execute("""
+                INSERT INTO skills_details_fts (skills_details_fts, rank)
+                VALUES ('rank', 'bm25(10.0, 5.0, 2.0, 2.0, 1.0)')
+            """)
+
         # 创建索引
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_date ON skills_daily(date)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_name ON skills_daily(name)")
@@ -112,16 +497,31 @@ class Database:
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_history_name ON skills_history(skill_name)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_history_date ON skills_history(date)")
 
+        # 旧库迁移：为已有快照补建目录
+        cursor.execute("""
+            SELECT DISTINCT date FROM skills_daily
+            WHERE date NOT IN (SELECT date FROM snapshots)
+        """)
+        for row in cursor.fetchall():
+            self._register_snapshot(cursor, row["date"])
+
         self.conn.commit()
         print(f"✅ 数据库初始化完成: {self.db_path}")
 
-    def save_today_data(self, date: str, skills: List[Dict]) -> None:
+    def save_today_data(self, date: str, skills: List[Dict], trends: Dict[str, List[Dict]] = None,
+                        stats: List[Dict] = None, rate_sketch: Tuple[int, str] = None,
+                        owners: List[Dict] = None) -> None:
         """
         保存今日数据
 
         Args:
             date: 日期 YYYY-MM-DD
             skills: 技能列表
+            trends: 物化趋势分区 {section: [skill, ...]}（见 TREND_SECTIONS），
+                与快照在同一事务中写入
+            stats: 更新后的技能统计状态（见 momentum.update_skill_stats），同一事务写入
+            rate_sketch: 本期 installs_rate 草图 (样本数, JSON)，同一事务写入
+            owners: 本期 owner 聚合（见 trend_engine.aggregate_owners），同一事务写入
         """
         self.connect()
         cursor = self.conn.cursor()
@@ -155,9 +555,287 @@ class Database:
                 skill.get("installs")
             ))
 
-        self.conn.commit()
+        # 与快照同一事务更新快照目录和物化趋势
+        self._register_snapshot(cursor, date)
+        if trends is not None:
+            self._save_trend_entries(cursor, date, trends)
+        self._save_trend_categories(cursor, date)
+        if stats:
+            self._save_skill_stats(cursor, stats)
+        if rate_sketch is not None:
+            cursor.execute("""
+                INSERT OR REPLACE INTO rate_sketches (date, count, data)
+                VALUES (?, ?, ?)
+            """, (date, rate_sketch[0], rate_sketch[1]))
+        if owners is not None:
+            self._save_owner_stats(cursor, date, owners)
+
+        self._commit()
         print(f"✅ 保存今日数据: {len(skills)} 条记录")
 
+    def _register_snapshot(self, cursor: sqlite3.Cursor, date: str) -> None:
+        """
+        根据 skills_daily 中的实际行写入/更新快照目录
+
+        Args:
+            cursor: 当前事务的游标
+            date: 快照日期 YYYY-MM-DD
+        """
+        cursor.execute("""
+            SELECT rank, name, installs
+            FROM skills_daily
+            WHERE date = ?
+            ORDER BY rank, name
+        """, (date,))
+
+        digest = hashlib.sha1()
+        row_count = 0
+        for row in cursor.fetchall():
+            digest.update(f"{row['rank']}|{row['name']}|{row['installs']}\n".encode("utf-8"))
+            row_count += 1
+
+        if row_count == 0:
+            cursor.execute("DELETE FROM snapshots WHERE date = ?", (date,))
+            return
+
+        cursor.execute("""
+            INSERT OR REPLACE INTO snapshots (date, row_count, checksum)
+            VALUES (?, ?, ?)
+        """, (date, row_count, digest.hexdigest()))
+
+    def _save_trend_entries(self, cursor: sqlite3.Cursor, date: str, trends: Dict[str, List[Dict]]) -> None:
+        """
+        写入物化趋势分区（覆盖该日期已有结果）
+
+        Args:
+            cursor: 当前事务的游标
+            date: 快照日期 YYYY-MM-DD
+            trends: {section: [skill, ...]}，列表顺序即 position
+        """
+        cursor.execute("DELETE FROM trend_entries WHERE date = ?", (date,))
+
+        rows = []
+        for section in TREND_SECTIONS:
+            for position, skill in enumerate(trends.get(section, [])):
+                rows.append((
+                    date,
+                    section,
+                    position,
+                    skill.get("name"),
+                    skill.get("rank"),
+                    skill.get("yesterday_rank"),
+                    skill.get("rank_delta", 0),
+                    skill.get("installs", 0),
+                    skill.get("installs_delta", 0),
+                    skill.get("installs_rate", 0),
+                    skill.get("url", "")
+                ))
+
+        cursor.executemany("""
+            INSERT INTO trend_entries
+            (date, section, position, name, rank, previous_rank, rank_delta, installs, installs_delta, installs_rate, url)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+
+    def _save_trend_categories(self, cursor: sqlite3.Cursor, date: str) -> None:
+        """
+        按快照时刻缓存的分类物化分类趋势
+
+        没有分类缓存的技能计入 UNCLASSIFIED_CATEGORY。除技能数外还记录安装量占比及其变化、
+        安装量变化、新上榜技能数，以及在上一期分类行基础上增量更新的 7 天动量
+        （分类安装量日均对数增长率的 EWMA，momentum = expm1(7 × EWMA)）。
+
+        Args:
+            cursor: 当前事务的游标
+            date: 快照日期 YYYY-MM-DD
+        """
+        cursor.execute("DELETE FROM trend_categories WHERE date = ?", (date,))
+
+        previous_date = self.get_previous_snapshot_date(date)
+        category, category_zh = UNCLASSIFIED_CATEGORY
+
+        cursor.execute("""
+            SELECT COALESCE(NULLIF(d.category, ''), ?) AS category,
+                   COALESCE(MAX(NULLIF(d.category_zh, '')), ?) AS category_zh,
+                   COUNT(*) AS count,
+                   COALESCE(SUM(s.installs), 0) AS installs,
+                   COALESCE(SUM(s.installs_delta), 0) AS installs_delta,
+                   SUM(p.name IS NULL) AS new_skills
+            FROM skills_daily s
+            LEFT JOIN skills_details d ON s.name = d.name
+            LEFT JOIN skills_daily p ON p.date = ? AND p.name = s.name
+            WHERE s.date = ?
+            GROUP BY 1
+            ORDER BY count DESC, installs DESC
+        """, (category, category_zh, previous_date, date))
+        current = [dict(row) for row in cursor.fetchall()]
+
+        previous = {}
+        if previous_date:
+            cursor.execute("""
+                SELECT category, installs_share, growth_ewma
+                FROM trend_categories
+                WHERE date = ?
+            """, (previous_date,))
+            previous = {row["category"]: row for row in cursor.fetchall()}
+
+        total = sum(row["installs"] for row in current)
+        dt = max(_days_between(previous_date, date), 1) if previous_date else 1
+        alpha = 1.0 - math.exp(-dt / CATEGORY_MOMENTUM_DAYS)
+
+        rows = []
+        for position, row in enumerate(current):
+            share = row["installs"] / total if total else 0.0
+            before = previous.get(row["category"])
+            base = row["installs"] - row["installs_delta"]
+            if before is not None and base > 0 and row["installs"] > 0:
+                growth = math.log(row["installs"] / base) / dt
+                growth_ewma = before["growth_ewma"] + alpha * (growth - before["growth_ewma"])
+            else:
+                growth_ewma = before["growth_ewma"] if before is not None else 0.0
+            rows.append((
+                date, position, row["category"], row["category_zh"], row["count"],
+                row["installs"], round(share, 6),
+                round(share - before["installs_share"], 6) if before is not None else 0.0,
+                row["installs_delta"], row["new_skills"] if previous_date else 0,
+                growth_ewma, round(math.expm1(CATEGORY_MOMENTUM_DAYS * growth_ewma), 6),
+            ))
+
+        cursor.executemany("""
+            INSERT INTO trend_categories
+            (date, position, category, category_zh, count, installs, installs_share, share_delta,
+             installs_delta, new_skills, growth_ewma, momentum)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+
+    def _save_skill_stats(self, cursor: sqlite3.Cursor, stats: List[Dict]) -> None:
+        """
+        写入技能统计状态（按 name 覆盖）
+
+        Args:
+            cursor: 当前事务的游标
+            stats: 状态行列表
+        """
+        cursor.executemany(f"""
+            INSERT OR REPLACE INTO skill_stats ({", ".join(SKILL_STATS_COLUMNS)})
+            VALUES ({", ".join("?" for _ in SKILL_STATS_COLUMNS)})
+        """, [tuple(row.get(c, 0) for c in SKILL_STATS_COLUMNS) for row in stats])
+
+    def _save_owner_stats(self, cursor: sqlite3.Cursor, date: str, owners: List[Dict]) -> None:
+        """
+        写入 owner 聚合（覆盖该日期已有结果）
+
+        Args:
+            cursor: 当前事务的游标
+            date: 快照日期 YYYY-MM-DD
+            owners: owner 聚合行
+        """
+        cursor.execute("DELETE FROM owner_stats WHERE date = ?", (date,))
+        placeholders = ", ".join("?" for _ in OWNER_STATS_COLUMNS)
+        cursor.executemany(f"""
+            INSERT INTO owner_stats (date, {", ".join(OWNER_STATS_COLUMNS)})
+            VALUES (?, {placeholders})
+        """, [(date, *(row[c] for c in OWNER_STATS_COLUMNS)) for row in owners])
+
+    def get_owner_leaders(self, date: str, limit: int = 5) -> List[Dict]:
+        """
+        获取某期安装量增长最多的 owner（读取快照时物化的聚合）
+
+        Args:
+            date: 日期 YYYY-MM-DD
+            limit: 返回数量
+
+        Returns:
+            owner 聚合行列表，按 installs_delta 降序
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+
+        cursor.execute(f"""
+            SELECT {", ".join(OWNER_STATS_COLUMNS)}
+            FROM owner_stats
+            WHERE date = ?
+            ORDER BY installs_delta DESC, best_rank ASC
+            LIMIT ?
+        """, (date, limit))
+
+        return [dict(row) for row in cursor.fetchall()]
+
+    def get_rate_sketches(self, before_date: str, since_date: str = None) -> List[str]:
+        """
+        获取历史各期的 installs_rate 草图（主键范围查询）
+
+        Args:
+            before_date: 只取早于该日期的快照
+            since_date: 可选，只取不早于该日期的快照
+
+        Returns:
+            草图 JSON 列表（按日期升序）
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+
+        cursor.execute("""
+            SELECT data FROM rate_sketches
+            WHERE date < ? AND date >= ?
+            ORDER BY date
+        """, (before_date, since_date or ""))
+
+        return [row["data"] for row in cursor.fetchall()]
+
+    def get_skill_stats(self, names: List[str]) -> Dict[str, Dict]:
+        """
+        按名称批量获取技能统计状态（主键查询，分批 IN）
+
+        Args:
+            names: 技能名称列表
+
+        Returns:
+            {name: state_row}，没有状态的技能不在结果中
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+
+        result = {}
+        unique_names = list(dict.fromkeys(names))
+        for i in range(0, len(unique_names), 500):
+            chunk = unique_names[i:i + 500]
+            cursor.execute(f"""
+                SELECT {", ".join(SKILL_STATS_COLUMNS)}
+                FROM skill_stats
+                WHERE name IN ({", ".join("?" for _ in chunk)})
+            """, chunk)
+            for row in cursor.fetchall():
+                result[row["name"]] = dict(row)
+        return result
+
+    def get_trend_section(self, date: str, section: str, limit: int = None) -> List[Dict]:
+        """
+        读取物化趋势分区（主键范围查询）
+
+        Args:
+            date: 日期 YYYY-MM-DD
+            section: 分区名，见 TREND_SECTIONS
+            limit: 返回数量，默认全部
+
+        Returns:
+            技能列表（附带 skills_details 中的 summary/category）
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+
+        cursor.execute("""
+            SELECT t.name, t.rank, t.previous_rank, t.rank_delta, t.installs, t.installs_delta,
+                   t.installs_rate, t.url, d.summary, d.category, d.category_zh
+            FROM trend_entries t
+            LEFT JOIN skills_details d ON t.name = d.name
+            WHERE t.date = ? AND t.section = ?
+            ORDER BY t.position
+            LIMIT ?
+        """, (date, section, -1 if limit is None else limit))
+
+        return [dict(row) for row in cursor.fetchall()]
+
     def get_skills_by_date(self, date: str) -> List[Dict]:
         """
         获取指定日期的数据
@@ -181,6 +859,264 @@ class Database:
         rows = cursor.fetchall()
         return [dict(row) for row in rows]
 
+    def iter_skills_by_date(self, date: str, batch_size: int = 1000) -> Iterator[sqlite3.Row]:
+        """
+        流式读取指定日期的榜单（不把整期榜单载入内存，用于导出和完整榜单页面）
+
+        Args:
+            date: 日期 YYYY-MM-DD
+            batch_size: 每次从游标取出的行数
+
+        Yields:
+            按名次排列的行，列顺序与 get_skills_by_date 相同:
+            (rank, name, owner, installs, installs_delta, installs_rate, rank_delta, url)
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT rank, name, owner, installs, installs_delta, installs_rate, rank_delta, url
+            FROM skills_daily
+            WHERE date = ?
+            ORDER BY rank
+        """, (date,))
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    def get_installs_history(self, since_date: str, until_date: str) -> List[Tuple[str, str, int]]:
+        """
+        获取一段日期内所有快照的安装量（date 索引范围查询，用于预测）
+
+        Args:
+            since_date: 起始日期（含）
+            until_date: 结束日期（含）
+
+        Returns:
+            [(date, name, installs), ...]，按日期升序
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+
+        cursor.execute("""
+            SELECT date, name, installs
+            FROM skills_daily
+            WHERE date >= ? AND date <= ?
+            ORDER BY date
+        """, (since_date, until_date))
+
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def get_rank_history(self, names: Sequence[str], since_date: str,
+                         until_date: str) -> List[Tuple[str, str, int, int]]:
+        """
+        一次查询取出一批技能在一段日期内的排名和安装量（用于迷你走势图）
+
+        Args:
+            names: 技能名列表
+            since_date: 起始日期（含）
+            until_date: 结束日期（含）
+
+        Returns:
+            [(date, name, rank, installs), ...]，按日期升序
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+
+        cursor.execute("""
+            SELECT date, name, rank, installs
+            FROM skills_daily
+            WHERE date >= ? AND date <= ? AND name IN (SELECT value FROM json_each(?))
+            ORDER BY date
+        """, (since_date, until_date, json.dumps(list(names))))
+
+        return [tuple(row) for row in cursor.fetchall()]
+
+    def get_recent_snapshot_dates(self, date: str, limit: int) -> List[str]:
+        """
+        获取不晚于 date 的最近 limit 期快照日期
+
+        Returns:
+            日期列表（升序）
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+
+        cursor.execute("""
+            SELECT date FROM snapshots
+            WHERE date <= ?
+            ORDER BY date DESC
+            LIMIT ?
+        """, (date, limit))
+
+        return [row["date"] for row in reversed(cursor.fetchall())]
+
+    def get_snapshot(self, date: str) -> Optional[Dict]:
+        """
+        获取快照目录信息
+
+        Args:
+            date: 日期 YYYY-MM-DD
+
+        Returns:
+            {"date", "row_count", "checksum"}，不存在返回 None
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+
+        cursor.execute("""
+            SELECT date, row_count, checksum
+            FROM snapshots
+            WHERE date = ?
+        """, (date,))
+
+        row = cursor.fetchone()
+        return dict(row) if row else None
+
+    def get_previous_snapshot_date(self, date: str, lookback_days: int = None) -> Optional[str]:
+        """
+        解析用于对比的上一期快照日期（走 snapshots 主键索引，单次查询）
+
+        Args:
+            date: 当前日期 YYYY-MM-DD
+            lookback_days: 回看窗口天数；为空时取 date 之前最近的一期，
+                否则取不晚于 date - lookback_days 的最近一期
+
+        Returns:
+            快照日期，没有则返回 None
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+
+        if lookback_days:
+            cutoff = (datetime.strptime(date, "%Y-%m-%d") - timedelta(days=lookback_days)).strftime("%Y-%m-%d")
+            cursor.execute("""
+                SELECT date FROM snapshots
+                WHERE date <= ?
+                ORDER BY date DESC
+                LIMIT 1
+            """, (cutoff,))
+        else:
+            cursor.execute("""
+                SELECT date FROM snapshots
+                WHERE date < ?
+                ORDER BY date DESC
+                LIMIT 1
+            """, (date,))
+
+        row = cursor.fetchone()
+        return row["date"] if row else None
+
+    def get_previous_snapshot_data(self, date: str, lookback_days: int = None) -> Tuple[Optional[str], List[Dict]]:
+        """
+        获取上一期快照数据
+
+        Args:
+            date: 当前日期 YYYY-MM-DD
+            lookback_days: 回看窗口天数，见 get_previous_snapshot_date
+
+        Returns:
+            (上一期日期, 技能列表)；没有上一期时返回 (None, [])
+        """
+        previous_date = self.get_previous_snapshot_date(date, lookback_days)
+        if previous_date is None:
+            return None, []
+        return previous_date, self.get_skills_by_date(previous_date)
+
+    def iter_snapshot_diff(self, from_date: str, to_date: str, statuses: Sequence[str] = None,
+                           batch_size: int = 1000) -> Iterator[Dict]:
+        """
+        在 SQL 中比较两期快照，逐行流式返回差异（不把两期榜单载入内存）
+
+        新一期一侧按名次左连接上一期，跌出的技能用 NOT EXISTS 反连接，
+        两条语句都走 skills_daily 的 (date, name) / (date, rank) 索引。
+
+        Args:
+            from_date: 对比基准快照日期 YYYY-MM-DD
+            to_date: 新一期快照日期 YYYY-MM-DD
+            statuses: 需要的状态，见 DIFF_STATUSES，默认全部
+            batch_size: 每次从游标取出的行数
+
+        Yields:
+            {"status", "name", "owner", "url", "rank", "previous_rank", "rank_delta",
+             "installs", "previous_installs", "installs_delta"}
+            先按名次返回新一期的技能，再按上一期名次返回跌出的技能；
+            新上榜技能的 previous_* 与变化值为 None，跌出技能的当期字段为 None
+        """
+        statuses = DIFF_STATUSES if statuses is None else tuple(statuses)
+        unknown = set(statuses) - set(DIFF_STATUSES)
+        if unknown:
+            raise ValueError(f"未知的差异状态: {', '.join(sorted(unknown))}")
+
+        self.connect()
+        queries = []
+        current = [status for status in DIFF_STATUSES if status in statuses and status != "dropped"]
+        if current:
+            sql = SNAPSHOT_DIFF_CURRENT_SQL
+            if len(current) < len(_DIFF_CONDITIONS):
+                sql += " AND (" + " OR ".join(_DIFF_CONDITIONS[status] for status in current) + ")"
+            queries.append((sql + " ORDER BY c.rank", (from_date, to_date)))
+        if "dropped" in statuses:
+            queries.append((SNAPSHOT_DIFF_DROPPED_SQL, (from_date, to_date)))
+
+        for sql, params in queries:
+            cursor = self.conn.cursor()
+            cursor.execute(sql, params)
+            try:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(row)
+            finally:
+                cursor.close()
+
+    def diff_snapshots(self, from_date: str, to_date: str, statuses: Sequence[str] = None) -> Dict[str, List[Dict]]:
+        """
+        比较两期快照并按状态分组（基于 iter_snapshot_diff）
+
+        Args:
+            from_date: 对比基准快照日期 YYYY-MM-DD
+            to_date: 新一期快照日期 YYYY-MM-DD
+            statuses: 需要的状态，默认全部
+
+        Returns:
+            {"new": [...], "dropped": [...], "moved": [...], "unchanged": [...]}
+            （只包含请求的状态）
+        """
+        statuses = DIFF_STATUSES if statuses is None else tuple(statuses)
+        result = {status: [] for status in DIFF_STATUSES if status in statuses}
+        for row in self.iter_snapshot_diff(from_date, to_date, statuses):
+            result[row["status"]].append(row)
+        return result
+
+    def count_snapshot_diff(self, from_date: str, to_date: str) -> Dict[str, int]:
+        """
+        统计两期快照差异中各状态的技能数（只在 SQL 中聚合）
+
+        Args:
+            from_date: 对比基准快照日期 YYYY-MM-DD
+            to_date: 新一期快照日期 YYYY-MM-DD
+
+        Returns:
+            {"new": n, "dropped": n, "moved": n, "unchanged": n}
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+
+        counts = dict.fromkeys(DIFF_STATUSES, 0)
+        cursor.execute(f"SELECT status, COUNT(*) AS n FROM ({SNAPSHOT_DIFF_CURRENT_SQL}) GROUP BY status",
+                       (from_date, to_date))
+        counts.update((row["status"], row["n"]) for row in cursor.fetchall())
+        cursor.execute(f"SELECT COUNT(*) AS n FROM ({SNAPSHOT_DIFF_DROPPED_SQL})", (from_date, to_date))
+        counts["dropped"] = cursor.fetchone()["n"]
+        return counts
+
     def get_yesterday_data(self, date: str) -> List[Dict]:
         """
         获取昨日数据
@@ -207,10 +1143,23 @@ class Database:
         for detail in details:
             solves_json = json.dumps(detail.get("solves", []), ensure_ascii=False)
 
+            # 使用 UPSERT 而非 INSERT OR REPLACE：REPLACE 删除旧行时不会触发
+            # DELETE 触发器，全文索引会残留旧内容
             cursor.execute("""
-                INSERT OR REPLACE INTO skills_details
+                INSERT INTO skills_details
                 (name, summary, description, use_case, solves, category, category_zh, rules_count, owner, url)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    summary = excluded.summary,
+                    description = excluded.description,
+                    use_case = excluded.use_case,
+                    solves = excluded.solves,
+                    category = excluded.category,
+                    category_zh = excluded.category_zh,
+                    rules_count = excluded.rules_count,
+                    owner = excluded.owner,
+                    url = excluded.url,
+                    updated_at = CURRENT_TIMESTAMP
             """, (
                 detail.get("name"),
                 detail.get("summary"),
@@ -224,7 +1173,7 @@ class Database:
                 detail.get("url")
             ))
 
-        self.conn.commit()
+        self._commit()
         print(f"✅ 保存技能详情: {len(details)} 条记录")
 
     def get_skill_details(self, name: str) -> Optional[Dict]:
@@ -279,6 +1228,209 @@ class Database:
 
         return result
 
+    def search_skill_details(self, query: str, limit: int = None, category: str = None,
+                             fuzzy: bool = True) -> List[Dict]:
+        """
+        全文检索技能详情（name/summary/description/use_case/solves），按 bm25 排序
+
+        每个词按前缀匹配；没有结果且 fuzzy=True 时，用索引词表中相近的词
+        （拼写纠错）重试一次。
+
+        Args:
+            query: 查询文本，如 "remotion" 或 "react best"
+            limit: 返回数量，默认使用配置中的 SEARCH_RESULT_LIMIT
+            category: 可选，按分类过滤（如 "frontend"）
+            fuzzy: 是否启用模糊匹配回退
+
+        Returns:
+            技能详情列表（附带 score，越小越相关）
+        """
+        terms = _search_terms(query)
+        if not terms:
+            return []
+
+        limit = limit or SEARCH_RESULT_LIMIT
+        results = self._match_skill_details(" ".join(_prefix_term(t) for t in terms), limit, category)
+
+        if not results and fuzzy:
+            vocab = self._get_search_vocab()
+            alternatives = []
+            for term in terms:
+                candidates = [term] + difflib.get_close_matches(term, vocab, n=3, cutoff=0.75)
+                alternatives.append("(" + " OR ".join(_prefix_term(c) for c in dict.fromkeys(candidates)) + ")")
+            results = self._match_skill_details(" ".join(alternatives), limit, category)
+
+        return results
+
+    def _match_skill_details(self, match_expr: str, limit: int, category: str = None) -> List[Dict]:
+        """执行一次 FTS5 MATCH 查询"""
+        self.connect()
+        cursor = self.conn.cursor()
+
+        sql = """
+            SELECT d.name, d.summary, d.description, d.use_case, d.solves, d.category, d.category_zh,
+                   d.rules_count, d.owner, d.url, f.rank AS score
+            FROM skills_details_fts f
+            JOIN skills_details d ON d.id = f.rowid
+            WHERE skills_details_fts MATCH ?
+        """
+        params = [match_expr]
+        if category:
+            sql += " AND d.category = ?"
+            params.append(category)
+        sql += " ORDER BY f.rank LIMIT ?"
+        params.append(limit)
+
+        cursor.execute(sql, params)
+
+        results = []
+        for row in cursor.fetchall():
+            detail = dict(row)
+            if detail.get("solves"):
+                detail["solves"] = json.loads(detail["solves"])
+            results.append(detail)
+        return results
+
+    def _get_search_vocab(self) -> List[str]:
+        """获取全文索引词表（模糊匹配候选）"""
+        self.connect()
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT term FROM skills_details_vocab")
+        return [row["term"] for row in cursor.fetchall()]
+
+    def merge_databases(self, paths: List[str]) -> Dict[str, Dict[str, int]]:
+        """
+        合并多个 trends.db（如每次运行上传的 artifact）到当前数据库
+
+        每个文件通过 ATTACH 挂载后用 INSERT ... SELECT 整表批量写入：
+        - 按日期整期合并（MERGE_DATED_TABLES）：同一日期以 skills_daily 中 created_at 最新的一方为准，
+          源库胜出的日期先删除当前库该日期的快照、历史、物化分区、分位数草图和 owner 统计，再整期写入，
+          避免同一日期的各表来自不同次运行
+        - skills_details 按 name 去重，保留 updated_at 较新的行（触发器同步全文索引）
+        - 快照目录按合并后的数据重算，分类统计从最早被改写的日期起按日期顺序重算到最新一期
+
+        Args:
+            paths: 待合并的数据库文件路径列表
+
+        Returns:
+            {table: {"source": 源行数, "inserted": 新增, "updated": 覆盖, "skipped": 跳过}}
+        """
+        self.init_db()
+        self.conn.commit()
+        cursor = self.conn.cursor()
+
+        stats = {table: {"source": 0, "inserted": 0, "updated": 0, "skipped": 0}
+                 for table in (*MERGE_DATED_TABLES, *MERGE_TABLES)}
+        target = Path(self.db_path).resolve()
+        touched_dates = set()
+
+        for path in paths:
+            if Path(path).resolve() == target:
+                continue
+
+            cursor.execute("ATTACH DATABASE ? AS src", (str(path),))
+            try:
+                cursor.execute("SELECT name FROM src.sqlite_master WHERE type = 'table'")
+                source_tables = {row["name"] for row in cursor.fetchall()}
+
+                if "skills_daily" in source_tables:
+                    touched_dates.update(self._merge_dated_tables(cursor, source_tables, stats))
+
+                for table, sql in MERGE_TABLES.items():
+                    if table not in source_tables:
+                        continue
+
+                    cursor.execute(f"SELECT COUNT(*) FROM src.{table}")
+                    source_rows = cursor.fetchone()[0]
+                    cursor.execute(f"SELECT COUNT(*) FROM main.{table}")
+                    before = cursor.fetchone()[0]
+
+                    cursor.execute(sql)
+                    changed = cursor.rowcount
+
+                    cursor.execute(f"SELECT COUNT(*) FROM main.{table}")
+                    inserted = cursor.fetchone()[0] - before
+
+                    table_stats = stats[table]
+                    table_stats["source"] += source_rows
+                    table_stats["inserted"] += inserted
+                    table_stats["updated"] += changed - inserted
+                    table_stats["skipped"] += source_rows - changed
+
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            finally:
+                cursor.execute("DETACH DATABASE src")
+
+        # 快照目录和分类统计由合并后的 skills_daily 重算；分类动量在上一期分类行上递推，
+        # 因此从最早被改写的日期起按日期顺序重算到最新一期
+        for date in sorted(touched_dates):
+            self._register_snapshot(cursor, date)
+        if touched_dates:
+            cursor.execute("SELECT date FROM snapshots WHERE date >= ? ORDER BY date ASC", (min(touched_dates),))
+            for date in [row["date"] for row in cursor.fetchall()]:
+                self._save_trend_categories(cursor, date)
+        self.conn.commit()
+
+        return stats
+
+    def _merge_dated_tables(self, cursor: sqlite3.Cursor, source_tables: set, stats: Dict) -> List[str]:
+        """
+        整期合并挂载的源库（src）中较新的日期
+
+        每个日期只选一次胜出方：源库该日期 skills_daily 的最大 created_at 比当前库新（或当前库没有该日期）时，
+        该日期的所有按日期存储的表都替换为源库的数据；否则源库该日期的行全部跳过
+
+        Args:
+            cursor: 游标（源库已挂载为 src）
+            source_tables: 源库中存在的表
+            stats: merge_databases 的统计，原地累加
+
+        Returns:
+            源库胜出的日期
+        """
+        cursor.execute("DROP TABLE IF EXISTS temp.merge_dates")
+        cursor.execute("""
+            CREATE TEMP TABLE merge_dates AS
+            SELECT s.date AS date, m.created_at IS NOT NULL AS existing
+            FROM (SELECT date, MAX(created_at) AS created_at FROM src.skills_daily GROUP BY date) s
+            LEFT JOIN (SELECT date, MAX(created_at) AS created_at FROM main.skills_daily GROUP BY date) m
+                ON m.date = s.date
+            WHERE m.created_at IS NULL OR s.created_at > m.created_at
+        """)
+        cursor.execute("SELECT date FROM temp.merge_dates")
+        dates = [row["date"] for row in cursor.fetchall()]
+
+        for table, columns in MERGE_DATED_TABLES.items():
+            table_stats = stats[table]
+            # 源库没有的表也清掉当前库中被替换日期的行：缺一个分区好过与快照不一致
+            cursor.execute(f"DELETE FROM main.{table} WHERE date IN (SELECT date FROM temp.merge_dates)")
+            if table not in source_tables:
+                continue
+
+            cursor.execute(f"SELECT COUNT(*) FROM src.{table}")
+            source_rows = cursor.fetchone()[0]
+            cursor.execute(f"""
+                INSERT INTO main.{table} ({columns})
+                SELECT {columns} FROM src.{table}
+                WHERE date IN (SELECT date FROM temp.merge_dates)
+            """)
+            written = cursor.rowcount
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM src.{table}
+                WHERE date IN (SELECT date FROM temp.merge_dates WHERE existing)
+            """)
+            replaced = cursor.fetchone()[0]
+            table_stats["source"] += source_rows
+            table_stats["inserted"] += written - replaced
+            table_stats["updated"] += replaced
+            table_stats["skipped"] += source_rows - written
+
+        cursor.execute("DROP TABLE temp.merge_dates")
+        return dates
+
     def cleanup_old_data(self, days: int = None) -> int:
         """
         清理过期数据
@@ -311,7 +1463,15 @@ class Database:
 
         deleted_history = cursor.rowcount
 
-        self.conn.commit()
+        # 清理快照目录和物化趋势
+        for table in ("snapshots", "trend_entries", "trend_categories", "rate_sketches", "owner_stats",
+                      "sent_messages", "notification_log"):
+            cursor.execute(f"DELETE FROM {table} WHERE date < ?", (cutoff_date,))
+
+        # 清理长期未上榜技能的统计状态
+        cursor.execute("DELETE FROM skill_stats WHERE last_date < ?", (cutoff_date,))
+
+        self._commit()
         total_deleted = deleted_daily + deleted_history
 
         if total_deleted > 0:
@@ -350,14 +1510,39 @@ class Database:
         cursor = self.conn.cursor()
 
         cursor.execute("""
-            SELECT DISTINCT date
-            FROM skills_daily
+            SELECT date
+            FROM snapshots
             ORDER BY date DESC
             LIMIT ?
         """, (limit,))
 
         return [row["date"] for row in cursor.fetchall()]
 
+    def get_snapshot_dates(self) -> List[str]:
+        """获取快照目录中的全部日期（按日期升序，用于回放）"""
+        self.connect()
+        cursor = self.conn.cursor()
+
+        cursor.execute("SELECT date FROM snapshots ORDER BY date ASC")
+
+        return [row["date"] for row in cursor.fetchall()]
+
+    def clear_skill_stats(self) -> int:
+        """
+        清空技能统计状态（回放历史前调用，由回放按日期顺序重建）
+
+        Returns:
+            删除的行数
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+
+        cursor.execute("DELETE FROM skill_stats")
+        deleted = cursor.rowcount
+
+        self._commit()
+        return deleted
+
     def get_latest_date(self) -> Optional[str]:
         """获取数据库中最新的 date（skills_daily），没有则返回 None"""
         dates = self.get_available_dates(limit=1)
@@ -378,67 +1563,299 @@ class Database:
 
     def get_category_stats(self, date: str) -> List[Dict]:
         """
-        获取指定日期的分类统计
+        获取指定日期的分类趋势（读取快照时物化的结果，主键范围查询）
 
         Args:
             date: 日期 YYYY-MM-DD
 
         Returns:
-            分类统计列表
+            按技能数降序的分类列表:
+            [{"category", "category_zh", "count", "installs", "installs_share", "share_delta",
+              "installs_delta", "new_skills", "momentum"}, ...]
+            未分类技能的 category 为 "unclassified"
         """
         self.connect()
         cursor = self.conn.cursor()
 
         cursor.execute("""
-            SELECT d.category, d.category_zh, COUNT(*) as count
-            FROM skills_daily s
-            LEFT JOIN skills_details d ON s.name = d.name
-            WHERE s.date = ?
-            GROUP BY d.category
-            ORDER BY count DESC
+            SELECT category, category_zh, count, installs, installs_share, share_delta,
+                   installs_delta, new_skills, momentum
+            FROM trend_categories
+            WHERE date = ?
+            ORDER BY position
         """, (date,))
 
         return [dict(row) for row in cursor.fetchall()]
 
-    def get_top_movers(self, date: str, limit: int = 5) -> Dict[str, List[Dict]]:
+    def save_sent_messages(self, date: str, channel: str, chat_id: str, message_ids: List) -> None:
         """
-        获取排名变化最大的技能
+        记录已送达的通知消息（覆盖该日期、渠道、会话下已有的记录）
 
         Args:
-            date: 日期 YYYY-MM-DD
-            limit: 返回数量
+            date: 报告日期 YYYY-MM-DD
+            channel: 通知渠道（telegram / resend）
+            chat_id: 会话 ID 或收件人
+            message_ids: 按发送顺序排列的消息 ID
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+        sent_at = datetime.now().isoformat(timespec="seconds")
+
+        cursor.execute(
+            "DELETE FROM sent_messages WHERE date = ? AND channel = ? AND chat_id = ?",
+            (date, channel, str(chat_id)),
+        )
+        cursor.executemany("""
+            INSERT INTO sent_messages (date, channel, chat_id, part, message_id, sent_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(date, channel, str(chat_id), part, str(message_id), sent_at)
+              for part, message_id in enumerate(message_ids, 1)])
+
+        self._commit()
+
+    def get_sent_messages(self, date: str, channel: str = "telegram") -> List[Dict]:
+        """
+        获取某一期报告已送达的消息
+
+        Args:
+            date: 报告日期 YYYY-MM-DD
+            channel: 通知渠道
 
         Returns:
-            {"rising": [...], "falling": [...]}
+            [{"chat_id", "part", "message_id", "sent_at"}, ...]，按会话和 part 升序
         """
         self.connect()
         cursor = self.conn.cursor()
 
-        # 上升最多
         cursor.execute("""
-            SELECT s.name, s.rank, s.rank_delta, d.summary, d.category
-            FROM skills_daily s
-            LEFT JOIN skills_details d ON s.name = d.name
-            WHERE s.date = ? AND s.rank_delta > 0
-            ORDER BY s.rank_delta DESC, s.rank ASC
-            LIMIT ?
-        """, (date, limit))
+            SELECT chat_id, part, message_id, sent_at
+            FROM sent_messages
+            WHERE date = ? AND channel = ?
+            ORDER BY chat_id, part
+        """, (date, channel))
+
+        return [dict(row) for row in cursor.fetchall()]
+
+    def save_notification_log(self, date: str, deliveries: List[Dict]) -> None:
+        """
+        记录各订阅者的投递结果（覆盖同一日期、渠道、目标的已有记录）
+
+        Args:
+            date: 报告日期 YYYY-MM-DD
+            deliveries: [{"channel", "target", "success", "attempts", "latency", "message"}, ...]，latency 为秒
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+        created_at = datetime.now().isoformat(timespec="seconds")
+        cursor.executemany("""
+            INSERT INTO notification_log (date, channel, target, success, attempts, latency_ms, message, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(date, channel, target) DO UPDATE SET
+                success = excluded.success,
+                attempts = excluded.attempts,
+                latency_ms = excluded.latency_ms,
+                message = excluded.message,
+                created_at = excluded.created_at
+        """, [(date, d["channel"], str(d["target"]), 1 if d["success"] else 0, d["attempts"],
+               int(round(d["latency"] * 1000)), d.get("message"), created_at) for d in deliveries])
+        self._commit()
+
+    def get_notification_log(self, date: str) -> List[Dict]:
+        """
+        获取某一期报告的投递结果
 
-        rising = [dict(row) for row in cursor.fetchall()]
+        Args:
+            date: 报告日期 YYYY-MM-DD
 
-        # 下降最多
+        Returns:
+            [{"channel", "target", "success", "attempts", "latency_ms", "message"}, ...]，按渠道和目标排序
+        """
+        self.connect()
+        cursor = self.conn.cursor()
         cursor.execute("""
-            SELECT s.name, s.rank, s.rank_delta, d.summary, d.category
-            FROM skills_daily s
-            LEFT JOIN skills_details d ON s.name = d.name
-            WHERE s.date = ? AND s.rank_delta < 0
-            ORDER BY s.rank_delta ASC, s.rank ASC
-            LIMIT ?
-        """, (date, limit))
+            SELECT channel, target, success, attempts, latency_ms, message
+            FROM notification_log
+            WHERE date = ?
+            ORDER BY channel, target
+        """, (date,))
+        return [{**dict(row), "success": bool(row["success"])} for row in cursor.fetchall()]
+
+    def save_subscription(self, channel: str, target: str, categories: Sequence[str] = (), top_n: int = 20,
+                          language: str = "en", thread_id: Optional[int] = None, active: bool = True) -> None:
+        """
+        新增或更新订阅者（以 渠道 + 目标 为键）
+
+        Args:
+            channel: 通知渠道（telegram / resend）
+            target: Telegram 会话 ID 或收件邮箱
+            categories: 只接收这些分类的技能（分类 key，如 frontend / ai），为空表示全部
+            top_n: 榜单条数
+            language: 报告语言（en / zh）
+            thread_id: Telegram 话题群 thread id
+            active: 是否启用
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            INSERT INTO subscriptions (channel, target, thread_id, categories, top_n, language, active, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(channel, target) DO UPDATE SET
+                thread_id = excluded.thread_id,
+                categories = excluded.categories,
+                top_n = excluded.top_n,
+                language = excluded.language,
+                active = excluded.active
+        """, (channel, str(target), thread_id, json.dumps(sorted(set(categories))), top_n, language,
+              1 if active else 0, datetime.now().isoformat(timespec="seconds")))
+        self._commit()
+
+    def delete_subscription(self, channel: str, target: str) -> bool:
+        """
+        删除订阅者
+
+        Returns:
+            是否存在并已删除
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM subscriptions WHERE channel = ? AND target = ?", (channel, str(target)))
+        self._commit()
+        return cursor.rowcount > 0
+
+    def get_subscriptions(self, include_inactive: bool = False) -> List[Dict]:
+        """
+        获取订阅者
 
-        falling = [dict(row) for row in cursor.fetchall()]
+        Args:
+            include_inactive: 是否包含已停用的订阅者
 
-        return {"rising": rising, "falling": falling}
+        Returns:
+            [{"channel", "target", "thread_id", "categories": [...], "top_n", "language", "active"}, ...]
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+        if include_inactive:
+            cursor.execute("""
+                SELECT channel, target, thread_id, categories, top_n, language, active
+                FROM subscriptions
+                ORDER BY channel, target
+            """)
+        else:
+            cursor.execute("""
+                SELECT channel, target, thread_id, categories, top_n, language, active
+                FROM subscriptions
+                WHERE active = 1
+                ORDER BY channel, target
+            """)
+
+        subscriptions = []
+        for row in cursor.fetchall():
+            subscription = dict(row)
+            subscription["categories"] = json.loads(subscription["categories"] or "[]")
+            subscription["active"] = bool(subscription["active"])
+            subscriptions.append(subscription)
+        return subscriptions
+
+    def get_top_movers(self, date: str, limit: int = 5) -> Dict[str, List[Dict]]:
+        """
+        获取排名变化最大的技能（读取快照时物化的结果）
+
+        Args:
+            date: 日期 YYYY-MM-DD
+            limit: 返回数量
+
+        Returns:
+            {"rising": [...], "falling": [...]}
+        """
+        fields = ("name", "rank", "rank_delta", "summary", "category")
+        return {
+            "rising": [{k: row[k] for k in fields} for row in self.get_trend_section(date, "rising", limit)],
+            "falling": [{k: row[k] for k in fields} for row in self.get_trend_section(date, "falling", limit)],
+        }
+
+    def explain_read_queries(self) -> Dict[str, List[str]]:
+        """
+        对报告/查询使用的读语句执行 EXPLAIN QUERY PLAN
+
+        Returns:
+            {query_name: [plan detail, ...]}
+        """
+        self.connect()
+        cursor = self.conn.cursor()
+
+        plans = {}
+        for query_name, (sql, params) in READ_QUERIES.items():
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plans[query_name] = [row["detail"] for row in cursor.fetchall()]
+        return plans
+
+    def audit_query_plans(self) -> bool:
+        """
+        审计读语句的查询计划：每条语句都必须走索引，不允许全表扫描
+        （带 LIMIT 的按索引顺序扫描，如 "SCAN ... USING COVERING INDEX"，
+        以及 FTS5 的 "VIRTUAL TABLE INDEX" 视为走索引）
+
+        Returns:
+            全部通过返回 True
+        """
+        ok = True
+        for query_name, details in self.explain_read_queries().items():
+            full_scans = [
+                d for d in details
+                if d.startswith("SCAN ") and " USING " not in d and " VIRTUAL TABLE INDEX " not in d
+            ]
+            status = "✅" if not full_scans else "❌"
+            ok = ok and not full_scans
+            print(f"{status} {query_name}: {' | '.join(details)}")
+        return ok
+
+
+# 合并 artifact 时按日期整期替换的表（源库挂载为 src）：表 -> 写入的列
+MERGE_DATED_TABLES = {
+    "skills_daily": "date, rank, name, owner, installs, installs_delta, installs_rate, rank_delta, url, created_at",
+    "skills_history": "skill_name, date, rank, installs",
+    "rate_sketches": "date, count, data",
+    "owner_stats": "date, owner, skills, total_installs, installs_delta, best_rank, top_skill, momentum",
+    "trend_entries": "date, section, position, name, rank, previous_rank, rank_delta, installs, installs_delta, "
+                     "installs_rate, url",
+}
+
+# 合并 artifact 时按行合并的表的整表写入语句（源库挂载为 src）
+MERGE_TABLES = {
+    "skills_details": """
+        INSERT INTO main.skills_details
+        (name, summary, description, use_case, solves, category, category_zh, rules_count, owner, url, updated_at)
+        SELECT name, summary, description, use_case, solves, category, category_zh, rules_count, owner, url, updated_at
+        FROM src.skills_details WHERE true
+        ON CONFLICT(name) DO UPDATE SET
+            summary = excluded.summary,
+            description = excluded.description,
+            use_case = excluded.use_case,
+            solves = excluded.solves,
+            category = excluded.category,
+            category_zh = excluded.category_zh,
+            rules_count = excluded.rules_count,
+            owner = excluded.owner,
+            url = excluded.url,
+            updated_at = excluded.updated_at
+        WHERE excluded.updated_at > skills_details.updated_at
+    """,
+}
+
+
+def _days_between(start: str, end: str) -> int:
+    """两个 YYYY-MM-DD 日期之间的天数"""
+    return (datetime.strptime(end, "%Y-%m-%d") - datetime.strptime(start, "%Y-%m-%d")).days
+
+
+def _search_terms(query: str) -> List[str]:
+    """把查询文本切分为检索词（与 unicode61 分词规则一致，小写）"""
+    return [t.lower() for t in re.findall(r"\w+", query or "")]
+
+
+def _prefix_term(term: str) -> str:
+    """构造 FTS5 前缀查询项（加引号避免被解析为运算符）"""
+    return '"' + term.replace('"', '""') + '"*'
 
 
 def get_database() -> Database:
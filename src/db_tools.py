@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+数据库维护工具
+
+用法:
+    # 合并多次运行上传的 trends.db artifact（可传目录，递归查找 *.db）
+    python src/db_tools.py merge --into data/trends.db artifacts/
+
+    # 审计报告/查询读语句的查询计划
+    python src/db_tools.py audit
+
+    # 按当前趋势逻辑回放全部历史快照（重算变化值和物化趋势）
+    python src/db_tools.py backfill --workers 4
+
+    # 用历史快照回测安装量预测
+    python src/db_tools.py backtest
+
+    # 比较两期快照（默认最新一期对比 30 天前）
+    python src/db_tools.py diff --days 30
+
+    # 增量生成归档静态站点（默认输出到 OUTPUT_DIR）
+    python src/db_tools.py site --workers 4
+
+    # 流式导出某一期的完整榜单页面（.gz 结尾时 gzip 压缩，- 为标准输出）
+    python src/db_tools.py leaderboard --date 2026-02-01 --out leaderboard.html.gz
+
+    # 管理订阅者（按分类 / 榜单条数 / 语言过滤的报告）
+    python src/db_tools.py subscribe add telegram -100123 --categories frontend ai --top-n 10 --language zh
+    python src/db_tools.py subscribe list
+    python src/db_tools.py subscribe remove telegram -100123
+"""
+import argparse
+import gzip
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+# 添加项目根目录到 Python 路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.config import DB_PATH, OUTPUT_DIR
+from src.database import Database
+from src.backfill import backfill
+from src.forecast import Forecaster
+from src.html_reporter import DEFAULT_TOP_N, LANGUAGES, HTMLReporter, write_chunks
+from src.subscriptions import CHANNELS
+from src.site_generator import build_site
+from src.trend_analyzer import TrendAnalyzer
+
+
+def collect_db_files(inputs: List[str]) -> List[str]:
+    """展开输入路径：文件原样保留，目录递归查找 *.db（按路径排序）"""
+    files = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            files.extend(str(p) for p in sorted(path.rglob("*.db")))
+        elif path.is_file():
+            files.append(str(path))
+        else:
+            print(f"⚠️ 跳过不存在的路径: {item}")
+    return files
+
+
+def cmd_merge(args: argparse.Namespace) -> int:
+    """合并数据库文件"""
+    files = collect_db_files(args.inputs)
+    if not files:
+        print("❌ 没有找到待合并的数据库文件")
+        return 1
+
+    print(f"[合并] {len(files)} 个文件 -> {args.into}")
+    start = time.perf_counter()
+    with Database(args.into) as db:
+        stats = db.merge_databases(files)
+    elapsed = time.perf_counter() - start
+
+    print()
+    print(f"{'table':<16}{'source':>10}{'inserted':>10}{'updated':>10}{'skipped':>10}")
+    for table, s in stats.items():
+        print(f"{table:<16}{s['source']:>10}{s['inserted']:>10}{s['updated']:>10}{s['skipped']:>10}")
+    print()
+    print(f"✅ 合并完成，用时 {elapsed:.2f}s")
+    return 0
+
+
+def cmd_audit(args: argparse.Namespace) -> int:
+    """审计读语句的查询计划"""
+    with Database(args.db) as db:
+        db.init_db()
+        ok = db.audit_query_plans()
+    return 0 if ok else 1
+
+
+def cmd_backfill(args: argparse.Namespace) -> int:
+    """回放历史快照"""
+    result = backfill(args.db, args.workers)
+    if not result["dates"]:
+        return 1
+
+    writer = result["writer"]
+    print()
+    print(f"✅ 回放完成: {result['dates']} 个快照 / {result['rows']} 行，用时 {result['elapsed']:.2f}s")
+    print(f"   吞吐: {result['dates_per_sec']:.1f} 快照/s | {result['rows_per_sec']:,.0f} 行/s")
+    print(f"   写入: 事务 {writer['transactions']} | 批次 {writer['batches']} | 最大队列深度 {writer['max_queue_depth']}")
+    return 0
+
+
+def cmd_backtest(args: argparse.Namespace) -> int:
+    """回测安装量预测"""
+    with Database(args.db) as db:
+        forecaster = Forecaster(db, alpha=args.alpha, beta=args.beta, top_n=args.top_n)
+        result = forecaster.backtest(args.since)
+
+    if not result["pairs"]:
+        print("⚠️ 快照不足，无法回测")
+        return 1
+
+    def fmt(value, pattern):
+        return "-" if value is None else format(value, pattern)
+
+    print(f"[回测] alpha={forecaster.alpha} beta={forecaster.beta} Top {forecaster.top_n}")
+    print(f"   快照对: {result['pairs']} | 评估技能: {result['skills']}")
+    print(f"   安装量 MAE: {fmt(result['mae'], ',.1f')} | MAPE: {fmt(result['mape'], '.2%')}"
+          f" (不变基线 {fmt(result['naive_mape'], '.2%')})")
+    print(f"   排名 MAE: {fmt(result['rank_mae'], '.2f')}")
+    print(f"   进榜预测 precision: {fmt(result['entrant_precision'], '.1%')}"
+          f" | recall: {fmt(result['entrant_recall'], '.1%')}")
+    return 0
+
+
+def cmd_diff(args: argparse.Namespace) -> int:
+    """比较两期快照"""
+    with Database(args.db) as db:
+        date = args.to or db.get_latest_date()
+        if not date:
+            print("⚠️ 没有快照")
+            return 1
+        result = TrendAnalyzer(db).compare_snapshots(date, args.days, args.since)
+
+    if not result["previous_date"]:
+        print(f"⚠️ {date} 之前没有可对比的快照")
+        return 1
+
+    counts = result["counts"]
+    print(f"[对比] {result['previous_date']} -> {date}")
+    print(f"   新上榜 {counts['new']} | 跌出 {counts['dropped']} | 排名变化 {counts['moved']} | 不变 {counts['unchanged']}")
+    for title, key, fmt in (
+        ("新上榜", "new_entries", lambda r: f"#{r['rank']} {r['name']}"),
+        ("跌出", "dropped_entries", lambda r: f"#{r['previous_rank']} {r['name']}"),
+        ("上升", "rising", lambda r: f"#{r['rank']} {r['name']} (+{r['rank_delta']})"),
+        ("下降", "falling", lambda r: f"#{r['rank']} {r['name']} ({r['rank_delta']})"),
+    ):
+        if result[key]:
+            print(f"   {title}:")
+            for row in result[key]:
+                print(f"     {fmt(row)}")
+    return 0
+
+
+def cmd_site(args: argparse.Namespace) -> int:
+    """增量生成归档站点"""
+    result = build_site(args.db, args.out, args.force, args.workers)
+    print(f"✅ 站点生成完成: {result['pages']} 页 | 写入 {result['written']} | 跳过 {result['skipped']} | "
+          f"删除 {result['removed']} | {result['bytes'] / 1024:.0f} KB，用时 {result['elapsed']:.2f}s")
+    return 0
+
+
+def cmd_leaderboard(args: argparse.Namespace) -> int:
+    """流式导出某一期的完整榜单页面"""
+    with Database(args.db) as db:
+        date = args.date or db.get_latest_date()
+        if not date:
+            print("⚠️ 没有快照")
+            return 1
+
+        chunks = HTMLReporter().iter_leaderboard_html(db.iter_skills_by_date(date), date)
+        if args.out == "-":
+            write_chunks(chunks, sys.stdout.buffer)
+            return 0
+        opener = gzip.open if args.out.endswith(".gz") else open
+        with opener(args.out, "wb") as out:
+            size = write_chunks(chunks, out)
+
+    print(f"✅ 完整榜单已写入 {args.out}: {date}，{size / 1024:.0f} KB", file=sys.stderr)
+    return 0
+
+
+def cmd_subscribe(args: argparse.Namespace) -> int:
+    """管理订阅者"""
+    with Database(args.db) as db:
+        db.init_db()
+        if args.action == "list":
+            subscriptions = db.get_subscriptions(include_inactive=True)
+            if not subscriptions:
+                print("（没有订阅者，通知发送给 NOTIFY_CHANNEL 配置的接收者）")
+            for sub in subscriptions:
+                categories = ",".join(sub["categories"]) or "全部"
+                thread = f" thread {sub['thread_id']}" if sub["thread_id"] is not None else ""
+                status = "" if sub["active"] else " (已停用)"
+                print(f"   {sub['channel']:<9}{sub['target']}{thread} | 分类 {categories} | "
+                      f"Top {sub['top_n']} | {sub['language']}{status}")
+            return 0
+
+        if not args.channel or not args.target:
+            print("⚠️ 需要指定渠道和目标")
+            return 1
+        if args.action == "remove":
+            if not db.delete_subscription(args.channel, args.target):
+                print(f"⚠️ 订阅者不存在: {args.channel} {args.target}")
+                return 1
+            print(f"✅ 已删除订阅者: {args.channel} {args.target}")
+            return 0
+
+        db.save_subscription(args.channel, args.target, args.categories, args.top_n, args.language,
+                             args.thread_id, active=not args.disabled)
+        print(f"✅ 已保存订阅者: {args.channel} {args.target}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="trends.db 维护工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    merge = subparsers.add_parser("merge", help="合并多个 trends.db")
+    merge.add_argument("inputs", nargs="+", help="数据库文件或包含 *.db 的目录")
+    merge.add_argument("--into", default=DB_PATH, help=f"合并目标（默认 {DB_PATH}）")
+    merge.set_defaults(func=cmd_merge)
+
+    audit = subparsers.add_parser("audit", help="EXPLAIN QUERY PLAN 审计")
+    audit.add_argument("--db", default=DB_PATH, help=f"数据库路径（默认 {DB_PATH}）")
+    audit.set_defaults(func=cmd_audit)
+
+    replay = subparsers.add_parser("backfill", help="回放全部快照，重算变化值和派生数据")
+    replay.add_argument("--db", default=DB_PATH, help=f"数据库路径（默认 {DB_PATH}）")
+    replay.add_argument("--workers", type=int, default=None, help="工作进程数（默认 CPU 核数）")
+    replay.set_defaults(func=cmd_backfill)
+
+    backtest = subparsers.add_parser("backtest", help="回测安装量预测")
+    backtest.add_argument("--db", default=DB_PATH, help=f"数据库路径（默认 {DB_PATH}）")
+    backtest.add_argument("--since", default=None, help="只回测不早于该日期的快照 (YYYY-MM-DD)")
+    backtest.add_argument("--alpha", type=float, default=None, help="水平平滑系数（默认 FORECAST_ALPHA）")
+    backtest.add_argument("--beta", type=float, default=None, help="趋势平滑系数（默认 FORECAST_BETA）")
+    backtest.add_argument("--top-n", type=int, default=None, help="榜单范围（默认 FORECAST_TOP_N）")
+    backtest.set_defaults(func=cmd_backtest)
+
+    diff = subparsers.add_parser("diff", help="比较两期快照")
+    diff.add_argument("--db", default=DB_PATH, help=f"数据库路径（默认 {DB_PATH}）")
+    diff.add_argument("--to", default=None, help="新一期快照日期（默认最新一期）")
+    diff.add_argument("--since", default=None, help="对比基准快照日期 (YYYY-MM-DD)")
+    diff.add_argument("--days", type=int, default=None, help="对比窗口天数（默认上一期快照）")
+    diff.set_defaults(func=cmd_diff)
+
+    site = subparsers.add_parser("site", help="增量生成归档静态站点")
+    site.add_argument("--db", default=DB_PATH, help=f"数据库路径（默认 {DB_PATH}）")
+    site.add_argument("--out", default=OUTPUT_DIR, help=f"输出目录（默认 {OUTPUT_DIR}）")
+    site.add_argument("--workers", type=int, default=None, help="渲染进程数（默认 CPU 核数）")
+    site.add_argument("--force", action="store_true", help="忽略清单，重新生成全部页面")
+    site.set_defaults(func=cmd_site)
+
+    leaderboard = subparsers.add_parser("leaderboard", help="流式导出某一期的完整榜单页面")
+    leaderboard.add_argument("--db", default=DB_PATH, help=f"数据库路径（默认 {DB_PATH}）")
+    leaderboard.add_argument("--date", default=None, help="快照日期（默认最新一期）")
+    leaderboard.add_argument("--out", default="-", help="输出文件，.gz 结尾时压缩，- 为标准输出（默认）")
+    leaderboard.set_defaults(func=cmd_leaderboard)
+
+    subscribe = subparsers.add_parser("subscribe", help="管理订阅者")
+    subscribe.add_argument("action", choices=("add", "remove", "list"))
+    subscribe.add_argument("channel", nargs="?", choices=CHANNELS, help="通知渠道")
+    subscribe.add_argument("target", nargs="?", help="Telegram 会话 ID 或收件邮箱")
+    subscribe.add_argument("--db", default=DB_PATH, help=f"数据库路径（默认 {DB_PATH}）")
+    subscribe.add_argument("--categories", nargs="*", default=[], help="只接收这些分类（如 frontend ai），默认全部")
+    subscribe.add_argument("--top-n", type=int, default=DEFAULT_TOP_N, help=f"榜单条数（默认 {DEFAULT_TOP_N}）")
+    subscribe.add_argument("--language", choices=LANGUAGES, default="en", help="报告语言（默认 en）")
+    subscribe.add_argument("--thread-id", type=int, default=None, help="Telegram 话题群 thread id")
+    subscribe.add_argument("--disabled", action="store_true", help="保存为停用状态")
+    subscribe.set_defaults(func=cmd_subscribe)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+DB Writer - 后台写入线程（write-behind）
+由独立线程持有数据库连接，批量消费写队列，让网络阶段不必等待 SQLite 提交
+"""
+import queue
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from src.database import Database
+from src.config import DB_WRITE_QUEUE_SIZE
+
+
+# 每个事务最多合并的写批次数
+MAX_BATCHES_PER_TRANSACTION = 32
+
+# 队列控制消息
+_FLUSH = "flush"
+_STOP = "stop"
+
+
+class DBWriter:
+    """
+    后台写入线程
+
+    对外提供与 Database 相同签名的写方法（save_today_data / save_skill_details /
+    cleanup_old_data / clear_skill_stats），调用只负责入队。写线程把队列中已到达的批次合并到一个
+    事务中提交；flush() 是屏障，返回时之前提交的所有写入都已落盘。
+
+    注意：入队的参数在写入完成前不应再修改其中的排名/安装量等字段。
+    """
+
+    def __init__(self, db_path: str = None, max_queue: int = None):
+        """
+        初始化
+
+        Args:
+            db_path: 数据库文件路径，默认使用配置中的路径
+            max_queue: 写队列容量（满时调用方阻塞），默认使用配置中的值
+        """
+        self.db_path = db_path
+        self.queue = queue.Queue(maxsize=max_queue or DB_WRITE_QUEUE_SIZE)
+        self._thread = None
+        self._error = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "batches": 0,
+            "transactions": 0,
+            "max_queue_depth": 0,
+            "flushes": 0,
+            "last_flush_latency": 0.0,
+            "max_flush_latency": 0.0,
+        }
+
+    def start(self) -> "DBWriter":
+        """启动写线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # 写方法（入队）
+    # ------------------------------------------------------------------
+
+    def save_today_data(self, date: str, skills: List[Dict], trends: Dict[str, List[Dict]] = None,
+                        stats: List[Dict] = None, rate_sketch: Tuple[int, str] = None,
+                        owners: List[Dict] = None) -> None:
+        """入队：保存今日快照（见 Database.save_today_data）"""
+        self.submit("save_today_data", date, skills, trends, stats, rate_sketch, owners)
+
+    def save_skill_details(self, details: List[Dict]) -> None:
+        """入队：保存技能详情（见 Database.save_skill_details）"""
+        self.submit("save_skill_details", details)
+
+    def save_sent_messages(self, date: str, channel: str, chat_id: str, message_ids: List) -> None:
+        """入队：记录已送达的通知消息（见 Database.save_sent_messages）"""
+        self.submit("save_sent_messages", date, channel, chat_id, message_ids)
+
+    def save_notification_log(self, date: str, deliveries: List[Dict]) -> None:
+        """入队：记录投递结果（见 Database.save_notification_log）"""
+        self.submit("save_notification_log", date, list(deliveries))
+
+    def cleanup_old_data(self, days: int = None) -> None:
+        """入队：清理过期数据（见 Database.cleanup_old_data）"""
+        self.submit("cleanup_old_data", days)
+
+    def clear_skill_stats(self) -> None:
+        """入队：清空技能统计状态（见 Database.clear_skill_stats）"""
+        self.submit("clear_skill_stats")
+
+    def submit(self, method: str, *args, **kwargs) -> None:
+        """
+        提交一个写批次
+
+        Args:
+            method: Database 的写方法名
+            *args, **kwargs: 方法参数
+        """
+        self._raise_if_failed()
+        self.start()
+        self.queue.put((method, args, kwargs))
+        self._record_depth()
+
+    # ------------------------------------------------------------------
+    # 屏障与关闭
+    # ------------------------------------------------------------------
+
+    def flush(self, timeout: float = None) -> float:
+        """
+        等待此前提交的所有写入完成
+
+        Args:
+            timeout: 最长等待秒数，默认一直等待
+
+        Returns:
+            本次 flush 的等待时间（秒）
+        """
+        if self._thread is None:
+            return 0.0
+
+        started = time.perf_counter()
+        done = threading.Event()
+        self.queue.put((_FLUSH, (done,), {}))
+        if not done.wait(timeout):
+            raise TimeoutError(f"DBWriter flush 超时 ({timeout}s)，队列深度 {self.queue.qsize()}")
+        latency = time.perf_counter() - started
+
+        with self._lock:
+            self._stats["flushes"] += 1
+            self._stats["last_flush_latency"] = latency
+            self._stats["max_flush_latency"] = max(self._stats["max_flush_latency"], latency)
+
+        self._raise_if_failed()
+        return latency
+
+    def close(self) -> None:
+        """写完队列中剩余的批次并停止写线程"""
+        if self._thread is None:
+            return
+        self.queue.put((_STOP, (), {}))
+        self._thread.join()
+        self._thread = None
+        self._raise_if_failed()
+
+    def stats(self) -> Dict:
+        """
+        获取运行统计
+
+        Returns:
+            {"queue_depth", "max_queue_depth", "batches", "transactions",
+             "flushes", "last_flush_latency", "max_flush_latency"}
+        """
+        with self._lock:
+            result = dict(self._stats)
+        result["queue_depth"] = self.queue.qsize()
+        return result
+
+    # ------------------------------------------------------------------
+    # 写线程
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        """写线程主循环：阻塞取一个批次，再顺带取走已到达的批次，合并为一个事务"""
+        db = Database(self.db_path)
+        db.connect()
+        try:
+            stopping = False
+            while not stopping:
+                items = [self.queue.get()]
+                while len(items) < MAX_BATCHES_PER_TRANSACTION:
+                    try:
+                        items.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                writes = [item for item in items if item[0] not in (_FLUSH, _STOP)]
+                if writes and self._error is None:
+                    try:
+                        with db.transaction():
+                            for method, args, kwargs in writes:
+                                getattr(db, method)(*args, **kwargs)
+                        with self._lock:
+                            self._stats["batches"] += len(writes)
+                            self._stats["transactions"] += 1
+                    except Exception as e:
+                        # 记录首个错误，后续写入丢弃，由 flush/close/submit 抛给调用方
+                        self._error = e
+
+                for method, args, _ in items:
+                    if method == _FLUSH:
+                        args[0].set()
+                    elif method == _STOP:
+                        stopping = True
+        finally:
+            db.close()
+
+    def _record_depth(self) -> None:
+        depth = self.queue.qsize()
+        with self._lock:
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], depth)
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"DBWriter 写入失败: {self._error}") from self._error
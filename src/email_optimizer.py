@@ -0,0 +1,374 @@
+"""
+Email Optimizer - 邮件 HTML 后处理
+单次解析完成以下工作，减小邮件体积并兼容会剥离 <style> 的客户端：
+
+- 只内联实际用到的 CSS 规则（按选择器特异性排序，元素自身的 style 优先级最高）
+- 无法内联的规则（:hover / :last-child 等）仅在用到时保留在精简后的 <style> 中
+- 合并重复属性和重复的样式声明，删除内联后不再需要的 class
+- 压缩空白：块级元素之间的空白全部去掉，行内元素之间保留一个空格
+
+ChunkOptimizer 对按块产出的文档（HTMLReporter.iter_email_html）逐块处理并缓存，
+同一块文本在相同解析状态下直接复用结果，多订阅者共享卡片时只有首次出现需要解析
+"""
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 块级/文档结构标签：相邻空白不影响渲染，可以直接删除
+BLOCK_TAGS = frozenset((
+    "html", "head", "body", "meta", "title", "style", "link", "div", "p", "h1", "h2", "h3", "h4",
+    "hr", "br", "table", "thead", "tbody", "tr", "td", "th", "ul", "ol", "li",
+))
+
+# 自闭合标签（不入栈）
+VOID_TAGS = frozenset(("meta", "link", "hr", "br", "img", "input"))
+
+# HTMLParser 会把属性名转为小写；内联 SVG 中区分大小写的属性需要还原
+SVG_ATTRIBUTES = {"viewbox": "viewBox", "preserveaspectratio": "preserveAspectRatio"}
+
+_STYLE_BLOCK = re.compile(r"<style[^>]*>(.*?)</style>", re.S | re.I)
+_CSS_RULE = re.compile(r"([^{}]+)\{([^{}]*)\}")
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_WHITESPACE = re.compile(r"\s+")
+_SIMPLE_SELECTOR = re.compile(r"^([a-z][a-z0-9]*)?((?:\.[A-Za-z0-9_-]+)*)$")
+
+
+class CSSRule:
+    """一条样式规则（一个选择器 + 声明）"""
+
+    __slots__ = ("selector", "parts", "declarations", "specificity", "order")
+
+    def __init__(self, selector: str, declarations: Dict[str, str], order: int):
+        self.selector = selector
+        self.declarations = declarations
+        self.order = order
+        # 每一级为 (tag, classes)；无法内联的选择器 parts 为 None
+        self.parts: Optional[List[Tuple[Optional[str], frozenset]]] = []
+        classes = tags = 0
+        for token in selector.split():
+            match = _SIMPLE_SELECTOR.match(token)
+            if not match or not token:
+                self.parts = None
+                break
+            tag, class_list = match.group(1), [c for c in match.group(2).split(".") if c]
+            self.parts.append((tag, frozenset(class_list)))
+            classes += len(class_list)
+            tags += 1 if tag else 0
+        self.specificity = (classes, tags)
+
+    @property
+    def inlinable(self) -> bool:
+        return self.parts is not None
+
+    def base_classes(self) -> frozenset:
+        """选择器中出现的全部 class（用于判断不可内联的规则是否被用到）"""
+        return frozenset(re.findall(r"\.([A-Za-z0-9_-]+)", self.selector))
+
+    def matches(self, tag: str, classes: frozenset, ancestors: List[Tuple[str, frozenset]]) -> bool:
+        """判断规则是否命中当前元素（只支持后代组合符）"""
+        *ancestor_parts, (own_tag, own_classes) = self.parts
+        if (own_tag and own_tag != tag) or not own_classes <= classes:
+            return False
+
+        # 从近到远依次匹配祖先
+        i = len(ancestors) - 1
+        for part_tag, part_classes in reversed(ancestor_parts):
+            while i >= 0:
+                a_tag, a_classes = ancestors[i]
+                i -= 1
+                if (not part_tag or part_tag == a_tag) and part_classes <= a_classes:
+                    break
+            else:
+                return False
+        return True
+
+
+def parse_stylesheet(css: str) -> List[CSSRule]:
+    """
+    解析样式表（不支持 @media 等嵌套规则）
+
+    Args:
+        css: CSS 文本
+
+    Returns:
+        规则列表，逗号分隔的选择器拆成多条，order 保持书写顺序
+    """
+    rules = []
+    for selectors, body in _CSS_RULE.findall(_CSS_COMMENT.sub("", css)):
+        declarations = parse_declarations(body)
+        for selector in selectors.split(","):
+            selector = _WHITESPACE.sub(" ", selector.strip())
+            if selector:
+                rules.append(CSSRule(selector, declarations, len(rules)))
+    return rules
+
+
+def parse_declarations(text: str) -> Dict[str, str]:
+    """解析 "a: b; c: d" 为有序字典（重复属性后者覆盖前者）"""
+    declarations = {}
+    for item in text.split(";"):
+        name, sep, value = item.partition(":")
+        name = name.strip().lower()
+        if sep and name:
+            declarations[name] = _WHITESPACE.sub(" ", value.strip())
+    return declarations
+
+
+def format_declarations(declarations: Dict[str, str]) -> str:
+    """有序字典 -> 紧凑的 "a:b;c:d" """
+    return ";".join(f"{name}:{value}" for name, value in declarations.items())
+
+
+class _EmailRewriter(HTMLParser):
+    """单次遍历：内联样式、去重属性、压缩空白"""
+
+    def __init__(self, rules: List[CSSRule], kept_classes: frozenset = None):
+        super().__init__(convert_charrefs=False)
+        self.rules = [r for r in rules if r.inlinable]
+        self.deferred = [r for r in rules if not r.inlinable]
+        # 不可内联规则用到的 class 需要保留
+        if kept_classes is None:
+            kept_classes = frozenset().union(*(r.base_classes() for r in self.deferred))
+        self.kept_classes = kept_classes
+        self.used_classes = set()
+        self.out: List[str] = []
+        self.stack: List[Tuple[str, frozenset]] = []
+        self.pending_space = False
+        self.last_tag = "html"
+        self.in_style = False
+        self.style_index: Optional[int] = None
+
+    # ------------------------------------------------------------------
+
+    def _flush_space(self, next_tag: str) -> None:
+        if self.pending_space and self.last_tag not in BLOCK_TAGS and next_tag not in BLOCK_TAGS:
+            self.out.append(" ")
+        self.pending_space = False
+
+    def _open_tag(self, tag: str, attrs: List[Tuple[str, Optional[str]]], closed: bool) -> None:
+        self._flush_space(tag)
+        self.last_tag = tag
+
+        # 重复属性：class 合并，其余后者覆盖前者
+        merged: Dict[str, Optional[str]] = {}
+        class_list: List[str] = []
+        inline_style: Dict[str, str] = {}
+        for name, value in attrs:
+            if name == "class":
+                class_list.extend(c for c in (value or "").split() if c not in class_list)
+            elif name == "style":
+                inline_style.update(parse_declarations(value or ""))
+            else:
+                merged[SVG_ATTRIBUTES.get(name, name)] = value
+        classes = frozenset(class_list)
+
+        if tag == "style":
+            self.in_style = True
+            self.style_index = len(self.out)
+            self.out.append("")  # 占位，结束时写入精简后的样式表
+            return
+
+        # 命中的规则按 (特异性, 书写顺序) 叠加，元素自身的 style 最后覆盖
+        style: Dict[str, str] = {}
+        matched = [r for r in self.rules if r.matches(tag, classes, self.stack)]
+        for rule in sorted(matched, key=lambda r: (r.specificity, r.order)):
+            style.update(rule.declarations)
+        style.update(inline_style)
+
+        kept = [c for c in class_list if c in self.kept_classes]
+        self.used_classes.update(kept)
+
+        parts = [tag]
+        if kept:
+            parts.append(f'class="{" ".join(kept)}"')
+        for name, value in merged.items():
+            parts.append(name if value is None else f'{name}="{_escape_attr(value)}"')
+        if style:
+            parts.append(f'style="{_escape_attr(format_declarations(style))}"')
+        self.out.append("<" + " ".join(parts) + ("/>" if closed else ">"))
+
+        if not closed and tag not in VOID_TAGS:
+            self.stack.append((tag, classes))
+
+    # ------------------------------------------------------------------
+
+    def handle_decl(self, decl: str) -> None:
+        self.out.append(f"<!{decl}>")
+
+    def handle_starttag(self, tag, attrs) -> None:
+        self._open_tag(tag, attrs, closed=False)
+
+    def handle_startendtag(self, tag, attrs) -> None:
+        self._open_tag(tag, attrs, closed=True)
+
+    def handle_endtag(self, tag) -> None:
+        if tag == "style":
+            self.in_style = False
+            return
+        self._flush_space(tag)
+        self.last_tag = tag
+        # 弹出到对应的开始标签（容忍未闭合的标签）
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i][0] == tag:
+                del self.stack[i:]
+                break
+        self.out.append(f"</{tag}>")
+
+    def handle_data(self, data) -> None:
+        if self.in_style:
+            return
+        text = _WHITESPACE.sub(" ", data)
+        if not text.strip():
+            if text:
+                self.pending_space = True
+            return
+        if text[0] == " ":
+            self.pending_space = True
+            text = text[1:]
+        self._flush_space("#text")
+        if text.endswith(" "):
+            text = text[:-1]
+            self.pending_space = True
+        self.out.append(text)
+        self.last_tag = "#text"
+
+    def handle_entityref(self, name) -> None:
+        self._flush_space("#text")
+        self.out.append(f"&{name};")
+        self.last_tag = "#text"
+
+    def handle_charref(self, name) -> None:
+        self._flush_space("#text")
+        self.out.append(f"&#{name};")
+        self.last_tag = "#text"
+
+    def handle_comment(self, data) -> None:
+        # 保留条件注释（Outlook），其余注释删除
+        if data.startswith("[if"):
+            self.out.append(f"<!--{data}-->")
+
+    # ------------------------------------------------------------------
+
+    def result(self) -> str:
+        """返回处理后的 HTML（<style> 只保留命中的不可内联规则）"""
+        if self.style_index is not None:
+            self.out[self.style_index] = style_block(self.deferred, self.used_classes)
+        return "".join(self.out)
+
+    def state(self) -> Tuple:
+        """当前解析状态（决定后续文本的处理结果）"""
+        return tuple(self.stack), self.pending_space, self.last_tag, self.in_style
+
+    def restore(self, state: Tuple) -> None:
+        """从 state() 的结果恢复解析状态"""
+        stack, self.pending_space, self.last_tag, self.in_style = state
+        self.stack = list(stack)
+
+
+def style_block(deferred: List[CSSRule], used_classes) -> str:
+    """精简后的 <style>：只保留命中的不可内联规则，没有时为空串"""
+    kept = [
+        f"{r.selector}{{{format_declarations(r.declarations)}}}"
+        for r in deferred
+        if r.base_classes() and r.base_classes() <= used_classes
+    ]
+    return f"<style>{''.join(kept)}</style>" if kept else ""
+
+
+def _escape_attr(value: str) -> str:
+    """转义双引号属性值（单引号无需转义，节省字节）"""
+    return value.replace("&", "&amp;").replace('"', "&quot;").replace("<", "&lt;")
+
+
+def optimize_email_html(html: str) -> str:
+    """
+    邮件 HTML 后处理：内联用到的 CSS、去重属性、压缩空白
+
+    Args:
+        html: 完整的 HTML 文档（样式写在 <style> 中）
+
+    Returns:
+        处理后的 HTML
+    """
+    rules = parse_stylesheet("\n".join(_STYLE_BLOCK.findall(html)))
+    rewriter = _EmailRewriter(rules)
+    rewriter.feed(html)
+    rewriter.close()
+    return rewriter.result()
+
+
+class ChunkOptimizer:
+    """
+    逐块优化并缓存
+
+    处理结果只取决于块文本和处理前的解析状态（祖先栈、待输出空白、上一个标签），
+    因此 (块, 状态) 相同时直接复用缓存；拼接结果与对整篇文档调用 optimize_email_html 相同。
+    样式表在构造时给定，文档中 <style> 的内容被忽略。
+    """
+
+    def __init__(self, css: str, max_entries: int = 50000):
+        """
+        初始化
+
+        Args:
+            css: 样式表（通常是 email_templates.EMAIL_STYLE）
+            max_entries: 缓存条目上限，超出后清空重建
+        """
+        self.rules = parse_stylesheet(_STYLE_BLOCK.sub(r"\1", css))
+        self.deferred = [r for r in self.rules if not r.inlinable]
+        self.kept_classes = frozenset().union(*(r.base_classes() for r in self.deferred))
+        self.max_entries = max_entries
+        # (块, 状态) -> (输出片段, 是否含 <style> 占位, 用到的 class, 处理后状态)
+        self._cache: Dict[Tuple[str, Tuple], Tuple[str, bool, frozenset, Tuple]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def optimize(self, chunks: Iterable[str]) -> str:
+        """
+        处理一篇按块产出的文档
+
+        Args:
+            chunks: 文本块，按顺序拼接为完整的 HTML 文档
+
+        Returns:
+            处理后的 HTML
+        """
+        state = ((), False, "html", False)
+        out: List[str] = []
+        style_index = None
+        used_classes = set()
+        for chunk in chunks:
+            key = (chunk, state)
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                entry = self._optimize_chunk(chunk, state)
+                if len(self._cache) >= self.max_entries:
+                    self._cache.clear()
+                self._cache[key] = entry
+            else:
+                self.hits += 1
+            html, has_style, classes, state = entry
+            if has_style:
+                before, after = html.split("\0", 1)
+                out.append(before)
+                style_index = len(out)
+                out.append("")
+                html = after
+            out.append(html)
+            used_classes.update(classes)
+
+        if style_index is not None:
+            out[style_index] = style_block(self.deferred, used_classes)
+        return "".join(out)
+
+    def _optimize_chunk(self, chunk: str, state: Tuple) -> Tuple[str, bool, frozenset, Tuple]:
+        """解析单个块（<style> 的位置以 \\0 标记）"""
+        rewriter = _EmailRewriter(self.rules, self.kept_classes)
+        rewriter.restore(state)
+        rewriter.feed(chunk)
+        rewriter.close()
+        if rewriter.style_index is not None:
+            rewriter.out[rewriter.style_index] = "\0"
+        return ("".join(rewriter.out), rewriter.style_index is not None,
+                frozenset(rewriter.used_classes), rewriter.state())
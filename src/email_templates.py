@@ -0,0 +1,467 @@
+"""
+Email Templates - 邮件报告的静态片段与预编译模板
+
+- 页头（含 CSS）和页尾是不可变的模块级常量，每个进程只构建一次
+- 卡片/分区模板在导入时编译，渲染结果直接写入调用方的 io.StringIO 缓冲区，
+  重复渲染（多订阅者、按日期回放）的开销只剩动态内容
+- 抓取或 AI 生成的字段（名称、owner、摘要、链接）在模板中用 !h / !u 转义，报告和公开的归档站点不会注入 HTML
+"""
+import html
+import re
+from string import Formatter
+from typing import Tuple
+
+# 链接允许的协议（其余如 javascript: 一律替换为 #）；没有协议的相对链接直接放行
+SAFE_URL_SCHEMES = ("http", "https", "mailto")
+
+_URL_SCHEME = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*):")
+_URL_IGNORED = re.compile(r"[\x00-\x20\x7f]")
+
+
+def escape_html(value) -> str:
+    """转义文本 / 属性值中的 HTML 特殊字符（含引号）"""
+    return html.escape(str(value), quote=True)
+
+
+def safe_url(value) -> str:
+    """转义 href 属性值；协议不在 SAFE_URL_SCHEMES 中的链接替换为 #"""
+    url = str(value)
+    # 浏览器解析协议前会忽略空白和控制字符（如 "java\tscript:"）
+    match = _URL_SCHEME.match(_URL_IGNORED.sub("", url))
+    if match and match.group(1).lower() not in SAFE_URL_SCHEMES:
+        return "#"
+    return html.escape(url, quote=True)
+
+
+# 模板中的自定义转换：{name!h} 转义 HTML，{url!u} 为安全的链接属性值
+_CONVERSIONS = {"h": "_escape_html", "u": "_safe_url"}
+
+
+class Template:
+    """
+    预编译模板（str.format 语法）
+
+    构造时解析占位符并编译为等价的 f-string 函数，渲染时不再解析模板，
+    开销与手写 f-string 相同。
+    """
+
+    __slots__ = ("source", "fields", "render")
+
+    def __init__(self, source: str):
+        """
+        初始化
+
+        Args:
+            source: 模板源码，占位符为 {name} / {name:spec} / {name!r}，name 必须是标识符；
+                {name!h} 转义 HTML，{name!u} 转义链接并过滤不安全的协议
+        """
+        parts = []
+        fields = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            parts.append(_escape_literal(literal))
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise ValueError(f"模板占位符必须是标识符: {{{field}}}")
+            if field not in fields:
+                fields.append(field)
+            if conversion in _CONVERSIONS:
+                parts.append("{" + f"{_CONVERSIONS[conversion]}({field})" + (f":{spec}" if spec else "") + "}")
+            else:
+                parts.append("{" + field + (f"!{conversion}" if conversion else "") + (f":{spec}" if spec else "") + "}")
+
+        self.source = source
+        self.fields: Tuple[str, ...] = tuple(fields)
+        code = f"lambda {', '.join(fields)}: f'{''.join(parts)}'"
+        # render(**values) -> str：编译后的函数直接作为实例属性，调用时没有额外的包装层
+        self.render = eval(compile(code, "<template>", "eval"), {"_escape_html": escape_html, "_safe_url": safe_url})
+
+
+def _escape_literal(text: str) -> str:
+    """把模板中的字面文本转义为单引号 f-string 的内容"""
+    return (text.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n")
+            .replace("{", "{{").replace("}", "}}"))
+
+
+# ----------------------------------------------------------------------
+# 静态片段
+# ----------------------------------------------------------------------
+
+EMAIL_STYLE = """    <style>
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
+            margin: 0;
+            padding: 0;
+            background-color: #f8f9fa;
+            -webkit-font-smoothing: antialiased;
+        }
+        .container {
+            max-width: 640px;
+            margin: 0 auto;
+            background-color: #ffffff;
+        }
+        .header {
+            background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
+            color: white;
+            padding: 40px 30px;
+            text-align: center;
+        }
+        .header h1 {
+            margin: 0;
+            font-size: 26px;
+            font-weight: 600;
+            letter-spacing: -0.5px;
+        }
+        .header p {
+            margin: 8px 0 0;
+            font-size: 14px;
+            opacity: 0.8;
+            font-weight: 400;
+        }
+        .section {
+            padding: 28px 30px;
+            border-bottom: 1px solid #e9ecef;
+        }
+        .section:last-child {
+            border-bottom: none;
+        }
+        .section-title {
+            margin: 0 0 20px;
+            font-size: 15px;
+            font-weight: 600;
+            color: #1a1a2e;
+            text-transform: uppercase;
+            letter-spacing: 1px;
+            padding-bottom: 12px;
+            border-bottom: 2px solid #1a1a2e;
+        }
+        .skill-card {
+            margin-bottom: 16px;
+            padding: 0;
+            background-color: #ffffff;
+        }
+        .skill-card:last-child {
+            margin-bottom: 0;
+        }
+        .skill-main {
+            display: flex;
+            align-items: baseline;
+            padding: 14px 16px;
+            background-color: #f8f9fa;
+            border-radius: 6px;
+            border-left: 3px solid #1a1a2e;
+        }
+        .skill-rank {
+            font-size: 14px;
+            font-weight: 700;
+            color: #1a1a2e;
+            min-width: 32px;
+        }
+        .skill-name {
+            font-size: 15px;
+            font-weight: 600;
+            color: #1a1a2e;
+            flex-grow: 1;
+            margin: 0 10px;
+        }
+        .skill-name a {
+            color: #1a1a2e;
+            text-decoration: none;
+        }
+        .skill-name a:hover {
+            text-decoration: underline;
+        }
+        .skill-stats {
+            display: flex;
+            align-items: center;
+            gap: 12px;
+            font-size: 13px;
+        }
+        .rank-change {
+            font-weight: 600;
+            padding: 2px 6px;
+            border-radius: 3px;
+            font-size: 12px;
+        }
+        .rank-up {
+            color: #059669;
+            background-color: #d1fae5;
+        }
+        .rank-down {
+            color: #dc2626;
+            background-color: #fee2e2;
+        }
+        .rank-same {
+            color: #6b7280;
+            background-color: #f3f4f6;
+        }
+        .installs {
+            color: #6b7280;
+            font-size: 13px;
+        }
+        .skill-content {
+            padding: 12px 16px 0;
+        }
+        .skill-summary {
+            color: #4b5563;
+            font-size: 14px;
+            line-height: 1.6;
+            margin-bottom: 8px;
+        }
+        .skill-meta {
+            font-size: 13px;
+            color: #6b7280;
+            margin-bottom: 10px;
+        }
+        .badge {
+            display: inline-block;
+            padding: 3px 8px;
+            border-radius: 4px;
+            font-size: 11px;
+            font-weight: 500;
+            margin-right: 6px;
+            margin-bottom: 4px;
+        }
+        .badge-category {
+            background-color: #e5e7eb;
+            color: #374151;
+        }
+        .badge-new {
+            background-color: #059669;
+            color: white;
+        }
+        .badge-alert {
+            background-color: #dc2626;
+            color: white;
+        }
+        .badge-surging {
+            background-color: #d97706;
+            color: white;
+        }
+        .solves-list {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 6px;
+        }
+        .solve-tag {
+            background-color: #f3f4f6;
+            color: #4b5563;
+            padding: 4px 10px;
+            border-radius: 4px;
+            font-size: 12px;
+        }
+        .divider {
+            height: 1px;
+            background-color: #e9ecef;
+            margin: 0;
+            border: none;
+        }
+        .footer {
+            text-align: center;
+            padding: 28px 20px;
+            font-size: 12px;
+            color: #6b7280;
+            background-color: #f8f9fa;
+        }
+        .footer a {
+            color: #1a1a2e;
+            text-decoration: none;
+            font-weight: 500;
+        }
+        .footer a:hover {
+            text-decoration: underline;
+        }
+        .empty {
+            text-align: center;
+            color: #9ca3af;
+            padding: 24px;
+            font-size: 14px;
+        }
+        .compact-card {
+            padding: 12px 14px;
+            margin-bottom: 8px;
+            background-color: #f8f9fa;
+            border-radius: 6px;
+            border-left: 3px solid #e5e7eb;
+        }
+        .compact-card:last-child {
+            margin-bottom: 0;
+        }
+    </style>"""
+
+# 页头在日期处拆开：EMAIL_HEAD + date + EMAIL_HEAD_END
+EMAIL_HEAD = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Skills Trending Daily</title>
+""" + EMAIL_STYLE + """
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>Skills Trending Daily</h1>
+            <p>"""
+
+EMAIL_HEAD_END = """</p>
+        </div>"""
+
+EMAIL_FOOTER = """        <div class="footer">
+            <p>Powered by <a href="https://skills.sh/trending">Skills.sh</a></p>
+            <p style="margin-top: 8px; color: #9ca3af;">Data source: skills.sh/trending</p>
+        </div>
+    </div>
+</body>
+</html>"""
+
+EMPTY_TOP_20 = '<p class="empty">No data available</p>'
+
+SECTION_CLOSE = """
+        </div>"""
+
+DIVIDER = "<hr class='divider' style='margin: 16px 0;'>"
+
+RANK_SAME = '<span class="rank-change rank-same">-</span>'
+
+BADGE_NEW = '<span class="badge badge-new">NEW</span>'
+
+SOLVE_TAG_SEPARATOR = '</span><span class="solve-tag">'
+
+# ----------------------------------------------------------------------
+# 预编译模板
+# ----------------------------------------------------------------------
+
+SECTION_OPEN = Template("""        <div class="section">
+            <h2 class="section-title">{title!h}</h2>
+            """)
+
+NEW_ENTRIES_HEADING = Template("<h3 style='margin: 0 0 12px; font-size: 13px; color: #059669; font-weight: 600; "
+                               "text-transform: uppercase; letter-spacing: 0.5px;'>{title!h}</h3>")
+
+DROPPED_HEADING = Template("<h3 style='margin: 0 0 12px; font-size: 13px; color: #dc2626; font-weight: 600; "
+                           "text-transform: uppercase; letter-spacing: 0.5px;'>{title!h}</h3>")
+
+RANK_UP = Template('<span class="rank-change rank-up">+{delta}</span>')
+
+RANK_DOWN = Template('<span class="rank-change rank-down">{delta}</span>')
+
+BADGE_CATEGORY = Template('<span class="badge badge-category">{text!h}</span>')
+
+BADGE_SURGING = Template('<span class="badge badge-surging">+{percent}%</span>')
+
+BADGE_MOMENTUM = Template('<span class="badge badge-surging">+{percent}% / 7d</span>')
+
+BADGE_ANOMALY = Template('<span class="badge badge-alert">z {zscore:+.1f}</span>')
+
+BADGE_FORECAST = Template('<span class="badge badge-new">→ #{rank}</span>')
+
+# 标签列表用分隔符拼接，避免逐个渲染：SOLVES_LIST(tags=SOLVE_TAG_SEPARATOR.join(solves))
+SOLVES_LIST = Template('<div class="solves-list"><span class="solve-tag">{tags}</span></div>')
+
+SUMMARY_PARAGRAPH = Template(
+    '<p style="margin: 0 0 8px; color: #4b5563; font-size: 14px; line-height: 1.5;">{text!h}</p>'
+)
+
+DESCRIPTION_PARAGRAPH = Template(
+    '<p style="margin: 0; color: #6b7280; font-size: 13px; line-height: 1.5;">{text!h}</p>'
+)
+
+SKILL_CARD = Template("""        <div class="skill-card">
+            <div class="skill-main">
+                <span class="skill-rank">#{rank}</span>
+                <span class="skill-name"><a href="{url!u}">{name!h}</a></span>
+                <div class="skill-stats">
+                    {sparkline}{rank_indicator}
+                    <span class="installs">{installs} installs</span>
+                </div>
+            </div>
+            <div class="skill-content">
+                {details}
+                <div style="margin-top: 10px;">
+                    {category_badge}
+                    {solves}
+                </div>
+            </div>
+        </div>""")
+
+COMPACT_CARD = Template("""            <div class="compact-card">
+                {change}
+                <span style="font-weight: 600; min-width: 32px; font-size: 13px;">#{rank}</span>
+                <span style="flex-grow: 1; margin: 0 10px;">
+                    <a href="{url!u}" style="color: #1a1a2e; text-decoration: none; font-size: 14px; font-weight: 500;">{name!h}</a>
+                </span>
+                {sparkline}<span style="color: #6b7280; font-size: 12px;">{installs}</span>
+            </div>{summary}""")
+
+COMPACT_SUMMARY = Template(
+    '<div style="padding: 8px 14px 0; font-size: 13px; color: #6b7280; line-height: 1.5;">{summary!h}</div>'
+)
+
+OWNER_CARD = Template("""            <div class="compact-card">
+                <span class="badge badge-surging">+{installs_delta:,}</span>
+                <span style="font-weight: 600; min-width: 32px; font-size: 13px;">#{best_rank}</span>
+                <span style="flex-grow: 1; margin: 0 10px;">
+                    <a href="{url!u}" style="color: #1a1a2e; text-decoration: none; font-size: 14px; font-weight: 500;">{owner!h}</a>
+                    <span style="color: #6b7280; font-size: 12px;"> · {top_skill!h}</span>
+                </span>
+                <span style="color: #6b7280; font-size: 12px;">{skills} skills</span>
+            </div>""")
+
+CATEGORY_CARD = Template("""            <div class="compact-card">
+                <span class="badge badge-category">{share:.1%}</span>
+                <span style="flex-grow: 1; margin: 0 10px; font-size: 14px; font-weight: 500;">
+                    {name!h}
+                    <span style="color: #6b7280; font-size: 12px;"> · {count} skills</span>{new_skills}
+                </span>
+                <span style="color: #6b7280; font-size: 12px;">{share_delta:+.1f}pp · {momentum:+.0%} / 7d</span>
+            </div>""")
+
+CATEGORY_NEW_SKILLS = Template('<span style="color: #6b7280; font-size: 12px;"> · {count} new</span>')
+
+DROPPED_CARD = Template("""            <div class="compact-card" style="border-left-color: #dc2626; background-color: #fef2f2;">
+                <span class="badge badge-alert">DROPPED</span>
+                <span style="font-weight: 600; min-width: 32px; font-size: 13px;">#{rank}</span>
+                <span style="flex-grow: 1; margin: 0 10px; color: #6b7280; font-size: 14px;">{name!h}</span>
+            </div>""")
+
+# 迷你走势图：橙线为排名（越靠上越好），蓝线为安装量；坐标由 src.sparkline 计算
+SPARKLINE = Template('<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+                     'viewBox="0 0 {width} {height}" style="vertical-align: middle; margin-right: 6px;">'
+                     '<polyline points="{rank_points}" fill="none" stroke="#f59e0b" stroke-width="1"/>'
+                     '<polyline points="{installs_points}" fill="none" stroke="#2563eb" stroke-width="1.5"/>'
+                     '</svg>')
+
+# ----------------------------------------------------------------------
+# 归档站点页面（与邮件共用页头、样式和卡片）
+# ----------------------------------------------------------------------
+
+NAV_SEPARATOR = " · "
+
+SITE_NAV = Template("""
+        <div class="section" style="padding: 14px 30px; font-size: 13px; text-align: center;">{links}</div>""")
+
+NAV_LINK = Template('<a href="{href!u}" style="color: #2563eb; text-decoration: none;">{text!h}</a>')
+
+LINK_CARD = Template("""            <div class="compact-card">
+                <span style="font-weight: 600; min-width: 32px; font-size: 13px;">{label!h}</span>
+                <span style="flex-grow: 1; margin: 0 10px;">
+                    <a href="{href!u}" style="color: #1a1a2e; text-decoration: none; font-size: 14px; font-weight: 500;">{text!h}</a>
+                </span>
+                <span style="color: #6b7280; font-size: 12px;">{meta!h}</span>
+            </div>""")
+
+HISTORY_TABLE_OPEN = """<table style="width: 100%; border-collapse: collapse; font-size: 13px;">
+                <tr style="color: #6b7280; text-align: left;"><th>Date</th><th>Rank</th><th>Change</th><th>Installs</th><th>Δ Installs</th></tr>
+"""
+
+HISTORY_ROW = Template("""                <tr style="border-top: 1px solid #e9ecef;"><td><a href="{href!u}" style="color: #2563eb; text-decoration: none;">{date!h}</a></td><td>#{rank}</td><td>{rank_indicator}</td><td>{installs:,}</td><td>{installs_delta:+,}</td></tr>""")
+
+LEADERBOARD_TABLE_OPEN = """<table style="width: 100%; border-collapse: collapse; font-size: 13px;">
+                <tr style="color: #6b7280; text-align: left;"><th>Rank</th><th>Skill</th><th>Owner</th><th>Change</th><th>Installs</th><th>Δ Installs</th></tr>
+"""
+
+LEADERBOARD_ROW = Template("""                <tr style="border-top: 1px solid #e9ecef;"><td>#{rank}</td><td><a href="{url!u}" style="color: #1a1a2e; text-decoration: none;">{name!h}</a></td><td style="color: #6b7280;">{owner!h}</td><td>{rank_indicator}</td><td>{installs:,}</td><td>{installs_delta:+,}</td></tr>""")
+
+HISTORY_TABLE_CLOSE = """
+            </table>"""
@@ -0,0 +1,291 @@
+"""
+Forecast - 短期安装量预测
+对当前榜单中的每个技能，用数据库中的历史快照在 log(1 + 安装量) 上拟合
+Holt 双指数平滑（水平 + 趋势）。所有技能在同一组 NumPy 运算中一起拟合，
+预测下一次运行时的安装量和排名，并找出预计进入 Top N 的技能（predicted_entrants）
+
+快照间隔不固定（工作流每 3 天运行一次），趋势按「每天」计：
+    预测值 = level + trend × dt
+    level' = α × 观测值 + (1 - α) × 预测值
+    trend' = β × (level' - level) / dt + (1 - β) × trend
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.config import (
+    FORECAST_ALPHA,
+    FORECAST_BETA,
+    FORECAST_HISTORY_DAYS,
+    FORECAST_HORIZON_DAYS,
+    FORECAST_TOP_N,
+)
+from src.database import Database
+
+# 自动推断预测步长时参考的最近快照间隔数
+HORIZON_GAPS = 5
+
+
+def fit_holt(times: np.ndarray, values: np.ndarray, alpha: float, beta: float):
+    """
+    对每一列独立拟合 Holt 双指数平滑（按时间循环，技能维度向量化）
+
+    Args:
+        times: 观测时间（天），形状 [T]，升序
+        values: 观测值，形状 [T, n]，缺失为 NaN（该期不在榜单）
+        alpha: 水平平滑系数
+        beta: 趋势平滑系数
+
+    Returns:
+        (level, trend, last_time)，形状均为 [n]；从未观测到的列为 NaN
+    """
+    n = values.shape[1]
+    level = np.full(n, np.nan)
+    trend = np.zeros(n)
+    last_time = np.full(n, np.nan)
+
+    for t, y in zip(times, values):
+        observed = ~np.isnan(y)
+        started = ~np.isnan(level)
+
+        # 首次观测：以观测值为初始水平，趋势为 0
+        first = observed & ~started
+        level[first] = y[first]
+        last_time[first] = t
+
+        update = observed & started
+        if update.any():
+            dt = np.maximum(t - last_time[update], 1.0)
+            prev_level = level[update]
+            predicted = prev_level + trend[update] * dt
+            new_level = alpha * y[update] + (1 - alpha) * predicted
+            trend[update] = beta * (new_level - prev_level) / dt + (1 - beta) * trend[update]
+            level[update] = new_level
+            last_time[update] = t
+
+    return level, trend, last_time
+
+
+def project_ranks(projected: np.ndarray, ranks: np.ndarray) -> np.ndarray:
+    """
+    按预测安装量排出名次（同值时当前排名靠前者优先）
+
+    Args:
+        projected: 预测安装量 [n]
+        ranks: 当前排名 [n]
+
+    Returns:
+        预测排名 [n]（1 起）
+    """
+    order = np.lexsort((ranks, -projected))
+    result = np.empty(len(projected), dtype=np.int64)
+    result[order] = np.arange(1, len(projected) + 1)
+    return result
+
+
+class Forecaster:
+    """短期安装量预测（Holt 双指数平滑，全部技能一次拟合）"""
+
+    def __init__(self, db: Database, alpha: float = None, beta: float = None,
+                 history_days: int = None, top_n: int = None):
+        """
+        初始化
+
+        Args:
+            db: 数据库实例（读取历史快照）
+            alpha: 水平平滑系数，默认 FORECAST_ALPHA
+            beta: 趋势平滑系数，默认 FORECAST_BETA
+            history_days: 拟合窗口（天），默认 FORECAST_HISTORY_DAYS
+            top_n: 预测进入的榜单范围，默认 FORECAST_TOP_N
+        """
+        self.db = db
+        self.alpha = FORECAST_ALPHA if alpha is None else alpha
+        self.beta = FORECAST_BETA if beta is None else beta
+        self.history_days = history_days or FORECAST_HISTORY_DAYS
+        self.top_n = top_n or FORECAST_TOP_N
+
+    def forecast(self, today: Sequence[Dict], date: str, horizon_days: float = None) -> Dict:
+        """
+        预测当前榜单每个技能在下一次运行时的安装量和排名
+
+        Args:
+            today: 当前榜单（SkillRecord 或 dict，需包含 name/rank/installs）
+            date: 当前日期 YYYY-MM-DD（该日之前的历史从数据库读取，当天以 today 为准）
+            horizon_days: 预测步长（天），默认 FORECAST_HORIZON_DAYS，为 0 时按最近快照间隔推断
+
+        Returns:
+            {
+                "date": "2026-01-23",
+                "horizon_days": 3.0,
+                "names": [...],                     # 与 today 顺序一致
+                "rank": ndarray[n],
+                "installs": ndarray[n],
+                "projected_installs": ndarray[n],
+                "projected_rank": ndarray[n],
+            }
+        """
+        names = [skill["name"] for skill in today]
+        ranks = np.array([skill["rank"] for skill in today], dtype=np.int64)
+        installs = np.array([skill["installs"] for skill in today], dtype=np.float64)
+
+        history_dates, values = self._load_history(names, date)
+        dates = history_dates + [date]
+        times = np.array([_day_number(d) for d in dates], dtype=np.float64)
+        values = np.vstack([values, installs[None, :]])
+
+        # 在对数空间拟合：安装量按比例增长，对数后趋势近似线性
+        level, trend, last_time = fit_holt(times, np.log1p(values), self.alpha, self.beta)
+
+        horizon = horizon_days or FORECAST_HORIZON_DAYS or _median_gap(times)
+        projected = np.maximum(np.expm1(level + trend * (times[-1] - last_time + horizon)), 0.0)
+
+        return {
+            "date": date,
+            "horizon_days": float(horizon),
+            "names": names,
+            "rank": ranks,
+            "installs": installs,
+            "projected_installs": projected,
+            "projected_rank": project_ranks(projected, ranks),
+        }
+
+    def predicted_entrants(self, today: Sequence[Dict], date: str, horizon_days: float = None) -> List[Dict]:
+        """
+        找出当前不在 Top N、但预计下一次运行进入 Top N 的技能
+
+        Args:
+            today: 当前榜单
+            date: 当前日期 YYYY-MM-DD
+            horizon_days: 预测步长（天）
+
+        Returns:
+            按预测排名升序:
+            [{"name", "rank", "installs", "url", "projected_rank", "projected_installs", "horizon_days"}, ...]
+        """
+        result = self.forecast(today, date, horizon_days)
+        entering = np.flatnonzero((result["rank"] > self.top_n) & (result["projected_rank"] <= self.top_n))
+        entering = entering[np.argsort(result["projected_rank"][entering], kind="stable")]
+
+        return [
+            {
+                "name": today[i]["name"],
+                "rank": today[i]["rank"],
+                "installs": today[i]["installs"],
+                "url": today[i].get("url", ""),
+                "projected_rank": int(result["projected_rank"][i]),
+                "projected_installs": int(round(result["projected_installs"][i])),
+                "horizon_days": result["horizon_days"],
+            }
+            for i in entering.tolist()
+        ]
+
+    def backtest(self, since_date: str = None) -> Dict:
+        """
+        在数据库中的历史快照上回测：对每一对相邻快照 (d, d')，只用 d 及之前的数据预测 d'
+
+        Args:
+            since_date: 可选，只回测预测起点不早于该日期的快照对
+
+        Returns:
+            {
+                "pairs": 回测的快照对数,
+                "skills": 参与评估的技能数（两期都在榜），
+                "mae": 安装量平均绝对误差,
+                "mape": 安装量平均绝对百分比误差,
+                "naive_mape": 「安装量不变」基线的 MAPE,
+                "rank_mae": 排名平均绝对误差,
+                "entrant_precision": 预测进入 Top N 的技能中实际进入的比例,
+                "entrant_recall": 实际进入 Top N 的技能中被预测到的比例,
+            }
+        """
+        dates = self.db.get_snapshot_dates()
+        abs_errors, pct_errors, naive_errors, rank_errors = [], [], [], []
+        predicted_total = actual_total = hits = pairs = 0
+
+        for date, next_date in zip(dates, dates[1:]):
+            if since_date and date < since_date:
+                continue
+            today = self.db.get_skills_by_date(date)
+            actual = {s["name"]: s for s in self.db.get_skills_by_date(next_date)}
+            if not today or not actual:
+                continue
+
+            horizon = _day_number(next_date) - _day_number(date)
+            result = self.forecast(today, date, horizon)
+            pairs += 1
+
+            present = np.array([name in actual for name in result["names"]])
+            actual_installs = np.array([actual[n]["installs"] if n in actual else np.nan for n in result["names"]])
+            actual_rank = np.array([actual[n]["rank"] if n in actual else np.nan for n in result["names"]])
+
+            error = np.abs(result["projected_installs"] - actual_installs)[present]
+            abs_errors.append(error)
+            positive = present & (actual_installs > 0)
+            pct_errors.append(np.abs(result["projected_installs"] - actual_installs)[positive] / actual_installs[positive])
+            naive_errors.append(np.abs(result["installs"] - actual_installs)[positive] / actual_installs[positive])
+            rank_errors.append(np.abs(result["projected_rank"] - actual_rank)[present])
+
+            outside = result["rank"] > self.top_n
+            predicted = outside & (result["projected_rank"] <= self.top_n)
+            entered = outside & present & (np.nan_to_num(actual_rank, nan=np.inf) <= self.top_n)
+            predicted_total += int(predicted.sum())
+            actual_total += int(entered.sum())
+            hits += int((predicted & entered).sum())
+
+        def mean(parts: List[np.ndarray]) -> Optional[float]:
+            values = np.concatenate(parts) if parts else np.empty(0)
+            return float(values.mean()) if len(values) else None
+
+        return {
+            "pairs": pairs,
+            "skills": int(sum(len(e) for e in abs_errors)),
+            "mae": mean(abs_errors),
+            "mape": mean(pct_errors),
+            "naive_mape": mean(naive_errors),
+            "rank_mae": mean(rank_errors),
+            "entrant_precision": hits / predicted_total if predicted_total else None,
+            "entrant_recall": hits / actual_total if actual_total else None,
+        }
+
+    def _load_history(self, names: List[str], date: str):
+        """
+        读取拟合窗口内、date 之前的历史快照，对齐为 [T, n] 矩阵
+
+        Returns:
+            (日期列表, 安装量矩阵)；不在该期榜单的技能为 NaN
+        """
+        since = (datetime.strptime(date, "%Y-%m-%d") - timedelta(days=self.history_days)).strftime("%Y-%m-%d")
+        rows = [row for row in self.db.get_installs_history(since, date) if row[0] < date]
+
+        dates = sorted({row[0] for row in rows})
+        values = np.full((len(dates), len(names)), np.nan)
+        if rows:
+            date_index = {d: i for i, d in enumerate(dates)}
+            column = {name: i for i, name in enumerate(names)}
+            row_idx = np.fromiter((date_index[r[0]] for r in rows), dtype=np.int64, count=len(rows))
+            col_idx = np.fromiter((column.get(r[1], -1) for r in rows), dtype=np.int64, count=len(rows))
+            installs = np.fromiter((r[2] or 0 for r in rows), dtype=np.float64, count=len(rows))
+            matched = col_idx >= 0
+            values[row_idx[matched], col_idx[matched]] = installs[matched]
+        return dates, values
+
+
+def _day_number(date: str) -> int:
+    """日期 -> 天序号"""
+    return datetime.strptime(date, "%Y-%m-%d").toordinal()
+
+
+def _median_gap(times: np.ndarray) -> float:
+    """最近几期快照间隔的中位数（天），没有历史时为 1"""
+    gaps = np.diff(times[-(HORIZON_GAPS + 1):])
+    return float(np.median(gaps)) if len(gaps) else 1.0
+
+
+def predict_entrants(today: Sequence[Dict], date: str, db: Database = None) -> List[Dict]:
+    """便捷函数：预测下一次运行进入 Top N 的技能"""
+    if db is None:
+        db = Database()
+        db.connect()
+
+    return Forecaster(db).predicted_entrants(today, date)
@@ -1,33 +1,145 @@
 """
 HTML Reporter - 生成 HTML 邮件报告
 专业邮件排版，无 emoji，符合最佳实践
+
+iter_* 接口按块产出报告内容，配合 write_chunks 可直接写入文件、HTTP 响应、socket 或压缩流，
+峰值内存与报告长度无关；generate_* 接口在此基础上拼成完整字符串
 """
-from typing import Dict, List
+import io
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src import email_templates as templates
+from src.config import EMAIL_DEGRADE_SECTIONS, EMAIL_MAX_BYTES, FORECAST_TOP_N, TREND_SECTION_LIMITS
+from src.email_optimizer import ChunkOptimizer, optimize_email_html
+from src.telegram_paginator import paginate_html
+
+# write_chunks 攒够该长度（字符）再写一次，减少小块写入的系统调用
+STREAM_BUFFER_SIZE = 64 * 1024
+
+# 报告语言（订阅者可选）
+LANGUAGES = ("en", "zh")
+
+# 分区标题；{n} 为榜单 / 分区条数，entrants 中为预测的榜单范围 FORECAST_TOP_N
+EMAIL_LABELS = {
+    "en": {
+        "top": "Top {n} Leaderboard", "rising": "Rising Skills (Top {n})", "falling": "Declining Skills (Top {n})",
+        "new_dropped": "New & Dropped", "new": "New Entries", "dropped": "Dropped From List",
+        "surging": "Trending Up", "momentum": "Momentum (7 days)", "anomalies": "Unusual Growth",
+        "owners": "Top Owners", "entrants": "Likely to Enter Top {n}", "categories": "Categories",
+    },
+    "zh": {
+        "top": "Top {n} 排行榜", "rising": "上升最快（Top {n}）", "falling": "下降最快（Top {n}）",
+        "new_dropped": "新晋与跌出", "new": "新晋榜单", "dropped": "跌出榜单",
+        "surging": "安装量暴涨", "momentum": "7 日动量", "anomalies": "异常增长",
+        "owners": "领先 Owner", "entrants": "有望进入 Top {n}", "categories": "分类概览",
+    },
+}
+
+TELEGRAM_LABELS = {
+    "en": {
+        "top": "Top {n}", "rising": "Rising", "falling": "Declining", "new": "New", "dropped": "Dropped",
+        "surging": "Surging installs", "momentum": "Momentum (7d)", "anomalies": "Anomalies",
+        "owners": "Top owners", "entrants": "Likely to enter Top {n}", "categories": "Categories",
+    },
+    "zh": {
+        "top": "Top {n}", "rising": "上升", "falling": "下降", "new": "新晋", "dropped": "跌出",
+        "surging": "安装量暴涨", "momentum": "7 日动量", "anomalies": "异常增长",
+        "owners": "领先 owner", "entrants": "有望进入 Top {n}", "categories": "分类",
+    },
+}
+
+# 英文报告中的分类名（中文报告直接使用 category_zh）
+CATEGORY_NAMES_EN = {
+    "frontend": "Frontend", "backend": "Backend", "mobile": "Mobile", "devops": "DevOps", "video": "Video",
+    "animation": "Animation", "data": "Data", "ai": "AI/ML", "testing": "Testing", "marketing": "Marketing/SEO",
+    "documentation": "Documentation", "design": "Design", "database": "Database", "security": "Security",
+    "other": "Other", "unclassified": "Unclassified",
+}
+
+# 报告默认展示的榜单条数
+DEFAULT_TOP_N = 20
 
 
 class HTMLReporter:
     """生成 HTML 邮件报告 / Telegram 文本报告"""
 
-    def __init__(self):
-        """初始化"""
+    def __init__(self, language: str = "en", card_cache: Optional[Dict] = None,
+                 optimizer: Optional[ChunkOptimizer] = None):
+        """
+        初始化
+
+        Args:
+            language: 标题和分类名的语言（en / zh）
+            card_cache: 卡片缓存；多个 HTMLReporter 共享同一份趋势数据渲染不同视图时传入同一个 dict，
+                        同一条目在同一分区的卡片只渲染一次（缓存不能比趋势数据活得更久）
+            optimizer: generate_email 使用的分块优化器（多份报告共享时复用已处理的片段）
+        """
+        if language not in LANGUAGES:
+            raise ValueError(f"不支持的报告语言: {language} (仅支持 {'/'.join(LANGUAGES)})")
         self.base_url = "https://skills.sh"
+        self.language = language
+        self.card_cache = card_cache
+        self.optimizer = optimizer
+        # 当前报告的迷你走势图 {name: SVG}（来自 trends["sparklines"]）
+        self._sparklines: Dict[str, str] = {}
+
+    def generate_telegram_messages(self, trends: Dict, date: str, limit: int = None) -> List[str]:
+        """
+        生成 Telegram 消息列表：完整报告按分区/行边界拆成多条，每条都在长度上限内且标签闭合
+
+        Args:
+            trends: 趋势数据
+            date: 日期
+            limit: 单条消息长度上限，默认 TELEGRAM_MESSAGE_LIMIT
+
+        Returns:
+            按发送顺序排列的消息文本
+        """
+        return paginate_html(self.generate_telegram_text(trends, date), limit)
 
     def generate_telegram_text(self, trends: Dict, date: str) -> str:
-        """生成 Telegram 可发送的文本（HTML parse_mode 友好）"""
+        """生成完整的 Telegram 文本（HTML parse_mode 友好，分区之间空行分隔，不截断）"""
+        return "".join(self.iter_telegram_text(trends, date))
+
+    def iter_telegram_text(self, trends: Dict, date: str) -> Iterator[str]:
+        """
+        逐行产出 Telegram 文本（拼接结果与 generate_telegram_text 相同）
+
+        Args:
+            trends: 趋势数据
+            date: 日期
+
+        Yields:
+            文本块（除第一行外都以换行开头）
+        """
+        lines = self._telegram_lines(trends, date)
+        yield next(lines)
+        for line in lines:
+            yield "\n"
+            yield line
+
+    def _telegram_lines(self, trends: Dict, date: str) -> Iterator[str]:
+        """按顺序产出 Telegram 文本的每一行"""
 
         def esc(s: str) -> str:
             # Telegram HTML 只支持少量标签；这里尽量不注入特殊字符
             return (s or "").replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
 
+        labels = TELEGRAM_LABELS[self.language]
+        top_n = trends.get("top_n", DEFAULT_TOP_N)
         top = trends.get("top_20", [])
         rising = trends.get("rising_top5", [])
         falling = trends.get("falling_top5", [])
         new_entries = trends.get("new_entries", [])
         dropped = trends.get("dropped_entries", [])
         surging = trends.get("surging", [])
+        momentum = trends.get("momentum", [])
+        anomalies = trends.get("anomalies", [])
+        owner_leaders = trends.get("owner_leaders", [])
+        entrants = trends.get("predicted_entrants", [])
+        categories = trends.get("categories", [])
 
-        lines = []
-        lines.append(f"<b>Skills Trending</b> — {esc(date)}")
+        yield f"<b>Skills Trending</b> — {esc(date)}"
 
         # AI 状态（是否降级）
         ai = trends.get("_ai") or {}
@@ -36,52 +148,79 @@ class HTMLReporter:
             ok = ai.get("ok")
             total = ai.get("total")
             fb = ai.get("fallback")
-            lines.append(f"AI: <code>{model}</code> | ok {ok}/{total} | fallback {fb}")
+            yield f"AI: <code>{model}</code> | ok {ok}/{total} | fallback {fb}"
 
         # Top 20
-        lines.append("\n<b>Top 20</b>")
-        for s in top[:20]:
+        yield f"\n<b>{labels['top'].format(n=top_n)}</b>"
+        for s in top[:top_n]:
             name = esc(s.get("name"))
             rank = s.get("rank")
             url = esc(s.get("url"))
             summary = esc(s.get("summary", ""))
             if url:
-                lines.append(f"{rank}. <a href=\"{url}\">{name}</a> — {summary}")
+                yield f"{rank}. <a href=\"{url}\">{name}</a> — {summary}"
             else:
-                lines.append(f"{rank}. {name} — {summary}")
+                yield f"{rank}. {name} — {summary}"
 
         # Rising/Falling
         if rising:
-            lines.append("\n<b>Rising</b>")
+            yield f"\n<b>{labels['rising']}</b>"
             for s in rising:
-                lines.append(f"↑ {esc(s.get('name'))} ({s.get('rank_delta', 0)})")
+                yield f"↑ {esc(s.get('name'))} ({s.get('rank_delta', 0)})"
 
         if falling:
-            lines.append("\n<b>Declining</b>")
+            yield f"\n<b>{labels['falling']}</b>"
             for s in falling:
-                lines.append(f"↓ {esc(s.get('name'))} ({s.get('rank_delta', 0)})")
+                yield f"↓ {esc(s.get('name'))} ({s.get('rank_delta', 0)})"
 
         if new_entries:
-            lines.append("\n<b>New</b>")
+            yield f"\n<b>{labels['new']}</b>"
             for s in new_entries[:10]:
-                lines.append(f"+ {esc(s.get('name'))}")
+                yield f"+ {esc(s.get('name'))}"
 
         if dropped:
-            lines.append("\n<b>Dropped</b>")
+            yield f"\n<b>{labels['dropped']}</b>"
             for s in dropped[:10]:
-                lines.append(f"- {esc(s.get('name'))}")
+                yield f"- {esc(s.get('name'))}"
 
         if surging:
-            lines.append("\n<b>Surging installs</b>")
+            threshold = trends.get("surge_threshold")
+            if threshold is not None:
+                yield f"\n<b>{labels['surging']}</b> (≥ {threshold:.0%})"
+            else:
+                yield f"\n<b>{labels['surging']}</b>"
             for s in surging[:10]:
                 rate = s.get("installs_rate", 0)
-                lines.append(f"! {esc(s.get('name'))} ({rate:.0%})")
+                yield f"! {esc(s.get('name'))} ({rate:.0%})"
+
+        if momentum:
+            yield f"\n<b>{labels['momentum']}</b>"
+            for s in momentum[:5]:
+                yield f"» {esc(s.get('name'))} (+{s.get('momentum_7d', 0):.0%})"
 
-        # Telegram 单条消息长度限制 ~4096；这里做个硬截断
-        text = "\n".join(lines)
-        if len(text) > 3800:
-            text = text[:3800] + "\n..."
-        return text
+        if anomalies:
+            yield f"\n<b>{labels['anomalies']}</b>"
+            for s in anomalies[:10]:
+                yield f"? {esc(s.get('name'))} (z {s.get('zscore', 0):+.1f})"
+
+        if owner_leaders:
+            yield f"\n<b>{labels['owners']}</b>"
+            for o in owner_leaders[:5]:
+                yield f"◆ {esc(o.get('owner'))} (+{o.get('installs_delta', 0):,}, {o.get('skills', 0)} skills)"
+
+        if entrants:
+            yield f"\n<b>{labels['entrants'].format(n=FORECAST_TOP_N)}</b>"
+            for s in entrants[:5]:
+                yield f"→ {esc(s.get('name'))} (#{s.get('rank')} → #{s.get('projected_rank')})"
+
+        if categories:
+            yield f"\n<b>{labels['categories']}</b>"
+            for c in categories[:8]:
+                yield (f"▪ {esc(self._category_label(c))} {c.get('installs_share', 0):.0%} "
+                       f"({c.get('share_delta', 0) * 100:+.1f}pp, 7d {c.get('momentum', 0):+.0%}, "
+                       f"{c.get('new_skills', 0)} new)")
+
+        # 单条消息长度限制由 generate_telegram_messages 分页处理
 
     def generate_email_html(self, trends: Dict, date: str) -> str:
         """
@@ -94,462 +233,559 @@ class HTMLReporter:
         Returns:
             HTML 字符串
         """
-        html_parts = []
+        out = io.StringIO()
+        self.write_email_html(out, trends, date)
+        return out.getvalue()
 
-        # HTML 头部
-        html_parts.append(self._get_header(date))
+    def generate_email(self, trends: Dict, date: str, max_bytes: int = None) -> Dict:
+        """
+        生成可直接发送的邮件：渲染后内联 CSS、压缩，并控制在字节预算内
 
-        # Top 20 榜单
-        html_parts.append(self._render_top_20(trends.get("top_20", [])))
+        超出预算时按 EMAIL_DEGRADE_SECTIONS 依次把低优先级分区减半、移除，
+        仍然超出时去掉 Top 20 的长描述；全部降级后仍超出则原样返回并给出提示。
 
-        # 上升 Top 5
-        html_parts.append(self._render_rising_top5(trends.get("rising_top5", [])))
+        Args:
+            trends: 趋势数据（不会被修改）
+            date: 日期
+            max_bytes: 字节预算，默认 EMAIL_MAX_BYTES；0 表示不限制
 
-        # 下降 Top 5
-        html_parts.append(self._render_falling_top5(trends.get("falling_top5", [])))
+        Returns:
+            {
+                "html": "...",
+                "bytes": 48213,          # 最终 UTF-8 字节数
+                "raw_bytes": 55291,      # 未处理的原始 HTML 字节数
+                "degraded": ["dropped_entries: 12 -> 6", ...],
+                "within_budget": True,
+            }
+        """
+        budget = EMAIL_MAX_BYTES if max_bytes is None else max_bytes
+        html, raw_bytes = self._optimize(trends, date)
+        size = len(html.encode("utf-8"))
+        degraded = []
+
+        if budget:
+            steps = self._degrade_steps(trends)
+            while size > budget:
+                step = next(steps, None)
+                if step is None:
+                    print(f"   ⚠️ 邮件降级后仍超出预算: {size:,} / {budget:,} 字节")
+                    break
+                trends, note = step
+                degraded.append(note)
+                html, _ = self._optimize(trends, date)
+                size = len(html.encode("utf-8"))
+
+        return {
+            "html": html,
+            "bytes": size,
+            "raw_bytes": raw_bytes,
+            "degraded": degraded,
+            "within_budget": not budget or size <= budget,
+        }
+
+    def _optimize(self, trends: Dict, date: str) -> Tuple[str, int]:
+        """
+        渲染并优化邮件（设置了 optimizer 时逐块处理并复用缓存）
+
+        Returns:
+            (优化后的 HTML, 原始 HTML 的 UTF-8 字节数)
+        """
+        if self.optimizer is not None:
+            raw_bytes = 0
+
+            def counted(chunks: Iterable[str]) -> Iterator[str]:
+                # 在优化器消费块的同时统计原始大小，不再单独渲染一遍
+                nonlocal raw_bytes
+                for chunk in chunks:
+                    raw_bytes += len(chunk.encode("utf-8"))
+                    yield chunk
+
+            html = self.optimizer.optimize(counted(self.iter_email_html(trends, date)))
+            return html, raw_bytes
+        raw_html = self.generate_email_html(trends, date)
+        return optimize_email_html(raw_html), len(raw_html.encode("utf-8"))
+
+    @staticmethod
+    def _degrade_steps(trends: Dict) -> Iterator[Tuple[Dict, str]]:
+        """
+        逐步降级的趋势数据（每一步在上一步基础上继续，原数据不变）
+
+        Yields:
+            (降级后的趋势数据, 说明)
+        """
+        trends = dict(trends)
+        for section in EMAIL_DEGRADE_SECTIONS:
+            items = trends.get(section) or []
+            while items:
+                keep = len(items) // 2
+                note = f"{section}: {len(items)} -> {keep}"
+                items = items[:keep]
+                trends = {**trends, section: items}
+                yield trends, note
+
+        top = trends.get("top_20") or []
+        if any(skill.get("description") for skill in top):
+            trends = {**trends, "top_20": [{**skill, "description": ""} for skill in top]}
+            yield trends, "top_20: 去掉描述"
+
+    def write_email_html(self, out: IO[str], trends: Dict, date: str, nav: str = "") -> None:
+        """
+        把完整的 HTML 邮件写入缓冲区（静态页头/页尾直接复用缓存的片段）
+
+        Args:
+            out: 文本缓冲区，如 io.StringIO
+            trends: 趋势数据
+            date: 日期
+            nav: 页头下方的导航栏（归档站点使用，邮件为空）
+        """
+        out.writelines(self.iter_email_html(trends, date, nav))
+
+    def iter_email_html(self, trends: Dict, date: str, nav: str = "") -> Iterator[str]:
+        """
+        按块产出完整的 HTML 邮件（卡片逐张渲染，不在内存中拼接整份报告）
+
+        Args:
+            trends: 趋势数据（各分区可以是列表或一次性的迭代器）
+            date: 日期
+            nav: 页头下方的导航栏（归档站点使用，邮件为空）
+
+        Yields:
+            HTML 片段，按顺序拼接即为完整邮件
+        """
+        self._sparklines = trends.get("sparklines") or {}
+        labels = EMAIL_LABELS[self.language]
+        top_n = trends.get("top_n", DEFAULT_TOP_N)
+        card = self._card
+
+        # HTML 头部
+        yield templates.EMAIL_HEAD
+        yield templates.escape_html(date)
+        yield templates.EMAIL_HEAD_END
+        yield nav
+
+        # Top 20 榜单
+        top = [card("top_20", skill, self._format_skill_card) for skill in trends.get("top_20", [])[:top_n]]
+        yield from self._iter_section(labels["top"].format(n=top_n), top or [templates.EMPTY_TOP_20])
+
+        # 上升 / 下降 Top N（N 为配置的分区条数，不限时为实际条数）
+        rising = list(trends.get("rising_top5", []))
+        falling = list(trends.get("falling_top5", []))
+        rising_n = TREND_SECTION_LIMITS["rising"] or len(rising)
+        falling_n = TREND_SECTION_LIMITS["falling"] or len(falling)
+        yield from self._iter_section(labels["rising"].format(n=rising_n),
+                                      (card("rising_top5", s, self._format_compact_card, trend="up") for s in rising))
+        yield from self._iter_section(labels["falling"].format(n=falling_n),
+                                      (card("falling_top5", s, self._format_compact_card, trend="down") for s in falling))
 
         # 新晋/掉榜
-        html_parts.append(self._render_new_dropped(
-            trends.get("new_entries", []),
-            trends.get("dropped_entries", [])
-        ))
+        yield from self._iter_new_dropped(trends.get("new_entries", []), trends.get("dropped_entries", []))
 
         # 暴涨告警
-        surging = trends.get("surging", [])
-        if surging:
-            html_parts.append(self._render_surging(surging))
+        yield from self._iter_section(labels["surging"], (card("surging", s, self._format_compact_card, is_surging=True)
+                                                          for s in trends.get("surging", [])))
+
+        # 动量 / 异常
+        yield from self._iter_section(labels["momentum"], (card("momentum", s, self._format_compact_card, is_momentum=True)
+                                                           for s in trends.get("momentum", [])))
+        yield from self._iter_section(labels["anomalies"], (card("anomalies", s, self._format_compact_card, is_anomaly=True)
+                                                            for s in trends.get("anomalies", [])[:10]))
+
+        # owner 聚合
+        yield from self._iter_section(labels["owners"], (card("owner_leaders", o, self._format_owner_card)
+                                                         for o in trends.get("owner_leaders", [])))
+
+        # 预测进榜
+        yield from self._iter_section(labels["entrants"].format(n=FORECAST_TOP_N),
+                                      (card("predicted_entrants", s, self._format_compact_card, is_forecast=True)
+                                       for s in trends.get("predicted_entrants", [])))
+
+        # 分类概览
+        yield from self._iter_section(labels["categories"], (card("categories", c, self._format_category_card)
+                                                             for c in trends.get("categories", [])))
 
         # HTML 尾部
-        html_parts.append(self._get_footer(date))
-
-        return "\n".join(html_parts)
-
-    def _get_header(self, date: str) -> str:
-        """生成 HTML 头部"""
-        return """<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Skills Trending Daily</title>
-    <style>
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-            margin: 0;
-            padding: 0;
-            background-color: #f8f9fa;
-            -webkit-font-smoothing: antialiased;
-        }
-        .container {
-            max-width: 640px;
-            margin: 0 auto;
-            background-color: #ffffff;
-        }
-        .header {
-            background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
-            color: white;
-            padding: 40px 30px;
-            text-align: center;
-        }
-        .header h1 {
-            margin: 0;
-            font-size: 26px;
-            font-weight: 600;
-            letter-spacing: -0.5px;
-        }
-        .header p {
-            margin: 8px 0 0;
-            font-size: 14px;
-            opacity: 0.8;
-            font-weight: 400;
-        }
-        .section {
-            padding: 28px 30px;
-            border-bottom: 1px solid #e9ecef;
-        }
-        .section:last-child {
-            border-bottom: none;
-        }
-        .section-title {
-            margin: 0 0 20px;
-            font-size: 15px;
-            font-weight: 600;
-            color: #1a1a2e;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-            padding-bottom: 12px;
-            border-bottom: 2px solid #1a1a2e;
-        }
-        .skill-card {
-            margin-bottom: 16px;
-            padding: 0;
-            background-color: #ffffff;
-        }
-        .skill-card:last-child {
-            margin-bottom: 0;
-        }
-        .skill-main {
-            display: flex;
-            align-items: baseline;
-            padding: 14px 16px;
-            background-color: #f8f9fa;
-            border-radius: 6px;
-            border-left: 3px solid #1a1a2e;
-        }
-        .skill-rank {
-            font-size: 14px;
-            font-weight: 700;
-            color: #1a1a2e;
-            min-width: 32px;
-        }
-        .skill-name {
-            font-size: 15px;
-            font-weight: 600;
-            color: #1a1a2e;
-            flex-grow: 1;
-            margin: 0 10px;
-        }
-        .skill-name a {
-            color: #1a1a2e;
-            text-decoration: none;
-        }
-        .skill-name a:hover {
-            text-decoration: underline;
-        }
-        .skill-stats {
-            display: flex;
-            align-items: center;
-            gap: 12px;
-            font-size: 13px;
-        }
-        .rank-change {
-            font-weight: 600;
-            padding: 2px 6px;
-            border-radius: 3px;
-            font-size: 12px;
-        }
-        .rank-up {
-            color: #059669;
-            background-color: #d1fae5;
-        }
-        .rank-down {
-            color: #dc2626;
-            background-color: #fee2e2;
-        }
-        .rank-same {
-            color: #6b7280;
-            background-color: #f3f4f6;
-        }
-        .installs {
-            color: #6b7280;
-            font-size: 13px;
-        }
-        .skill-content {
-            padding: 12px 16px 0;
-        }
-        .skill-summary {
-            color: #4b5563;
-            font-size: 14px;
-            line-height: 1.6;
-            margin-bottom: 8px;
-        }
-        .skill-meta {
-            font-size: 13px;
-            color: #6b7280;
-            margin-bottom: 10px;
-        }
-        .badge {
-            display: inline-block;
-            padding: 3px 8px;
-            border-radius: 4px;
-            font-size: 11px;
-            font-weight: 500;
-            margin-right: 6px;
-            margin-bottom: 4px;
-        }
-        .badge-category {
-            background-color: #e5e7eb;
-            color: #374151;
-        }
-        .badge-new {
-            background-color: #059669;
-            color: white;
-        }
-        .badge-alert {
-            background-color: #dc2626;
-            color: white;
-        }
-        .badge-surging {
-            background-color: #d97706;
-            color: white;
-        }
-        .solves-list {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 6px;
-        }
-        .solve-tag {
-            background-color: #f3f4f6;
-            color: #4b5563;
-            padding: 4px 10px;
-            border-radius: 4px;
-            font-size: 12px;
-        }
-        .divider {
-            height: 1px;
-            background-color: #e9ecef;
-            margin: 0;
-            border: none;
-        }
-        .footer {
-            text-align: center;
-            padding: 28px 20px;
-            font-size: 12px;
-            color: #6b7280;
-            background-color: #f8f9fa;
-        }
-        .footer a {
-            color: #1a1a2e;
-            text-decoration: none;
-            font-weight: 500;
-        }
-        .footer a:hover {
-            text-decoration: underline;
-        }
-        .empty {
-            text-align: center;
-            color: #9ca3af;
-            padding: 24px;
-            font-size: 14px;
-        }
-        .compact-card {
-            padding: 12px 14px;
-            margin-bottom: 8px;
-            background-color: #f8f9fa;
-            border-radius: 6px;
-            border-left: 3px solid #e5e7eb;
-        }
-        .compact-card:last-child {
-            margin-bottom: 0;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>Skills Trending Daily</h1>
-            <p>""" + date + """</p>
-        </div>"""
-
-    def _get_footer(self, date: str) -> str:
-        """生成 HTML 尾部"""
-        return """        <div class="footer">
-            <p>Powered by <a href="https://skills.sh/trending">Skills.sh</a></p>
-            <p style="margin-top: 8px; color: #9ca3af;">Data source: skills.sh/trending</p>
-        </div>
-    </div>
-</body>
-</html>"""
-
-    def _render_top_20(self, skills: List[Dict]) -> str:
-        """渲染 Top 20 榜单"""
-        if not skills:
-            return self._section_html("Top 20 Leaderboard", '<p class="empty">No data available</p>')
-
-        cards = []
-        for skill in skills[:20]:
-            cards.append(self._format_skill_card(skill, show_details=True))
-
-        return self._section_html("Top 20 Leaderboard", "\n".join(cards))
-
-    def _render_rising_top5(self, skills: List[Dict]) -> str:
-        """渲染上升 Top 5"""
-        if not skills:
-            return ""
-
-        cards = []
-        for skill in skills:
-            cards.append(self._format_compact_card(skill, trend="up"))
-
-        return self._section_html("Rising Skills (Top 5)", "\n".join(cards))
-
-    def _render_falling_top5(self, skills: List[Dict]) -> str:
-        """渲染下降 Top 5"""
-        if not skills:
-            return ""
-
-        cards = []
-        for skill in skills:
-            cards.append(self._format_compact_card(skill, trend="down"))
-
-        return self._section_html("Declining Skills (Top 5)", "\n".join(cards))
-
-    def _render_new_dropped(self, new_entries: List[Dict], dropped: List[Dict]) -> str:
-        """渲染新晋/掉榜"""
+        yield "\n"
+        yield templates.EMAIL_FOOTER
+
+    def iter_leaderboard_html(self, skills: Iterable, date: str, nav: str = "") -> Iterator[str]:
+        """
+        按块产出完整榜单页面（每个技能一行，适合归档全部快照这类大报告）
+
+        Args:
+            skills: 按排名排列的技能，支持 skill["rank"] 形式访问的 dict 或数据库行，
+                    例如 Database.iter_skills_by_date 的结果；逐条消费，不会整体读入内存
+            date: 快照日期
+            nav: 导航栏 HTML
+
+        Yields:
+            HTML 片段，按顺序拼接即为完整页面
+        """
+        yield templates.EMAIL_HEAD
+        yield templates.escape_html(date)
+        yield templates.EMAIL_HEAD_END
+        yield nav
+
+        rows = (
+            templates.LEADERBOARD_ROW.render(
+                rank=skill["rank"],
+                url=skill["url"] or f"{self.base_url}/{skill['owner']}/{skill['name']}",
+                name=skill["name"],
+                owner=skill["owner"],
+                installs=skill["installs"] or 0,
+                installs_delta=skill["installs_delta"] or 0,
+                rank_indicator=self._format_rank_indicator(skill["rank_delta"] or 0),
+            )
+            for skill in skills
+        )
+        first = next(rows, None)
+        if first is not None:
+            yield "\n"
+            yield templates.SECTION_OPEN.render(title="Full Leaderboard")
+            yield templates.LEADERBOARD_TABLE_OPEN
+            yield first
+            for row in rows:
+                yield "\n"
+                yield row
+            yield templates.HISTORY_TABLE_CLOSE
+            yield templates.SECTION_CLOSE
+
+        yield "\n"
+        yield templates.EMAIL_FOOTER
+
+    # ------------------------------------------------------------------
+    # 归档站点页面
+    # ------------------------------------------------------------------
+
+    def format_nav(self, links: List[Tuple[str, str]]) -> str:
+        """
+        格式化导航栏
+
+        Args:
+            links: [(链接, 文字), ...]，链接为空的项跳过
+
+        Returns:
+            导航栏 HTML
+        """
+        items = [templates.NAV_LINK.render(href=href, text=text) for href, text in links if href]
+        return templates.SITE_NAV.render(links=templates.NAV_SEPARATOR.join(items)) if items else ""
+
+    def generate_archive_html(self, trends: Dict, date: str, nav: str = "") -> str:
+        """生成某一期快照的归档页面（与邮件相同的排版，附导航栏）"""
+        out = io.StringIO()
+        self.write_email_html(out, trends, date, nav)
+        return out.getvalue()
+
+    def generate_skill_page(self, skill: Dict, history: List[Dict], nav: str = "", date_href: str = "{date}.html",
+                            sparkline: str = "") -> str:
+        """
+        生成技能历史页面
+
+        Args:
+            skill: 最新一期的技能数据（可附带 summary/description/solves/category_zh）
+            history: 历史记录，按日期升序 [{"date", "rank", "rank_delta", "installs", "installs_delta"}, ...]
+            nav: 导航栏 HTML
+            date_href: 日期链接格式，{date} 会被替换为日期
+            sparkline: 技能卡片中的走势图 SVG
+
+        Returns:
+            完整的 HTML 页面
+        """
+        self._sparklines = {skill.get("name", ""): sparkline} if sparkline else {}
+        out = io.StringIO()
+        out.write(templates.EMAIL_HEAD)
+        out.write(templates.escape_html(skill.get("name", "")))
+        out.write(templates.EMAIL_HEAD_END)
+        out.write(nav)
+        self._write_section(out, "Latest", [self._format_skill_card(skill)])
+
+        rows = []
+        for row in reversed(history):
+            rows.append(templates.HISTORY_ROW.render(
+                href=date_href.format(date=row["date"]),
+                date=row["date"],
+                rank=row.get("rank", 0),
+                rank_indicator=self._format_rank_indicator(row.get("rank_delta", 0)),
+                installs=row.get("installs", 0),
+                installs_delta=row.get("installs_delta", 0),
+            ))
+        if rows:
+            self._write_section(out, f"History ({len(rows)} snapshots)",
+                                [templates.HISTORY_TABLE_OPEN + "\n".join(rows) + templates.HISTORY_TABLE_CLOSE])
+
+        out.write("\n")
+        out.write(templates.EMAIL_FOOTER)
+        return out.getvalue()
+
+    def generate_index_page(self, subtitle: str, sections: List[Tuple[str, List[Dict]]], nav: str = "") -> str:
+        """
+        生成索引页面（链接列表）
+
+        Args:
+            subtitle: 页头副标题
+            sections: [(分区标题, [{"label", "href", "text", "meta"}, ...]), ...]
+            nav: 导航栏 HTML
+
+        Returns:
+            完整的 HTML 页面
+        """
+        out = io.StringIO()
+        out.write(templates.EMAIL_HEAD)
+        out.write(templates.escape_html(subtitle))
+        out.write(templates.EMAIL_HEAD_END)
+        out.write(nav)
+        for title, links in sections:
+            self._write_section(out, title, [
+                templates.LINK_CARD.render(label=link.get("label", ""), href=link["href"],
+                                           text=link["text"], meta=link.get("meta", ""))
+                for link in links
+            ])
+        out.write("\n")
+        out.write(templates.EMAIL_FOOTER)
+        return out.getvalue()
+
+    def _write_section(self, out: IO[str], title: str, cards: Iterable[str]) -> None:
+        """
+        写入一个 section（没有卡片时不输出）
+
+        Args:
+            out: 文本缓冲区
+            title: 标题
+            cards: 已渲染的卡片
+        """
+        out.writelines(self._iter_section(title, cards))
+
+    def _iter_section(self, title: str, cards: Iterable[str]) -> Iterator[str]:
+        """
+        按块产出一个 section（没有卡片时不输出）
+
+        Args:
+            title: 标题
+            cards: 卡片（可以是惰性渲染的生成器）
+
+        Yields:
+            HTML 片段
+        """
+        cards = iter(cards)
+        first = next(cards, None)
+        if first is None:
+            return
+
+        yield "\n"
+        yield templates.SECTION_OPEN.render(title=title)
+        yield first
+        for card in cards:
+            yield "\n"
+            yield card
+        yield templates.SECTION_CLOSE
+
+    def _iter_new_dropped(self, new_entries: List[Dict], dropped: List[Dict]) -> Iterator[str]:
+        """按块产出新晋/掉榜"""
         if not new_entries and not dropped:
-            return ""
+            return
 
-        html = ""
+        labels = EMAIL_LABELS[self.language]
+        yield "\n"
+        yield templates.SECTION_OPEN.render(title=labels["new_dropped"])
 
         # 新晋
         if new_entries:
-            new_items = []
-            for skill in new_entries:
-                new_items.append(self._format_compact_card(skill, is_new=True))
-
-            html += "<h3 style='margin: 0 0 12px; font-size: 13px; color: #059669; font-weight: 600; text-transform: uppercase; letter-spacing: 0.5px;'>New Entries</h3>"
-            html += "\n".join(new_items)
+            yield templates.NEW_ENTRIES_HEADING.render(title=labels["new"])
+            yield "\n".join(self._card("new_entries", skill, self._format_compact_card, is_new=True)
+                             for skill in new_entries)
 
         # 掉榜
         if dropped:
             if new_entries:
-                html += "<hr class='divider' style='margin: 16px 0;'>"
-
-            dropped_items = []
-            for skill in dropped[:10]:
-                dropped_items.append(self._format_dropped_card(skill))
+                yield templates.DIVIDER
+            yield templates.DROPPED_HEADING.render(title=labels["dropped"])
+            yield "\n".join(self._card("dropped_entries", skill, self._format_dropped_card) for skill in dropped[:10])
 
-            html += "<h3 style='margin: 0 0 12px; font-size: 13px; color: #dc2626; font-weight: 600; text-transform: uppercase; letter-spacing: 0.5px;'>Dropped From List</h3>"
-            html += "\n".join(dropped_items)
+        yield templates.SECTION_CLOSE
 
-        return self._section_html("New & Dropped", html)
-
-    def _render_surging(self, skills: List[Dict]) -> str:
-        """渲染暴涨告警"""
-        if not skills:
-            return ""
+    def _card(self, section: str, item: Dict, render: Callable[..., str], **flags) -> str:
+        """
+        渲染一张卡片；设置了 card_cache 时按 (分区, 条目, 语言) 复用
 
-        cards = []
-        for skill in skills:
-            cards.append(self._format_compact_card(skill, is_surging=True))
+        Args:
+            section: 分区（同一条目在不同分区的卡片样式不同）
+            item: 条目（技能 / owner / 分类）
+            render: 卡片格式化函数
+            **flags: 传给 render 的参数
 
-        return self._section_html("Trending Up", "\n".join(cards))
+        Returns:
+            卡片 HTML
+        """
+        if self.card_cache is None:
+            return render(item, **flags)
+        key = (section, id(item), self.language)
+        entry = self.card_cache.get(key)
+        # 缓存中保留条目本身：条目被回收后 id 可能被复用，需要确认是同一个对象
+        if entry is None or entry[0] is not item:
+            entry = self.card_cache[key] = (item, render(item, **flags))
+        return entry[1]
+
+    def _category_label(self, item: Dict) -> str:
+        """条目的分类名（英文报告优先用英文名，中文报告用 category_zh）"""
+        category = item.get("category") or ""
+        if self.language == "zh":
+            return item.get("category_zh") or category
+        return CATEGORY_NAMES_EN.get(category) or category or item.get("category_zh") or ""
+
+    @staticmethod
+    def _format_rank_indicator(rank_delta: int) -> str:
+        """排名变化指示"""
+        if rank_delta > 0:
+            return templates.RANK_UP.render(delta=rank_delta)
+        if rank_delta < 0:
+            return templates.RANK_DOWN.render(delta=rank_delta)
+        return templates.RANK_SAME
 
     def _format_skill_card(self, skill: Dict, show_details: bool = True) -> str:
         """格式化单个技能卡片"""
-        rank = skill.get("rank", 0)
         name = skill.get("name", "")
-        rank_delta = skill.get("rank_delta", 0)
         installs = skill.get("installs", 0)
-        installs_delta = skill.get("installs_delta", 0)
-        url = skill.get("url", f"{self.base_url}/{skill.get('owner', '')}/{name}")
+        rank_delta = skill.get("rank_delta", 0)
 
         # 排名变化指示
-        if rank_delta > 0:
-            rank_indicator = f'<span class="rank-change rank-up">+{rank_delta}</span>'
-        elif rank_delta < 0:
-            rank_indicator = f'<span class="rank-change rank-down">{rank_delta}</span>'
-        else:
-            rank_indicator = '<span class="rank-change rank-same">-</span>'
-
-        # 安装量格式化
-        if installs >= 1000:
-            installs_display = f"{installs/1000:.1f}k"
-        else:
-            installs_display = f"{installs:,}"
+        rank_indicator = self._format_rank_indicator(rank_delta)
 
         # 分类标签
         category_badge = ""
-        if skill.get("category_zh"):
-            category_badge = f'<span class="badge badge-category">{skill.get("category_zh")}</span>'
+        category = self._category_label(skill)
+        if category:
+            category_badge = templates.BADGE_CATEGORY.render(text=category)
 
-        # 解决的问题标签
+        # 解决的问题标签与详细信息
         solves_html = ""
-        if show_details and skill.get("solves"):
-            solves_tags = [f'<span class="solve-tag">{s}</span>' for s in skill.get("solves", [])[:4]]
-            solves_html = f'<div class="solves-list">{"".join(solves_tags)}</div>'
-
-        # 详细信息
         details_html = ""
         if show_details:
-            summary = skill.get("summary", "")
-            description = skill.get("description", "")
+            if skill.get("solves"):
+                tags = templates.SOLVE_TAG_SEPARATOR.join(map(templates.escape_html, skill["solves"][:4]))
+                solves_html = templates.SOLVES_LIST.render(tags=tags)
 
-            detail_parts = []
+            summary = skill.get("summary")
+            description = skill.get("description")
             if summary:
-                detail_parts.append(f'<p style="margin: 0 0 8px; color: #4b5563; font-size: 14px; line-height: 1.5;">{summary}</p>')
+                details_html = templates.SUMMARY_PARAGRAPH.render(text=summary)
             if description:
-                detail_parts.append(f'<p style="margin: 0; color: #6b7280; font-size: 13px; line-height: 1.5;">{description}</p>')
-
-            details_html = "\n".join(detail_parts)
-
-        return f"""        <div class="skill-card">
-            <div class="skill-main">
-                <span class="skill-rank">#{rank}</span>
-                <span class="skill-name"><a href="{url}">{name}</a></span>
-                <div class="skill-stats">
-                    {rank_indicator}
-                    <span class="installs">{installs_display} installs</span>
-                </div>
-            </div>
-            <div class="skill-content">
-                {details_html}
-                <div style="margin-top: 10px;">
-                    {category_badge}
-                    {solves_html}
-                </div>
-            </div>
-        </div>"""
-
-    def _format_compact_card(self, skill: Dict, trend: str = None, is_new: bool = False, is_surging: bool = False) -> str:
+                description_html = templates.DESCRIPTION_PARAGRAPH.render(text=description)
+                details_html = f"{details_html}\n{description_html}" if details_html else description_html
+
+        return templates.SKILL_CARD.render(
+            rank=skill.get("rank", 0),
+            url=skill["url"] if "url" in skill else f"{self.base_url}/{skill.get('owner', '')}/{name}",
+            name=name,
+            sparkline=self._sparklines.get(name, ""),
+            rank_indicator=rank_indicator,
+            installs=f"{installs / 1000:.1f}k" if installs >= 1000 else f"{installs:,}",
+            details=details_html,
+            category_badge=category_badge,
+            solves=solves_html,
+        )
+
+    def _format_compact_card(self, skill: Dict, trend: str = None, is_new: bool = False, is_surging: bool = False,
+                             is_momentum: bool = False, is_anomaly: bool = False, is_forecast: bool = False) -> str:
         """格式化紧凑卡片"""
-        rank = skill.get("rank", 0)
         name = skill.get("name", "")
-        url = skill.get("url", f"{self.base_url}/{skill.get('owner', '')}/{name}")
         installs = skill.get("installs", 0)
 
-        if installs >= 1000:
-            installs_display = f"{installs/1000:.1f}k"
-        else:
-            installs_display = f"{installs:,}"
-
         # 变化指示
         change_html = ""
         if is_new:
-            change_html = '<span class="badge badge-new">NEW</span>'
+            change_html = templates.BADGE_NEW
         elif is_surging:
-            rate = skill.get("installs_rate", 0)
-            change_html = f'<span class="badge badge-surging">+{int(rate*100)}%</span>'
+            change_html = templates.BADGE_SURGING.render(percent=int(skill.get("installs_rate", 0) * 100))
+        elif is_momentum:
+            change_html = templates.BADGE_MOMENTUM.render(percent=int(skill.get("momentum_7d", 0) * 100))
+        elif is_anomaly:
+            change_html = templates.BADGE_ANOMALY.render(zscore=skill.get("zscore", 0))
+        elif is_forecast:
+            change_html = templates.BADGE_FORECAST.render(rank=skill.get("projected_rank", 0))
         elif trend == "up":
-            rank_delta = skill.get("rank_delta", 0)
-            change_html = f'<span class="rank-change rank-up">+{rank_delta}</span>'
+            change_html = templates.RANK_UP.render(delta=skill.get("rank_delta", 0))
         elif trend == "down":
-            rank_delta = skill.get("rank_delta", 0)
-            change_html = f'<span class="rank-change rank-down">{rank_delta}</span>'
-
-        summary_html = ""
-        if skill.get("summary"):
-            summary_html = f'<div style="padding: 8px 14px 0; font-size: 13px; color: #6b7280; line-height: 1.5;">{skill.get("summary")}</div>'
-
-        return f"""            <div class="compact-card">
-                {change_html}
-                <span style="font-weight: 600; min-width: 32px; font-size: 13px;">#{rank}</span>
-                <span style="flex-grow: 1; margin: 0 10px;">
-                    <a href="{url}" style="color: #1a1a2e; text-decoration: none; font-size: 14px; font-weight: 500;">{name}</a>
-                </span>
-                <span style="color: #6b7280; font-size: 12px;">{installs_display}</span>
-            </div>{summary_html}"""
+            change_html = templates.RANK_DOWN.render(delta=skill.get("rank_delta", 0))
+
+        summary = skill.get("summary")
+
+        return templates.COMPACT_CARD.render(
+            change=change_html,
+            rank=skill.get("rank", 0),
+            url=skill["url"] if "url" in skill else f"{self.base_url}/{skill.get('owner', '')}/{name}",
+            name=name,
+            sparkline=self._sparklines.get(name, ""),
+            installs=f"{installs / 1000:.1f}k" if installs >= 1000 else f"{installs:,}",
+            summary=templates.COMPACT_SUMMARY.render(summary=summary) if summary else "",
+        )
+
+    def _format_owner_card(self, owner: Dict) -> str:
+        """格式化 owner 聚合卡片"""
+        name = owner.get("owner", "")
+        return templates.OWNER_CARD.render(
+            installs_delta=owner.get("installs_delta", 0),
+            best_rank=owner.get("best_rank", 0),
+            url=f"{self.base_url}/{name}",
+            owner=name,
+            top_skill=owner.get("top_skill", ""),
+            skills=owner.get("skills", 0),
+        )
+
+    def _format_category_card(self, category: Dict) -> str:
+        """格式化分类概览卡片（安装量占比、占比变化、7 天动量、新上榜数）"""
+        new_skills = category.get("new_skills", 0)
+        return templates.CATEGORY_CARD.render(
+            share=category.get("installs_share", 0),
+            name=self._category_label(category),
+            count=category.get("count", 0),
+            new_skills=templates.CATEGORY_NEW_SKILLS.render(count=new_skills) if new_skills else "",
+            share_delta=category.get("share_delta", 0) * 100,
+            momentum=category.get("momentum", 0),
+        )
 
     def _format_dropped_card(self, skill: Dict) -> str:
         """格式化掉榜卡片"""
-        name = skill.get("name", "")
-        yesterday_rank = skill.get("yesterday_rank", 0)
-
-        return f"""            <div class="compact-card" style="border-left-color: #dc2626; background-color: #fef2f2;">
-                <span class="badge badge-alert">DROPPED</span>
-                <span style="font-weight: 600; min-width: 32px; font-size: 13px;">#{yesterday_rank}</span>
-                <span style="flex-grow: 1; margin: 0 10px; color: #6b7280; font-size: 14px;">{name}</span>
-            </div>"""
-
-    def _section_html(self, title: str, content: str) -> str:
-        """生成一个完整的 section"""
-        return f"""        <div class="section">
-            <h2 class="section-title">{title}</h2>
-            {content}
-        </div>"""
+        return templates.DROPPED_CARD.render(rank=skill.get("yesterday_rank", 0), name=skill.get("name", ""))
 
 
 def generate_email_html(trends: Dict, date: str) -> str:
     """便捷函数：生成邮件 HTML"""
     reporter = HTMLReporter()
     return reporter.generate_email_html(trends, date)
+
+
+def write_chunks(chunks: Iterable[str], out, buffer_size: int = STREAM_BUFFER_SIZE) -> int:
+    """
+    把 iter_* 产出的文本块写入输出流，攒够 buffer_size 写一次
+
+    Args:
+        chunks: 文本块
+        out: 文本流（文件、io.StringIO、gzip.open(..., "wt")）、二进制流（"wb" 文件、
+             HTTP 响应的 wfile、socket.makefile("wb")）或带 sendall 的 socket；二进制输出按 UTF-8 编码
+        buffer_size: 每次写入的最小长度（字符）
+
+    Returns:
+        写入的长度（文本流为字符数，二进制流为字节数）
+    """
+    write = getattr(out, "write", None) or out.sendall
+    encode = not isinstance(out, io.TextIOBase)
+    written = 0
+    buffer: List[str] = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= buffer_size:
+            written += _flush(write, buffer, encode)
+            buffer, buffered = [], 0
+    if buffer:
+        written += _flush(write, buffer, encode)
+    return written
+
+
+def _flush(write, buffer: List[str], encode: bool) -> int:
+    """写出缓冲的文本块，返回写入长度"""
+    data = "".join(buffer)
+    if encode:
+        data = data.encode("utf-8")
+    write(data)
+    return len(data)
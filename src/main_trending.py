@@ -13,25 +13,32 @@ sys.path.insert(0, project_root)
 
 from src.config import (
     OPENAI_API_KEY,
-    NOTIFY_CHANNEL,
+    NOTIFY_CHANNELS,
     TELEGRAM_BOT_TOKEN,
     TELEGRAM_CHAT_ID,
-    TELEGRAM_MESSAGE_THREAD_ID,
     RESEND_API_KEY,
     EMAIL_TO,
-    RESEND_FROM_EMAIL,
+    WEBHOOK_URLS,
     DB_PATH,
     DB_RETENTION_DAYS,
+    DB_WRITE_BEHIND,
+    TREND_LOOKBACK_DAYS,
     TOP_N_DETAILS,
+    SITE_ENABLED,
+    EXPORT_ENABLED,
+    OUTPUT_DIR,
 )
 from src.skills_fetcher import SkillsFetcher
 from src.detail_fetcher import DetailFetcher
 from src.claude_summarizer import ClaudeSummarizer
 from src.database import Database
+from src.db_writer import DBWriter
 from src.trend_analyzer import TrendAnalyzer
-from src.html_reporter import HTMLReporter
-from src.resend_sender import ResendSender
-from src.telegram_sender import TelegramSender
+from src.subscriptions import CHANNELS, ReportFanout, default_subscriptions
+from src.notifiers import notify
+from src.site_generator import SiteGenerator
+from src.sparkline import Sparklines
+from src.trend_export import TrendExporter
 
 
 def print_banner():
@@ -63,24 +70,29 @@ def main():
         print("❌ 错误: OPENAI_API_KEY 环境变量未设置")
         sys.exit(1)
 
-    # 通知渠道检查
-    if NOTIFY_CHANNEL == "telegram":
-        if not TELEGRAM_BOT_TOKEN:
-            print("❌ 错误: TELEGRAM_BOT_TOKEN 环境变量未设置")
+    # 通知渠道检查（NOTIFY_CHANNEL 可逗号分隔多个渠道，并发发送）
+    for channel in NOTIFY_CHANNELS:
+        if channel == "telegram":
+            if not TELEGRAM_BOT_TOKEN:
+                print("❌ 错误: TELEGRAM_BOT_TOKEN 环境变量未设置")
+                sys.exit(1)
+            if not TELEGRAM_CHAT_ID:
+                print("❌ 错误: TELEGRAM_CHAT_ID 环境变量未设置")
+                sys.exit(1)
+        elif channel == "resend":
+            if not RESEND_API_KEY:
+                print("❌ 错误: RESEND_API_KEY 环境变量未设置")
+                sys.exit(1)
+            if not EMAIL_TO:
+                print("❌ 错误: EMAIL_TO 环境变量未设置")
+                sys.exit(1)
+        elif channel == "webhook":
+            if not WEBHOOK_URLS:
+                print("❌ 错误: WEBHOOK_URL 环境变量未设置")
+                sys.exit(1)
+        else:
+            print(f"❌ 错误: NOTIFY_CHANNEL 不支持: {channel} (仅支持 {'/'.join(CHANNELS)})")
             sys.exit(1)
-        if not TELEGRAM_CHAT_ID:
-            print("❌ 错误: TELEGRAM_CHAT_ID 环境变量未设置")
-            sys.exit(1)
-    elif NOTIFY_CHANNEL == "resend":
-        if not RESEND_API_KEY:
-            print("❌ 错误: RESEND_API_KEY 环境变量未设置")
-            sys.exit(1)
-        if not EMAIL_TO:
-            print("❌ 错误: EMAIL_TO 环境变量未设置")
-            sys.exit(1)
-    else:
-        print(f"❌ 错误: NOTIFY_CHANNEL 不支持: {NOTIFY_CHANNEL} (仅支持 telegram/resend)")
-        sys.exit(1)
 
     # 获取今日日期
     today = get_today_date()
@@ -88,6 +100,8 @@ def main():
     print(f"   (北京时间: {datetime.now(timezone.utc)} + 8h)")
     print()
 
+    writer = None
+
     try:
         # 1. 获取今日榜单
         print(f"[步骤 1/7] 获取技能排行榜...")
@@ -101,13 +115,19 @@ def main():
         db = Database(DB_PATH)
         db.init_db()
 
+        # 可选：后台写入线程，写操作入队后立即返回，与抓取/AI 阶段并行落盘
+        if DB_WRITE_BEHIND:
+            writer = DBWriter(DB_PATH).start()
+            print("   已启用后台写入 (write-behind)")
+        sink = writer or db
+
         # 3. 选择需要抓取详情的 TopN（去重逻辑）
         print(f"[步骤 3/7] 选择需要抓取详情的 Top {TOP_N_DETAILS} ...")
         detail_candidates = today_skills[:TOP_N_DETAILS]
 
-        latest_date = db.get_latest_date()
-        # latest_date 可能就是今天（如果重复运行）；仅当 latest_date 存在且与 today 不同才做对比
-        if latest_date and latest_date != today:
+        # 取今天之前最近的一期快照（重复运行时不会与今天自身对比）
+        latest_date = db.get_previous_snapshot_date(today)
+        if latest_date:
             prev_top = db.get_top_n_names(latest_date, n=TOP_N_DETAILS)
             curr_top = [s.get("name") for s in today_skills[:TOP_N_DETAILS]]
 
@@ -145,13 +165,13 @@ def main():
 
         # 6. 保存到数据库
         print(f"[步骤 6/7] 保存到数据库...")
-        db.save_skill_details(ai_summaries)
+        sink.save_skill_details(ai_summaries)
         print()
 
         # 7. 计算趋势
         print(f"[步骤 7/7] 计算趋势...")
-        analyzer = TrendAnalyzer(db)
-        trends = analyzer.calculate_trends(today_skills, today, ai_summary_map)
+        analyzer = TrendAnalyzer(db, writer=writer)
+        trends = analyzer.calculate_trends(today_skills, today, ai_summary_map, TREND_LOOKBACK_DAYS or None)
         # 附加元信息，方便在 Telegram/邮件中展示 AI 运行状态
         trends["_ai"] = {
             "model": getattr(summarizer, "model", ""),
@@ -161,55 +181,73 @@ def main():
         }
 
         # 输出趋势摘要
+        print(f"   对比快照: {trends.get('previous_date') or '无'}")
         print(f"   Top 20: {len(trends['top_20'])} 个")
         print(f"   上升: {len(trends['rising_top5'])} 个")
         print(f"   下降: {len(trends['falling_top5'])} 个")
         print(f"   新晋: {len(trends['new_entries'])} 个")
         print(f"   跌出: {len(trends['dropped_entries'])} 个")
-        print(f"   暴涨: {len(trends['surging'])} 个")
+        print(f"   暴涨: {len(trends['surging'])} 个 (阈值 {trends['surge_threshold']:.1%})")
+        print(f"   动量: {len(trends['momentum'])} 个")
+        print(f"   异常: {len(trends['anomalies'])} 个")
+        print(f"   领先 owner: {len(trends['owner_leaders'])} 个")
+        print(f"   预计进榜: {len(trends['predicted_entrants'])} 个")
+        print()
+
+        # 报告生成前的写入屏障
+        if writer:
+            latency = writer.flush()
+            stats = writer.stats()
+            print(f"   [写入] flush {latency * 1000:.1f}ms | 事务 {stats['transactions']} | "
+                  f"批次 {stats['batches']} | 最大队列深度 {stats['max_queue_depth']}")
+            print()
+
+        # 分类概览：快照写入时已物化，这里只做一次主键查询
+        trends["categories"] = db.get_category_stats(today)
+        print(f"   分类: {len(trends['categories'])} 个")
+
+        # 报告卡片中的迷你走势图（一次查询取出全部展示技能的历史）
+        trends["sparklines"] = Sparklines(db).for_trends(trends, today)
+        print(f"   走势图: {len(trends['sparklines'])} 个")
         print()
 
-        # 通知输出
-        reporter = HTMLReporter()
-
-        if NOTIFY_CHANNEL == "telegram":
-            print("[通知] 发送 Telegram 消息...")
-            text = reporter.generate_telegram_text(trends, today)
-            sender = TelegramSender(TELEGRAM_BOT_TOKEN)
-            thread_id = int(TELEGRAM_MESSAGE_THREAD_ID) if TELEGRAM_MESSAGE_THREAD_ID else None
-            result = sender.send_message(
-                chat_id=TELEGRAM_CHAT_ID,
-                text=text,
-                parse_mode="HTML",
-                disable_web_page_preview=True,
-                message_thread_id=thread_id,
-            )
-            if result.get("success"):
-                print(f"   ✅ Telegram 发送成功! message_id: {result.get('id')}")
-            else:
-                print(f"   ❌ Telegram 发送失败: {result.get('message')}")
+        # 机器可读导出（快照从数据库流式写出）
+        if EXPORT_ENABLED:
+            exporter = TrendExporter(db)
+            exported = exporter.export(trends, today)
+            pruned = exporter.prune(DB_RETENTION_DAYS)
+            print(f"[导出] {exported['dir']}/{today}: 快照 {exported['skills']} 行 | 趋势 {exported['entries']} 行"
+                  + (f" | 清理 {pruned} 期" if pruned else ""))
             print()
 
-        else:  # resend
-            print("[通知] 发送 Resend 邮件...")
-            html_content = reporter.generate_email_html(trends, today)
-            print(f"   HTML 长度: {len(html_content)} 字符")
-            sender = ResendSender(RESEND_API_KEY)
-            result = sender.send_email(
-                to=EMAIL_TO,
-                subject=f"Skills Trending Daily - {today}",
-                html_content=html_content,
-                from_email=RESEND_FROM_EMAIL,
-            )
-            if result.get("success"):
-                print(f"   ✅ 邮件发送成功! ID: {result.get('id')}")
-            else:
-                print(f"   ❌ 邮件发送失败: {result.get('message')}")
+        # 通知输出：趋势只计算一次，每个订阅者收到按自己的分类/条数/语言过滤的视图
+        subscriptions = db.get_subscriptions() or default_subscriptions()
+        print(f"[通知] 分发给 {len(subscriptions)} 个订阅者...")
+        fanout = ReportFanout(trends, today, skills_count=len(today_skills))
+        delivery = notify(fanout, subscriptions, sink)
+        stats = fanout.stats()
+        sent = sum(1 for d in delivery["deliveries"] if d["success"])
+        serial = sum(c["elapsed"] for c in delivery["channels"].values())
+        print(f"   成功 {sent} | 失败 {len(delivery['deliveries']) - sent} | 视图 {stats['views']} | "
+              f"卡片 {stats['cards']} | 用时 {delivery['elapsed']:.2f}s（各渠道合计 {serial:.2f}s）")
+        print()
+
+        # 归档站点（只重新生成输入变化的页面）
+        if SITE_ENABLED:
+            print(f"[站点] 增量生成归档站点 -> {OUTPUT_DIR} ...")
+            if writer:
+                writer.flush()
+            site = SiteGenerator(db).build()
+            print(f"   {site['pages']} 页 | 写入 {site['written']} | 跳过 {site['skipped']} | "
+                  f"删除 {site['removed']}，用时 {site['elapsed']:.2f}s")
             print()
 
         # 8. 清理过期数据
         print(f"[清理] 清理 {DB_RETENTION_DAYS} 天前的数据...")
-        deleted = db.cleanup_old_data(DB_RETENTION_DAYS)
+        sink.cleanup_old_data(DB_RETENTION_DAYS)
+        if writer:
+            writer.close()
+            writer = None
         print()
 
         # 完成
@@ -234,6 +272,11 @@ def main():
         traceback.print_exc()
         sys.exit(1)
 
+    finally:
+        # 退出前的写入屏障：确保已入队的写入落盘
+        if writer:
+            writer.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,143 @@
+"""
+Momentum - 增量维护的技能动量 / EWMA / 异常分数
+
+每个技能在数据库 skill_stats 表中保存一行状态，新快照到来时只用
+「上一次状态 + 本期安装量」做 O(1) 更新，不回扫历史：
+
+- growth: 日均对数增长率 ln(installs / last_installs) / 间隔天数
+- growth_ewma_{3,7,30}d: 时间常数为 3/7/30 天的 EWMA（间隔不等时 alpha = 1 - e^(-dt/τ)）
+- growth_mean / growth_var: 指数加权均值/方差（τ = 30 天，前几次观测等权重），用于计算 z-score；
+  样本少时方差向当期全体技能的稳健方差收缩，避免短历史技能的 z-score 虚高
+- momentum_{k}d: expm1(k × growth_ewma_{k}d)，即按当前趋势 k 天的预期增长比例
+"""
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+# 动量窗口（天）
+MOMENTUM_WINDOWS = (3, 7, 30)
+
+# z-score 基线的时间常数（天）
+BASELINE_TAU_DAYS = 30
+
+# z-score 基线方差的先验强度（伪观测数）：先验为当期全体技能增长率的稳健方差（MAD）
+BASELINE_PRIOR_OBSERVATIONS = 20
+
+
+def _days_between(start: str, end: str) -> float:
+    return (datetime.strptime(end, "%Y-%m-%d") - datetime.strptime(start, "%Y-%m-%d")).days
+
+
+def _robust_var(values: np.ndarray) -> float:
+    """按中位数绝对偏差估计的方差（不受当期少数暴涨技能影响）"""
+    if len(values) < 2:
+        return 0.0
+    mad = np.median(np.abs(values - np.median(values)))
+    return float((1.4826 * mad) ** 2)
+
+
+def update_skill_stats(today: List[Dict], date: str, state: Dict[str, Dict],
+                       min_observations: int = 3) -> List[Dict]:
+    """
+    用今日快照增量更新技能状态（向量化，每个技能 O(1)）
+
+    Args:
+        today: 今日技能列表（需包含 name/rank/installs）
+        date: 今日日期 YYYY-MM-DD
+        state: 已有状态 {name: row}（见 Database.get_skill_stats）
+        min_observations: 计算 z-score 所需的最少历史观测数
+
+    Returns:
+        今日每个技能的新状态行（顺序与 today 一致）。已在当天（或更晚）
+        更新过的技能原样返回，重复运行不会重复累计。
+    """
+    n = len(today)
+    if n == 0:
+        return []
+
+    installs = np.array([s["installs"] for s in today], dtype=np.float64)
+    previous = [state.get(s["name"]) for s in today]
+
+    has_state = np.array([p is not None for p in previous])
+    fresh = np.array([p is not None and p["last_date"] >= date for p in previous])
+
+    def prev_col(key: str, default: float = 0.0) -> np.ndarray:
+        return np.array([p[key] if p is not None and p[key] is not None else default for p in previous],
+                        dtype=np.float64)
+
+    last_installs = prev_col("last_installs")
+    observations = prev_col("observations")
+    dt = np.array([
+        max(_days_between(p["last_date"], date), 1) if p is not None and p["last_date"] < date else 1
+        for p in previous
+    ], dtype=np.float64)
+
+    # 本期日均对数增长率（无历史或安装量非正时为 0，且不计入观测）
+    valid = has_state & ~fresh & (last_installs > 0) & (installs > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = np.where(valid, np.log(installs / last_installs) / dt, 0.0)
+    first = valid & (observations == 0)
+
+    # 指数加权的步长；前几次观测改用等权重（Welford），权重和不足时不会低估方差
+    alpha = 1.0 - np.exp(-dt / BASELINE_TAU_DAYS)
+    alpha_eff = np.maximum(alpha, 1.0 / np.maximum(observations + 1, 1))
+
+    # z-score 用更新前的基线：基线只有 n_eff 个有效样本，方差换成无偏估计并计入均值本身的不确定性，
+    # 再以今日全体技能增长率的稳健方差为先验（BASELINE_PRIOR_OBSERVATIONS 个伪观测）收缩，避免样本少时方差过小
+    mean = prev_col("growth_mean")
+    var = prev_col("growth_var")
+    n_eff = np.minimum(observations, 2.0 / alpha - 1.0)
+    prior_var = _robust_var(growth[valid])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sample_var = np.where(n_eff > 1, var * n_eff / (n_eff - 1), 0.0)
+        shrunk_var = ((BASELINE_PRIOR_OBSERVATIONS * prior_var + (n_eff - 1) * sample_var)
+                      / (BASELINE_PRIOR_OBSERVATIONS + n_eff - 1))
+        predictive_var = shrunk_var * (1.0 + 1.0 / n_eff)
+        zscore = np.where(
+            valid & (observations >= min_observations) & (predictive_var > 1e-12),
+            (growth - mean) / np.sqrt(predictive_var),
+            0.0,
+        )
+
+    # 指数加权均值/方差
+    diff = growth - mean
+    incr = alpha_eff * diff
+    new_mean = np.where(first, growth, mean + incr)
+    new_var = np.where(first, 0.0, (1.0 - alpha_eff) * (var + diff * incr))
+    new_mean = np.where(valid, new_mean, mean)
+    new_var = np.where(valid, new_var, var)
+
+    # 各窗口 EWMA 与动量
+    ewmas = {}
+    for k in MOMENTUM_WINDOWS:
+        key = f"growth_ewma_{k}d"
+        ewma = prev_col(key)
+        alpha_k = 1.0 - np.exp(-dt / k)
+        updated = np.where(first, growth, ewma + alpha_k * (growth - ewma))
+        ewmas[k] = np.where(valid, updated, ewma)
+
+    new_observations = observations + valid
+
+    rows = []
+    for i, skill in enumerate(today):
+        if fresh[i]:
+            rows.append(dict(previous[i]))
+            continue
+        row = {
+            "name": skill["name"],
+            "last_date": date,
+            "last_installs": int(installs[i]),
+            "last_rank": skill["rank"],
+            "observations": int(new_observations[i]),
+            "growth_mean": float(new_mean[i]),
+            "growth_var": float(new_var[i]),
+            "last_growth": float(growth[i]),
+            "last_zscore": float(zscore[i]),
+        }
+        for k in MOMENTUM_WINDOWS:
+            row[f"growth_ewma_{k}d"] = float(ewmas[k][i])
+            row[f"momentum_{k}d"] = float(np.expm1(k * ewmas[k][i]))
+        rows.append(row)
+
+    return rows
@@ -0,0 +1,350 @@
+"""
+Notifiers - 多渠道并发通知
+各渠道的发送器注册在 NOTIFIERS 中，notify() 为每个渠道启动一个 asyncio 任务：
+
+- 渠道之间并发，总耗时接近最慢的单个渠道，而不是各渠道耗时之和
+- 同一渠道内按速率限制依次投递；单次投递有超时，失败后按指数退避重试
+- Telegram 渠道整批交给 TelegramBroadcaster，按 Bot API 的全局 / 会话限额在会话之间交错发送
+- 阻塞的 HTTP 客户端（requests / resend SDK）在工作线程中运行，不阻塞事件循环
+- 每个订阅者的结果、尝试次数和耗时写入 notification_log
+"""
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, List, Sequence, Tuple, Type
+
+from src.config import (
+    NOTIFY_RETRY_BACKOFF,
+    NOTIFY_SETTINGS,
+    RESEND_API_KEY,
+    RESEND_FROM_EMAIL,
+    TELEGRAM_BOT_TOKEN,
+)
+from src.resend_sender import ResendSender
+from src.subscriptions import ReportFanout
+from src.telegram_broadcaster import TelegramBroadcaster
+from src.webhook_sender import WebhookSender
+
+# 渠道名 -> 发送器类（register_notifier 注册）
+NOTIFIERS: Dict[str, Type["Notifier"]] = {}
+
+# 未在 NOTIFY_SETTINGS 中配置的渠道使用的默认值
+DEFAULT_SETTINGS = {"timeout": 30.0, "retries": 2, "rate": 5.0}
+
+
+def register_notifier(cls: Type["Notifier"]) -> Type["Notifier"]:
+    """类装饰器：按 channel 注册发送器（同名覆盖）"""
+    NOTIFIERS[cls.channel] = cls
+    return cls
+
+
+class Notifier:
+    """
+    渠道发送器基类
+
+    子类声明渠道名和使用的报告格式（见 subscriptions.REPORT_FORMATS），并实现阻塞的 send()；
+    batched 为 True 的渠道改为实现 send_batch()，一次投递整个渠道的订阅者（自行限速和重试）
+    """
+
+    channel = ""
+    report_format = ""
+    batched = False
+
+    def __init__(self, timeout: float, retries: int, rate: float):
+        """
+        初始化
+
+        Args:
+            timeout: 单次请求超时（秒）
+            retries: 失败后的重试次数
+            rate: 每秒最多投递的订阅者数（<= 0 不限速）
+        """
+        self.timeout = timeout
+        self.retries = retries
+        self.rate = rate
+
+    def send(self, subscription: Dict, report: Dict, date: str, delivered: List) -> Dict:
+        """
+        投递一次（在工作线程中调用）
+
+        Args:
+            subscription: 订阅者
+            report: ReportFanout.render 的结果
+            date: 报告日期
+            delivered: 之前的尝试已送达的消息 ID；重试时据此跳过已送达的部分，本次送达的 ID 追加到其中
+
+        Returns:
+            {"success": bool, "message": str}
+        """
+        raise NotImplementedError
+
+    def send_batch(self, subscriptions: Sequence[Dict], reports: Sequence[Dict], date: str) -> List[Dict]:
+        """
+        投递整个渠道的订阅者（batched 渠道，在工作线程中调用）
+
+        Args:
+            subscriptions: 订阅者
+            reports: 与 subscriptions 一一对应的 ReportFanout.render 结果
+            date: 报告日期
+
+        Returns:
+            与 subscriptions 顺序一致的投递结果（字段同 deliver_all 的 deliveries）
+        """
+        raise NotImplementedError
+
+    def deadline(self, report: Dict) -> float:
+        """单次投递的总时限（秒），超过后放弃等待"""
+        return self.timeout
+
+    def close(self) -> None:
+        """释放连接"""
+
+
+@register_notifier
+class TelegramNotifier(Notifier):
+    """
+    Telegram Bot（报告拆成多条消息）
+
+    整个渠道一次群发：全局和每个会话的限额由 TELEGRAM_GLOBAL_RATE / TELEGRAM_CHAT_RATE /
+    TELEGRAM_GROUP_PER_MINUTE 的令牌桶控制，429 按 retry_after 重试（retries 为单条消息的最多重试次数）
+    """
+
+    channel = "telegram"
+    report_format = "telegram"
+    batched = True
+
+    def __init__(self, timeout: float, retries: int, rate: float):
+        super().__init__(timeout, retries, rate)
+        self.broadcaster = TelegramBroadcaster(TELEGRAM_BOT_TOKEN, timeout=timeout, max_retries=retries)
+
+    def send_batch(self, subscriptions: Sequence[Dict], reports: Sequence[Dict], date: str) -> List[Dict]:
+        jobs = [{"chat_id": subscription["target"], "texts": report["messages"],
+                 "thread_id": subscription.get("thread_id")}
+                for subscription, report in zip(subscriptions, reports)]
+        result = self.broadcaster.broadcast(jobs)
+        print(f"   [telegram] {result['requests']} 次请求 | 429 {result['throttled']} 次 | "
+              f"{result['throughput']:.1f} 条/秒")
+
+        deliveries = []
+        for subscription, job, sent in zip(subscriptions, jobs, result["results"]):
+            deliveries.append({
+                "channel": self.channel,
+                "target": subscription["target"],
+                "success": sent["success"],
+                "attempts": 1 + sent["retries"],
+                "latency": sent["latency"],
+                "message": f"{len(sent['ids'])}/{len(job['texts'])} 条" if sent["success"] else sent["message"],
+                "ids": sent["ids"],
+            })
+        return deliveries
+
+    def close(self) -> None:
+        self.broadcaster.close()
+
+
+@register_notifier
+class ResendNotifier(Notifier):
+    """Resend 邮件"""
+
+    channel = "resend"
+    report_format = "email"
+
+    def __init__(self, timeout: float, retries: int, rate: float):
+        super().__init__(timeout, retries, rate)
+        self.sender = ResendSender(RESEND_API_KEY)
+
+    def send(self, subscription: Dict, report: Dict, date: str, delivered: List) -> Dict:
+        result = self.sender.send_email(
+            to=subscription["target"],
+            subject=f"Skills Trending Daily - {date}",
+            html_content=report["html"],
+            from_email=RESEND_FROM_EMAIL,
+        )
+        if not result.get("success"):
+            return {"success": False, "message": result.get("message")}
+        if result.get("id"):
+            delivered.append(result["id"])
+        degraded = f"，降级 {len(report['degraded'])} 步" if report["degraded"] else ""
+        return {"success": True, "message": f"{report['bytes'] / 1024:.1f} KB{degraded}"}
+
+
+@register_notifier
+class WebhookNotifier(Notifier):
+    """通用 Webhook（POST JSON 摘要）"""
+
+    channel = "webhook"
+    report_format = "summary"
+
+    def __init__(self, timeout: float, retries: int, rate: float):
+        super().__init__(timeout, retries, rate)
+        self.sender = WebhookSender(timeout=timeout)
+
+    def send(self, subscription: Dict, report: Dict, date: str, delivered: List) -> Dict:
+        result = self.sender.send(subscription["target"], report["payload"])
+        if result["success"] and result.get("id"):
+            delivered.append(result["id"])
+        return {"success": result["success"], "message": result["message"]}
+
+    def close(self) -> None:
+        self.sender.close()
+
+
+class RateLimiter:
+    """按固定间隔放行（每秒 rate 次）"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        """等待到下一个可用时刻"""
+        now = time.monotonic()
+        if self._next > now:
+            await asyncio.sleep(self._next - now)
+            now = self._next
+        self._next = now + self.interval
+
+
+async def _deliver(notifier: Notifier, subscription: Dict, report: Dict, date: str, backoff: float,
+                   executor: Executor) -> Dict:
+    """投递给一个订阅者（含超时和重试），返回投递结果"""
+    loop = asyncio.get_running_loop()
+    delivered: List = []
+    start = time.monotonic()
+    attempts = 0
+    result = {"success": False, "message": ""}
+
+    for attempt in range(notifier.retries + 1):
+        attempts = attempt + 1
+        deadline = notifier.deadline(report)
+        try:
+            result = await asyncio.wait_for(
+                loop.run_in_executor(executor, notifier.send, subscription, report, date, delivered), deadline)
+        except asyncio.TimeoutError:
+            # 超时的请求可能仍在工作线程中完成，不再重试，避免重复投递
+            result = {"success": False, "message": f"超时（{deadline:g}s）"}
+            break
+        except Exception as e:
+            result = {"success": False, "message": str(e)}
+        if result["success"]:
+            break
+        if attempt < notifier.retries:
+            await asyncio.sleep(backoff * 2 ** attempt)
+
+    return {
+        "channel": notifier.channel,
+        "target": subscription["target"],
+        "success": bool(result["success"]),
+        "attempts": attempts,
+        "latency": time.monotonic() - start,
+        "message": result.get("message"),
+        "ids": list(delivered),
+    }
+
+
+async def _deliver_channel(notifier: Notifier, fanout: ReportFanout, subscriptions: Sequence[Dict],
+                           backoff: float, executor: Executor) -> Tuple[List[Dict], float]:
+    """按速率限制依次投递同一渠道的订阅者（batched 渠道整批投递），返回 (投递结果, 渠道耗时)"""
+    start = time.monotonic()
+    if notifier.batched:
+        reports = [fanout.render(subscription, notifier.report_format) for subscription in subscriptions]
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(executor, notifier.send_batch, subscriptions, reports, fanout.date)
+        except Exception as e:
+            results = [{"channel": notifier.channel, "target": subscription["target"], "success": False,
+                        "attempts": 1, "latency": time.monotonic() - start, "message": str(e), "ids": []}
+                       for subscription in subscriptions]
+        return results, time.monotonic() - start
+
+    limiter = RateLimiter(notifier.rate)
+    results = []
+    for subscription in subscriptions:
+        await limiter.wait()
+        report = fanout.render(subscription, notifier.report_format)
+        results.append(await _deliver(notifier, subscription, report, fanout.date, backoff, executor))
+    return results, time.monotonic() - start
+
+
+async def deliver_all(fanout: ReportFanout, subscriptions: Sequence[Dict], settings: Dict = None,
+                      backoff: float = None) -> Dict:
+    """
+    并发投递全部订阅者（每个渠道一个任务）
+
+    Args:
+        fanout: 报告分发器
+        subscriptions: 订阅者
+        settings: 按渠道覆盖 NOTIFY_SETTINGS，如 {"resend": {"timeout": 10}}
+        backoff: 首次重试前的等待时间（秒），默认 NOTIFY_RETRY_BACKOFF
+
+    Returns:
+        {
+            "deliveries": [{"channel", "target", "success", "attempts", "latency", "message", "ids"}, ...],
+            "channels": {"telegram": {"sent": 1, "failed": 0, "elapsed": 0.8}, ...},
+            "elapsed": 1.2,   # 全部渠道完成的总耗时（秒）
+        }
+    """
+    backoff = NOTIFY_RETRY_BACKOFF if backoff is None else backoff
+    start = time.monotonic()
+    grouped: Dict[str, List[Dict]] = {}
+    for subscription in subscriptions:
+        grouped.setdefault(subscription["channel"], []).append(subscription)
+
+    deliveries = []
+    notifiers = {}
+    # 每个渠道同一时刻只有一个请求在途；超时的请求留在线程中自行结束（不等待），
+    # 线程数留出余量，避免被挂起的请求占满后拖住其他渠道
+    executor = ThreadPoolExecutor(max_workers=4 * len(grouped) or 1, thread_name_prefix="notify")
+    try:
+        for channel, members in grouped.items():
+            if channel not in NOTIFIERS:
+                deliveries.extend({"channel": channel, "target": sub["target"], "success": False, "attempts": 0,
+                                   "latency": 0.0, "message": "不支持的通知渠道", "ids": []} for sub in members)
+                continue
+            options = {**DEFAULT_SETTINGS, **NOTIFY_SETTINGS.get(channel, {}), **(settings or {}).get(channel, {})}
+            notifiers[channel] = NOTIFIERS[channel](**options)
+
+        channels = list(notifiers)
+        outcomes = await asyncio.gather(*(
+            _deliver_channel(notifiers[channel], fanout, grouped[channel], backoff, executor) for channel in channels
+        ))
+    finally:
+        executor.shutdown(wait=False)
+        for notifier in notifiers.values():
+            notifier.close()
+
+    summary = {}
+    for channel, (results, elapsed) in zip(channels, outcomes):
+        deliveries.extend(results)
+        sent = sum(1 for r in results if r["success"])
+        summary[channel] = {"sent": sent, "failed": len(results) - sent, "elapsed": elapsed}
+    return {"deliveries": deliveries, "channels": summary, "elapsed": time.monotonic() - start}
+
+
+def notify(fanout: ReportFanout, subscriptions: Sequence[Dict], sink, settings: Dict = None) -> Dict:
+    """
+    投递全部订阅者，并记录已送达的消息和每个订阅者的投递结果
+
+    Args:
+        fanout: 报告分发器
+        subscriptions: 订阅者
+        sink: 数据库或 DBWriter
+        settings: 按渠道覆盖 NOTIFY_SETTINGS
+
+    Returns:
+        deliver_all 的结果
+    """
+    result = asyncio.run(deliver_all(fanout, subscriptions, settings))
+
+    for delivery in result["deliveries"]:
+        status = "✅" if delivery["success"] else "❌"
+        retries = f"，重试 {delivery['attempts'] - 1} 次" if delivery["attempts"] > 1 else ""
+        print(f"   {status} {delivery['channel']} {delivery['target']}: {delivery['message']} "
+              f"({delivery['latency']:.2f}s{retries})")
+        if delivery["ids"]:
+            sink.save_sent_messages(fanout.date, delivery["channel"], delivery["target"], delivery["ids"])
+    sink.save_notification_log(fanout.date, result["deliveries"])
+
+    for channel, stats in result["channels"].items():
+        print(f"   [{channel}] 成功 {stats['sent']} | 失败 {stats['failed']} | {stats['elapsed']:.2f}s")
+    return result
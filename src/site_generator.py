@@ -0,0 +1,332 @@
+"""
+Site Generator - 趋势归档静态站点
+用 HTMLReporter 把数据库中的全部快照渲染为静态页面，输出到 OUTPUT_DIR（GitHub Pages）：
+
+- index.html：快照日期列表和最新 Top 20
+- daily/<date>.html：每期快照的完整报告（与邮件相同的排版）
+- skills/index.html、skills/<slug>.html：每个技能的排名/安装量历史
+- sitemap.xml：设置 GITHUB_PAGES_URL 时生成
+
+增量生成：每个页面的输入数据算一个内容哈希，记录在 .manifest.json 中；
+再次运行时只渲染哈希变化（或文件缺失）的页面，渲染由进程池并行完成
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from src.config import GITHUB_PAGES_URL, OUTPUT_DIR
+from src.database import Database
+from src.html_reporter import HTMLReporter
+from src.sparkline import Sparklines
+
+# 页面结构或模板变化时递增，使全部页面失效
+SITE_VERSION = 3
+
+MANIFEST_NAME = ".manifest.json"
+
+# 归档页面中各分区的条数
+ARCHIVE_TOP_N = 20
+ARCHIVE_SECTION_LIMIT = 5
+
+# 每期快照附带的技能详情字段（合并进 Top 20）
+DETAIL_FIELDS = ("summary", "description", "solves", "category_zh")
+
+_UNSAFE_SLUG = re.compile(r"[^A-Za-z0-9._-]+")
+
+PageTask = Tuple[str, str, Dict]  # (页面类型, 相对路径, 渲染输入)
+
+
+def skill_slug(name: str) -> str:
+    """
+    技能名 -> 文件名（只保留安全字符；有替换时追加短哈希避免冲突）
+
+    Args:
+        name: 技能名
+
+    Returns:
+        不含扩展名的文件名
+    """
+    slug = _UNSAFE_SLUG.sub("-", name).strip("-.")
+    if slug == name:
+        return slug
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+    return f"{slug}-{digest}" if slug else digest
+
+
+def page_hash(kind: str, payload: Dict) -> str:
+    """页面输入的内容哈希（含站点版本号）"""
+    data = json.dumps([SITE_VERSION, kind, payload], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def render_page(task: Tuple[str, PageTask]) -> Tuple[str, int]:
+    """
+    工作进程：渲染一个页面并写入文件（先写临时文件再替换，中断时不留下半页）
+
+    Args:
+        task: (输出目录, (页面类型, 相对路径, 渲染输入))
+
+    Returns:
+        (相对路径, 写入字节数)
+    """
+    output_dir, (kind, path, payload) = task
+    content = _RENDERERS[kind](HTMLReporter(), payload)
+
+    target = os.path.join(output_dir, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    data = content.encode("utf-8")
+    tmp = f"{target}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, target)
+    return path, len(data)
+
+
+def _render_daily(reporter: HTMLReporter, payload: Dict) -> str:
+    nav = reporter.format_nav([
+        ("../index.html", "Archive"),
+        (payload["previous"] and f"{payload['previous']}.html", f"← {payload['previous']}"),
+        (payload["next"] and f"{payload['next']}.html", f"{payload['next']} →"),
+        ("../skills/index.html", "All skills"),
+    ])
+    return reporter.generate_archive_html(payload["trends"], payload["date"], nav)
+
+
+def _render_skill(reporter: HTMLReporter, payload: Dict) -> str:
+    nav = reporter.format_nav([("../index.html", "Archive"), ("index.html", "All skills")])
+    return reporter.generate_skill_page(payload["skill"], payload["history"], nav, "../daily/{date}.html",
+                                        payload["sparkline"])
+
+
+def _render_index(reporter: HTMLReporter, payload: Dict) -> str:
+    nav = reporter.format_nav(payload["nav"])
+    return reporter.generate_index_page(payload["subtitle"], payload["sections"], nav)
+
+
+def _render_sitemap(reporter: HTMLReporter, payload: Dict) -> str:
+    urls = "".join(f"<url><loc>{payload['base_url']}/{path}</loc></url>" for path in payload["paths"])
+    return ('<?xml version="1.0" encoding="UTF-8"?>'
+            f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>\n')
+
+
+_RENDERERS = {
+    "daily": _render_daily,
+    "skill": _render_skill,
+    "index": _render_index,
+    "sitemap": _render_sitemap,
+}
+
+
+class SiteGenerator:
+    """增量静态站点生成器"""
+
+    def __init__(self, db: Database, output_dir: str = None, base_url: str = None, workers: int = None):
+        """
+        初始化
+
+        Args:
+            db: 数据库实例
+            output_dir: 输出目录，默认 OUTPUT_DIR
+            base_url: 站点地址（生成 sitemap.xml），默认 GITHUB_PAGES_URL
+            workers: 渲染进程数，默认 CPU 核数
+        """
+        self.db = db
+        self.output_dir = output_dir or OUTPUT_DIR
+        self.base_url = (GITHUB_PAGES_URL if base_url is None else base_url).rstrip("/")
+        self.workers = workers or os.cpu_count() or 1
+        self.sparklines = Sparklines(db)
+
+    def build(self, force: bool = False) -> Dict:
+        """
+        生成站点：只渲染输入变化的页面，删除已不存在的快照/技能对应的旧页面
+
+        Args:
+            force: 忽略清单，重新渲染全部页面
+
+        Returns:
+            {"pages": 总页数, "written": 渲染的页数, "skipped": 未变化跳过的页数,
+             "removed": 删除的旧页数, "bytes": 写入字节数, "elapsed": 秒}
+        """
+        start = time.perf_counter()
+        manifest = {} if force else self._load_manifest()
+
+        pages = self.collect_pages()
+        hashes = {path: page_hash(kind, payload) for kind, path, payload in pages}
+        changed = [
+            page for page in pages
+            if manifest.get(page[1]) != hashes[page[1]] or not os.path.exists(os.path.join(self.output_dir, page[1]))
+        ]
+
+        written_bytes = 0
+        for path, size in self._render(changed):
+            manifest[path] = hashes[path]
+            written_bytes += size
+
+        removed = 0
+        for path in [p for p in manifest if p not in hashes]:
+            target = os.path.join(self.output_dir, path)
+            if os.path.exists(target):
+                os.remove(target)
+                removed += 1
+            del manifest[path]
+
+        self._save_manifest(manifest)
+        return {
+            "pages": len(pages),
+            "written": len(changed),
+            "skipped": len(pages) - len(changed),
+            "removed": removed,
+            "bytes": written_bytes,
+            "elapsed": time.perf_counter() - start,
+        }
+
+    def collect_pages(self) -> List[PageTask]:
+        """
+        从数据库读取全部快照，整理每个页面的渲染输入
+
+        Returns:
+            [(页面类型, 相对路径, 渲染输入), ...]
+        """
+        dates = self.db.get_snapshot_dates()
+        details = self.db.get_all_skill_details()
+        pages: List[PageTask] = []
+        histories: Dict[str, List[Dict]] = {}
+        latest: Dict[str, Dict] = {}
+        latest_top: List[Dict] = []
+
+        for i, date in enumerate(dates):
+            skills = self.db.get_skills_by_date(date)
+            for skill in skills:
+                histories.setdefault(skill["name"], []).append({
+                    "date": date,
+                    "rank": skill["rank"],
+                    "rank_delta": skill.get("rank_delta") or 0,
+                    "installs": skill.get("installs") or 0,
+                    "installs_delta": skill.get("installs_delta") or 0,
+                })
+                latest[skill["name"]] = skill
+
+            pages.append(("daily", f"daily/{date}.html", {
+                "date": date,
+                "previous": dates[i - 1] if i else None,
+                "next": dates[i + 1] if i + 1 < len(dates) else None,
+                "trends": self._archived_trends(date, skills, details),
+            }))
+            latest_top = skills[:ARCHIVE_TOP_N]
+
+        # 技能页的走势图截至该技能最后上榜的一期：按日期分组批量生成（与当期归档页共用缓存）
+        by_last_date: Dict[str, List[str]] = {}
+        for name, history in histories.items():
+            by_last_date.setdefault(history[-1]["date"], []).append(name)
+        sparklines = {}
+        for date, names in by_last_date.items():
+            sparklines.update(self.sparklines.get(names, date))
+
+        for name, history in histories.items():
+            skill = {**_detail_subset(details.get(name)), **latest[name]}
+            pages.append(("skill", f"skills/{skill_slug(name)}.html", {
+                "skill": skill,
+                "history": history,
+                "sparkline": sparklines.get(name, ""),
+            }))
+
+        latest_date = dates[-1] if dates else ""
+        pages.append(("index", "index.html", {
+            "subtitle": f"Archive · {len(dates)} snapshots",
+            "nav": [("skills/index.html", "All skills")],
+            "sections": [
+                (f"Top {ARCHIVE_TOP_N} ({latest_date})", [
+                    {"label": f"#{s['rank']}", "href": f"skills/{skill_slug(s['name'])}.html",
+                     "text": s["name"], "meta": f"{s.get('installs') or 0:,} installs"}
+                    for s in latest_top
+                ]),
+                ("Snapshots", [
+                    {"label": "", "href": f"daily/{d}.html", "text": d, "meta": ""}
+                    for d in reversed(dates)
+                ]),
+            ],
+        }))
+
+        # 按最近一次上榜的日期、排名排序（当前在榜的技能在前）
+        ordered = sorted(latest.values(), key=lambda s: (-_date_key(histories[s["name"]][-1]["date"]), s["rank"]))
+        pages.append(("index", "skills/index.html", {
+            "subtitle": f"All skills · {len(ordered)}",
+            "nav": [("../index.html", "Archive")],
+            "sections": [("Skills", [
+                {"label": f"#{s['rank']}", "href": f"{skill_slug(s['name'])}.html", "text": s["name"],
+                 "meta": f"{histories[s['name']][-1]['date']} · {len(histories[s['name']])} snapshots"}
+                for s in ordered
+            ])],
+        }))
+
+        if self.base_url:
+            pages.append(("sitemap", "sitemap.xml", {
+                "base_url": self.base_url,
+                "paths": [path for kind, path, _ in pages],
+            }))
+        return pages
+
+    def _archived_trends(self, date: str, skills: List[Dict], details: Dict[str, Dict]) -> Dict:
+        """用快照写入时物化的数据还原某一期的趋势报告"""
+        dropped = self.db.get_trend_section(date, "dropped")
+        for skill in dropped:
+            skill["yesterday_rank"] = skill.get("previous_rank")
+        trends = {
+            "top_20": [{**_detail_subset(details.get(s["name"])), **s} for s in skills[:ARCHIVE_TOP_N]],
+            "rising_top5": self.db.get_trend_section(date, "rising", ARCHIVE_SECTION_LIMIT),
+            "falling_top5": self.db.get_trend_section(date, "falling", ARCHIVE_SECTION_LIMIT),
+            "new_entries": self.db.get_trend_section(date, "new"),
+            "dropped_entries": dropped,
+            "surging": self.db.get_trend_section(date, "surging"),
+            "owner_leaders": self.db.get_owner_leaders(date, ARCHIVE_SECTION_LIMIT),
+            "categories": self.db.get_category_stats(date),
+        }
+        trends["sparklines"] = self.sparklines.for_trends(trends, date)
+        return trends
+
+    def _render(self, pages: List[PageTask]):
+        """渲染变化的页面（多个页面时使用进程池）"""
+        tasks = [(self.output_dir, page) for page in pages]
+        if self.workers == 1 or len(tasks) < 2:
+            yield from map(render_page, tasks)
+            return
+        chunksize = max(1, len(tasks) // (self.workers * 4))
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            yield from pool.map(render_page, tasks, chunksize=chunksize)
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.output_dir, MANIFEST_NAME)
+
+    def _load_manifest(self) -> Dict[str, str]:
+        try:
+            with open(self._manifest_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest: Dict[str, str]) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(self._manifest_path(), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=0, sort_keys=True)
+
+
+def _detail_subset(detail: Optional[Dict]) -> Dict:
+    """技能详情中归档页面需要的字段"""
+    if not detail:
+        return {}
+    return {k: detail[k] for k in DETAIL_FIELDS if detail.get(k)}
+
+
+def _date_key(date: str) -> int:
+    """YYYY-MM-DD -> 可比较的整数"""
+    return int(date.replace("-", ""))
+
+
+def build_site(db_path: str = None, output_dir: str = None, force: bool = False, workers: int = None) -> Dict:
+    """便捷函数：增量生成归档站点"""
+    with Database(db_path) as db:
+        return SiteGenerator(db, output_dir, workers=workers).build(force)
@@ -0,0 +1,169 @@
+"""
+Skill Record - 紧凑的不可变榜单记录
+用 __slots__ 代替 dict 在流水线中传递技能：
+- 每条记录没有 __dict__，owner 字符串驻留（同一 owner 只保存一份）
+- 记录不可修改，变化值通过 with_deltas 生成新记录，不会污染抓取结果
+- AI 字段不写入记录，报告时通过 overlay 合并，只在报告边界转换为 dict
+"""
+import sys
+from typing import Dict, Iterable, List, Optional
+
+# 记录字段（顺序即构造参数顺序）
+RECORD_FIELDS = ("rank", "name", "owner", "installs", "url", "rank_delta", "installs_delta", "installs_rate")
+
+# 附加到报告技能上的 AI 摘要字段
+SUMMARY_FIELDS = ("summary", "description", "use_case", "solves", "category", "category_zh")
+
+_FIELD_SET = frozenset(RECORD_FIELDS)
+
+
+class SkillRecord:
+    """
+    不可变榜单记录
+
+    支持只读的映射访问（record["name"] / record.get("url", "")），
+    因此可以直接交给按 dict 读取字段的数据库与趋势引擎代码。
+    """
+
+    __slots__ = RECORD_FIELDS
+
+    def __init__(self, rank: int, name: str, owner: str, installs: int, url: str = "",
+                 rank_delta: int = 0, installs_delta: int = 0, installs_rate: float = 0):
+        _set = object.__setattr__
+        _set(self, "rank", rank)
+        _set(self, "name", name)
+        _set(self, "owner", sys.intern(owner) if owner else owner)
+        _set(self, "installs", installs)
+        _set(self, "url", url)
+        _set(self, "rank_delta", rank_delta)
+        _set(self, "installs_delta", installs_delta)
+        _set(self, "installs_rate", installs_rate)
+
+    @classmethod
+    def from_dict(cls, skill: Dict) -> "SkillRecord":
+        """
+        从 dict 构造（缺失的变化值视为 0）
+
+        Args:
+            skill: 技能字典（需包含 rank/name/installs）
+
+        Returns:
+            SkillRecord
+        """
+        return cls(
+            skill["rank"],
+            skill["name"],
+            skill.get("owner", ""),
+            skill["installs"],
+            skill.get("url", ""),
+            skill.get("rank_delta", 0),
+            skill.get("installs_delta", 0),
+            skill.get("installs_rate", 0),
+        )
+
+    def with_deltas(self, rank_delta: int, installs_delta: int, installs_rate: float) -> "SkillRecord":
+        """返回带变化值的新记录（原记录不变）"""
+        return SkillRecord(self.rank, self.name, self.owner, self.installs, self.url,
+                           rank_delta, installs_delta, installs_rate)
+
+    def to_dict(self, overlay: Dict = None) -> Dict:
+        """
+        转换为 dict（报告边界使用）
+
+        Args:
+            overlay: 需要合并的额外字段，如 AI 摘要（见 summary_overlay）
+
+        Returns:
+            新的 dict，修改它不会影响记录
+        """
+        result = {field: getattr(self, field) for field in RECORD_FIELDS}
+        if overlay:
+            result.update(overlay)
+        return result
+
+    # ------------------------------------------------------------------
+    # 只读映射协议
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, key: str):
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in _FIELD_SET else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in _FIELD_SET
+
+    def keys(self):
+        return RECORD_FIELDS
+
+    # ------------------------------------------------------------------
+    # 不可变
+    # ------------------------------------------------------------------
+
+    def __setattr__(self, key, value):
+        raise AttributeError("SkillRecord 不可修改，请使用 with_deltas 生成新记录")
+
+    def __delattr__(self, key):
+        raise AttributeError("SkillRecord 不可修改")
+
+    def __reduce__(self):
+        return (SkillRecord, tuple(getattr(self, field) for field in RECORD_FIELDS))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, SkillRecord):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in RECORD_FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"SkillRecord(rank={self.rank!r}, name={self.name!r}, installs={self.installs!r})"
+
+
+def as_records(skills: Iterable) -> List[SkillRecord]:
+    """
+    把技能列表统一为 SkillRecord（已是记录的原样保留）
+
+    Args:
+        skills: dict 或 SkillRecord 组成的列表
+
+    Returns:
+        SkillRecord 列表
+    """
+    return [s if isinstance(s, SkillRecord) else SkillRecord.from_dict(s) for s in skills]
+
+
+def summary_overlay(detail: Optional[Dict]) -> Dict:
+    """
+    由 AI 技能详情生成报告用的覆盖字段（缺失字段取空值）
+
+    Args:
+        detail: AI 摘要 / 技能详情，可为 None
+
+    Returns:
+        {field: value}，字段见 SUMMARY_FIELDS
+    """
+    detail = detail or {}
+    return {field: detail.get(field, [] if field == "solves" else "") for field in SUMMARY_FIELDS}
+
+
+def to_report_dict(skill, overlay: Dict = None) -> Dict:
+    """
+    报告边界：把记录（或已有的 dict）转换为新的 dict 并合并 overlay
+
+    Args:
+        skill: SkillRecord 或 dict
+        overlay: 额外字段
+
+    Returns:
+        新的 dict
+    """
+    if isinstance(skill, SkillRecord):
+        return skill.to_dict(overlay)
+    result = dict(skill)
+    if overlay:
+        result.update(overlay)
+    return result
@@ -4,10 +4,11 @@ Skills Fetcher - 从 skills.sh/trending 获取技能排行榜
 """
 import re
 import asyncio
-from typing import Dict, List
+from typing import List
 from playwright.async_api import async_playwright
 
 from src.config import SKILLS_TRENDING_URL, SKILLS_BASE_URL
+from src.skill_record import SkillRecord
 
 
 class SkillsFetcher:
@@ -19,19 +20,20 @@ class SkillsFetcher:
         self.trending_url = SKILLS_TRENDING_URL
         self.timeout = timeout
 
-    def fetch(self) -> List[Dict]:
+    def fetch(self) -> List[SkillRecord]:
         """
         获取 Top 100 技能列表
 
         Returns:
+            不可变记录列表（见 SkillRecord，支持 skill["name"] / skill.get("url") 读取）:
             [
-                {
-                    "rank": 1,
-                    "name": "remotion-best-practices",
-                    "owner": "remotion-dev/skills",
-                    "installs": 5600,
-                    "url": "https://skills.sh/remotion-dev/skills/remotion-best-practices"
-                },
+                SkillRecord(
+                    rank=1,
+                    name="remotion-best-practices",
+                    owner="remotion-dev/skills",
+                    installs=5600,
+                    url="https://skills.sh/remotion-dev/skills/remotion-best-practices"
+                ),
                 ...
             ]
         """
@@ -40,7 +42,7 @@ class SkillsFetcher:
         # 运行异步方法
         return asyncio.run(self._fetch_async())
 
-    async def _fetch_async(self) -> List[Dict]:
+    async def _fetch_async(self) -> List[SkillRecord]:
         """异步获取数据 - 带重试机制"""
         max_retries = 3
         retry_delay = 5
@@ -113,7 +115,7 @@ class SkillsFetcher:
 
         raise Exception("获取失败：已达最大重试次数")
 
-    def parse_leaderboard(self, html_content: str) -> List[Dict]:
+    def parse_leaderboard(self, html_content: str) -> List[SkillRecord]:
         """
         解析排行榜 - skills.sh 页面使用文本格式
 
@@ -177,21 +179,15 @@ class SkillsFetcher:
                 installs = self._parse_installs(installs_str)
 
                 # 只保留每个技能的最高排名（第一次出现）
-                if name not in skills_dict or skills_dict[name]["rank"] > rank:
-                    skills_dict[name] = {
-                        "rank": rank,
-                        "name": name,
-                        "owner": owner,
-                        "installs": installs,
-                        "url": f"{self.base_url}/{owner}/{name}"
-                    }
+                if name not in skills_dict or skills_dict[name].rank > rank:
+                    skills_dict[name] = SkillRecord(rank, name, owner, installs, f"{self.base_url}/{owner}/{name}")
 
             if skills_dict:
                 print(f"  使用模式 {i+1} 匹配到 {len(skills_dict)} 个技能")
                 break
 
         # 按排名排序
-        skills = sorted(skills_dict.values(), key=lambda x: x["rank"])
+        skills = sorted(skills_dict.values(), key=lambda x: x.rank)
 
         return skills
 
@@ -218,7 +214,7 @@ class SkillsFetcher:
         return None, None
 
 
-def fetch_skills() -> List[Dict]:
+def fetch_skills() -> List[SkillRecord]:
     """便捷函数：获取技能列表"""
     fetcher = SkillsFetcher()
     return fetcher.fetch()
@@ -0,0 +1,168 @@
+"""
+Sparkline - 报告卡片中的内联 SVG 迷你走势图
+大多数邮件客户端默认不加载图片，走势图以内联 SVG 直接写进卡片（排名 + 安装量两条线）
+
+- 一次查询取出全部待展示技能最近 SPARKLINE_POINTS 期的历史
+- 所有技能按快照日期对齐为 [n, T] 矩阵，坐标归一化和格式化由 NumPy 一次完成
+- 结果按 (技能, 快照日期) 缓存在进程内，重复渲染和归档站点直接复用
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from src import email_templates as templates
+from src.config import SPARKLINE_CACHE_SIZE, SPARKLINE_POINTS
+from src.database import Database
+
+# 画布尺寸（px）
+WIDTH = 80
+HEIGHT = 20
+PADDING = 2
+
+# 报告中以卡片展示、需要走势图的分区
+SPARKLINE_SECTIONS = (
+    "top_20", "rising_top5", "falling_top5", "new_entries", "surging",
+    "momentum", "anomalies", "predicted_entrants",
+)
+
+# 进程内缓存：(技能, 快照日期) -> SVG（没有足够历史时为空串）
+_CACHE: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+
+def scale_rows(values: np.ndarray, higher_is_up: bool = True) -> np.ndarray:
+    """
+    每行独立归一化为 y 坐标（SVG 的 y 轴向下）
+
+    Args:
+        values: [n, T]，缺失为 NaN（每行至少一个有效值）
+        higher_is_up: 值越大越靠上（安装量）；False 时值越小越靠上（排名）
+
+    Returns:
+        [n, T] 的 y 坐标；整行相同时画在中线，缺失仍为 NaN
+    """
+    low = np.nanmin(values, axis=1, keepdims=True)
+    span = np.nanmax(values, axis=1, keepdims=True) - low
+    ratio = np.where(span > 0, (values - low) / np.where(span > 0, span, 1.0), 0.5)
+    if higher_is_up:
+        ratio = 1.0 - ratio
+    return PADDING + ratio * (HEIGHT - 2 * PADDING)
+
+
+def render_sparklines(names: Sequence[str], dates: Sequence[str],
+                      rows: Iterable[Tuple[str, str, int, int]]) -> Dict[str, str]:
+    """
+    批量生成走势图
+
+    Args:
+        names: 技能名
+        dates: 快照日期（升序，即横轴）
+        rows: [(date, name, rank, installs), ...]
+
+    Returns:
+        {name: SVG}；少于两期数据的技能为空串
+    """
+    result = {name: "" for name in names}
+    if len(dates) < 2 or not names:
+        return result
+
+    date_index = {d: i for i, d in enumerate(dates)}
+    name_index = {name: i for i, name in enumerate(names)}
+    ranks = np.full((len(names), len(dates)), np.nan)
+    installs = np.full((len(names), len(dates)), np.nan)
+    for date, name, rank, count in rows:
+        i, j = name_index.get(name), date_index.get(date)
+        if i is not None and j is not None:
+            ranks[i, j] = rank
+            installs[i, j] = count or 0
+
+    present = ~np.isnan(ranks)
+    drawable = present.sum(axis=1) >= 2
+    if not drawable.any():
+        return result
+
+    present = present[drawable]
+    xs = np.char.add(np.char.mod("%.1f", np.linspace(PADDING, WIDTH - PADDING, len(dates))), ",")
+    rank_points = np.char.add(xs, np.char.mod("%.1f", scale_rows(ranks[drawable], higher_is_up=False)))
+    installs_points = np.char.add(xs, np.char.mod("%.1f", scale_rows(installs[drawable])))
+
+    for k, i in enumerate(np.flatnonzero(drawable).tolist()):
+        mask = present[k]
+        result[names[i]] = templates.SPARKLINE.render(
+            width=WIDTH,
+            height=HEIGHT,
+            rank_points=" ".join(rank_points[k][mask]),
+            installs_points=" ".join(installs_points[k][mask]),
+        )
+    return result
+
+
+class Sparklines:
+    """按快照日期批量生成并缓存走势图"""
+
+    def __init__(self, db: Database, points: int = None):
+        """
+        初始化
+
+        Args:
+            db: 数据库实例
+            points: 走势图覆盖的快照期数，默认 SPARKLINE_POINTS
+        """
+        self.db = db
+        self.points = SPARKLINE_POINTS if points is None else points
+
+    def get(self, names: Iterable[str], date: str) -> Dict[str, str]:
+        """
+        获取一批技能截至某期快照的走势图（未缓存的技能合并为一次查询）
+
+        Args:
+            names: 技能名
+            date: 快照日期 YYYY-MM-DD（走势图的最后一个点）
+
+        Returns:
+            {name: SVG}，不含历史不足的技能
+        """
+        if not self.points:
+            return {}
+
+        result = {}
+        missing = []
+        for name in dict.fromkeys(names):
+            svg = _CACHE.get((name, date))
+            if svg is None:
+                missing.append(name)
+            else:
+                _CACHE.move_to_end((name, date))
+                result[name] = svg
+
+        if missing:
+            dates = self.db.get_recent_snapshot_dates(date, self.points)
+            rows = self.db.get_rank_history(missing, dates[0], dates[-1]) if dates else []
+            for name, svg in render_sparklines(missing, dates, rows).items():
+                _CACHE[(name, date)] = svg
+                result[name] = svg
+            while len(_CACHE) > SPARKLINE_CACHE_SIZE:
+                _CACHE.popitem(last=False)
+
+        return {name: svg for name, svg in result.items() if svg}
+
+    def for_trends(self, trends: Dict, date: str) -> Dict[str, str]:
+        """
+        为报告中所有以卡片展示的技能生成走势图
+
+        Args:
+            trends: 趋势数据
+            date: 报告日期
+
+        Returns:
+            {name: SVG}，可直接放入 trends["sparklines"]
+        """
+        names: List[str] = []
+        for section in SPARKLINE_SECTIONS:
+            names.extend(skill["name"] for skill in trends.get(section) or [])
+        return self.get(names, date)
+
+
+def clear_cache() -> None:
+    """清空进程内的走势图缓存"""
+    _CACHE.clear()
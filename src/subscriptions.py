@@ -0,0 +1,174 @@
+"""
+Subscriptions - 按订阅者分发过滤后的报告
+calculate_trends 只算一次，每个订阅者的视图（分类 / 榜单条数 / 语言）都从同一份趋势数据筛选：
+
+- 过滤条件相同的订阅者共享同一份渲染结果
+- 卡片按 (分区, 条目, 语言) 缓存，不同视图之间复用同一张卡片的 HTML
+- 邮件逐块优化，已处理过的卡片片段直接复用（见 email_optimizer.ChunkOptimizer）
+
+发送由 notifiers 模块完成（各渠道并发）
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src import email_templates as templates
+from src.config import (
+    EMAIL_MAX_BYTES,
+    EMAIL_TO,
+    NOTIFY_CHANNELS,
+    TELEGRAM_CHAT_ID,
+    TELEGRAM_MESSAGE_THREAD_ID,
+    WEBHOOK_URLS,
+)
+from src.email_optimizer import ChunkOptimizer
+from src.html_reporter import DEFAULT_TOP_N, LANGUAGES, HTMLReporter
+from src.trend_export import build_summary
+
+# 通知渠道 -> 报告格式（telegram: 分页消息；email: 优化后的 HTML；summary: JSON 摘要）
+REPORT_FORMATS = {"telegram": "telegram", "resend": "email", "webhook": "summary"}
+
+# 支持的通知渠道
+CHANNELS = tuple(REPORT_FORMATS)
+
+# 按分类过滤的技能分区（owner 聚合不区分分类，始终保留）
+SKILL_SECTIONS = (
+    "top_20", "rising_top5", "falling_top5", "new_entries", "dropped_entries",
+    "surging", "momentum", "anomalies", "predicted_entrants",
+)
+
+
+def make_subscription(channel: str, target: str, categories: Sequence[str] = (), top_n: int = DEFAULT_TOP_N,
+                      language: str = "en", thread_id: Optional[int] = None) -> Dict:
+    """
+    构造订阅者（字段与 Database.get_subscriptions 的结果相同）
+
+    Args:
+        channel: 通知渠道（telegram / resend / webhook）
+        target: Telegram 会话 ID、收件邮箱或 Webhook 地址
+        categories: 只接收这些分类的技能，为空表示全部
+        top_n: 榜单条数
+        language: 报告语言（en / zh）
+        thread_id: Telegram 话题群 thread id
+
+    Returns:
+        订阅者 dict
+    """
+    return {
+        "channel": channel, "target": str(target), "thread_id": thread_id,
+        "categories": sorted(set(categories)), "top_n": top_n, "language": language, "active": True,
+    }
+
+
+def default_subscriptions() -> List[Dict]:
+    """数据库中没有订阅者时，沿用 NOTIFY_CHANNEL 中各渠道配置的接收者"""
+    subscriptions = []
+    for channel in NOTIFY_CHANNELS:
+        if channel == "telegram":
+            thread_id = int(TELEGRAM_MESSAGE_THREAD_ID) if TELEGRAM_MESSAGE_THREAD_ID else None
+            subscriptions.append(make_subscription("telegram", TELEGRAM_CHAT_ID, thread_id=thread_id))
+        elif channel == "resend":
+            subscriptions.append(make_subscription("resend", EMAIL_TO))
+        elif channel == "webhook":
+            subscriptions.extend(make_subscription("webhook", url) for url in WEBHOOK_URLS)
+    return subscriptions
+
+
+def view_key(subscription: Dict, fmt: str = None) -> Tuple:
+    """决定渲染结果的订阅条件（相同的订阅者共享同一份报告）"""
+    return (fmt or REPORT_FORMATS[subscription["channel"]], tuple(sorted(subscription.get("categories") or ())),
+            subscription.get("top_n") or DEFAULT_TOP_N, subscription.get("language") or "en")
+
+
+def filter_trends(trends: Dict, categories: Sequence[str] = (), top_n: int = DEFAULT_TOP_N) -> Dict:
+    """
+    从共享的趋势数据中筛选订阅者的视图（条目对象本身不复制，卡片缓存按对象复用）
+
+    Args:
+        trends: calculate_trends 的结果（不会被修改）
+        categories: 只保留这些分类的技能和分类概览，为空表示全部；没有分类信息的技能不会出现在过滤视图中
+        top_n: 榜单条数
+
+    Returns:
+        视图数据
+    """
+    view = dict(trends)
+    view["top_n"] = top_n
+    if categories:
+        wanted = set(categories)
+        for section in SKILL_SECTIONS:
+            view[section] = [skill for skill in trends.get(section) or [] if skill.get("category") in wanted]
+        view["categories"] = [c for c in trends.get("categories") or [] if c.get("category") in wanted]
+    return view
+
+
+class ReportFanout:
+    """同一份趋势数据按订阅者渲染，共享卡片和优化结果"""
+
+    def __init__(self, trends: Dict, date: str, max_bytes: int = None, skills_count: int = None):
+        """
+        初始化
+
+        Args:
+            trends: calculate_trends 的结果（附带 categories / sparklines）
+            date: 报告日期
+            max_bytes: 邮件字节预算，默认 EMAIL_MAX_BYTES
+            skills_count: 快照中的技能数（写入 JSON 摘要）
+        """
+        self.trends = trends
+        self.date = date
+        self.skills_count = skills_count
+        self.max_bytes = EMAIL_MAX_BYTES if max_bytes is None else max_bytes
+        self.card_cache: Dict = {}
+        self.optimizer = ChunkOptimizer(templates.EMAIL_STYLE)
+        self.reporters = {language: HTMLReporter(language, self.card_cache, self.optimizer) for language in LANGUAGES}
+        self._views: Dict[Tuple, Dict] = {}
+
+    def render(self, subscription: Dict, fmt: str = None) -> Dict:
+        """
+        渲染订阅者的报告
+
+        Args:
+            subscription: 订阅者
+            fmt: 报告格式（telegram / email / summary），默认按渠道取 REPORT_FORMATS
+
+        Returns:
+            telegram: {"messages": [...]}
+            email: HTMLReporter.generate_email 的结果（html / bytes / degraded ...）
+            summary: {"payload": {...}}（Webhook 请求体）
+        """
+        if fmt is None and subscription["channel"] not in REPORT_FORMATS:
+            raise ValueError(f"不支持的通知渠道: {subscription['channel']} (仅支持 {'/'.join(CHANNELS)})")
+        key = view_key(subscription, fmt)
+        report = self._views.get(key)
+        if report is None:
+            fmt, categories, top_n, language = key
+            reporter = self.reporters[language]
+            view = filter_trends(self.trends, categories, top_n)
+            if fmt == "telegram":
+                report = {"messages": reporter.generate_telegram_messages(view, self.date)}
+            elif fmt == "email":
+                report = reporter.generate_email(view, self.date, self.max_bytes)
+            elif fmt == "summary":
+                report = {"payload": {"event": "skills_trending.report", "date": self.date,
+                                      "summary": build_summary(view, self.date, self.skills_count, {})}}
+            else:
+                raise ValueError(f"不支持的报告格式: {fmt}")
+            self._views[key] = report
+        return report
+
+    def render_all(self, subscriptions: Sequence[Dict]) -> List[Tuple[Dict, Dict]]:
+        """渲染全部订阅者，返回 [(订阅者, 报告), ...]"""
+        return [(subscription, self.render(subscription)) for subscription in subscriptions]
+
+    def stats(self) -> Dict:
+        """
+        缓存统计
+
+        Returns:
+            {"views": 不同视图数, "cards": 已渲染卡片数, "chunk_hits": ..., "chunk_misses": ...}
+        """
+        return {
+            "views": len(self._views),
+            "cards": len(self.card_cache),
+            "chunk_hits": self.optimizer.hits,
+            "chunk_misses": self.optimizer.misses,
+        }
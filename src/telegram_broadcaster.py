@@ -0,0 +1,217 @@
+"""
+Telegram Broadcaster - 按 Bot API 限速向多个会话群发消息
+
+Bot API 的限制：全局约每秒 30 条，同一私聊每秒 1 条，同一群组每分钟 20 条。超出时返回 429，
+并在 parameters.retry_after 中给出需要等待的秒数。
+
+- 全局和每个会话各用一个令牌桶限速，按「最早可发送」的顺序在会话之间交错发送，
+  某个会话等待令牌时不阻塞其他会话
+- 同一会话的多条消息（分页报告）按顺序发送，话题群的不同 thread 共享所在群组的限额
+- 429 按 retry_after 推迟该会话，5xx / 网络错误按退避重试，其他错误（如被拉黑）放弃该会话的剩余消息
+- 所有请求通过同一个 keep-alive 连接依次发出，除令牌桶外不做额外等待
+"""
+import heapq
+import time
+from collections import deque
+from typing import Callable, Dict, List, Sequence
+
+from src.config import TELEGRAM_CHAT_RATE, TELEGRAM_GLOBAL_RATE, TELEGRAM_GROUP_PER_MINUTE
+from src.telegram_sender import TelegramSender
+
+
+class TokenBucket:
+    """令牌桶：每秒补充 rate 个令牌，最多积累 capacity 个"""
+
+    def __init__(self, rate: float, capacity: float = 1.0, now: float = 0.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def available_at(self, now: float) -> float:
+        """下一个令牌可用的时刻（已有令牌时为 now）"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return now
+        return now + (1 - self.tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        """取走一个令牌（调用方已等到 available_at）"""
+        self._refill(now)
+        self.tokens -= 1
+
+
+def is_group_chat(chat_id: str) -> bool:
+    """群组 / 频道的 chat_id 为负数（或 @username 形式的公开频道）"""
+    chat_id = str(chat_id)
+    return chat_id.startswith("-") or chat_id.startswith("@")
+
+
+class TelegramBroadcaster:
+    """限速群发器"""
+
+    def __init__(
+        self,
+        bot_token: str,
+        api_base: str = None,
+        timeout: int = 30,
+        global_rate: float = TELEGRAM_GLOBAL_RATE,
+        chat_rate: float = TELEGRAM_CHAT_RATE,
+        group_per_minute: float = TELEGRAM_GROUP_PER_MINUTE,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        初始化
+
+        Args:
+            bot_token: Bot token
+            api_base: Bot API 地址，默认 TELEGRAM_API_BASE
+            timeout: 单次请求超时（秒）
+            global_rate: 全局每秒消息数
+            chat_rate: 每个私聊每秒消息数
+            group_per_minute: 每个群组每分钟消息数
+            max_retries: 单条消息遇到 429 / 5xx / 网络错误时的最多重试次数
+            backoff: 5xx / 网络错误首次重试前的等待时间（秒），之后每次翻倍
+            clock / sleep: 时钟和等待函数
+        """
+        # interval=0：限速完全由令牌桶负责
+        self.sender = TelegramSender(bot_token, timeout=timeout, interval=0, api_base=api_base)
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.group_rate = group_per_minute / 60.0
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.clock = clock
+        self.sleep = sleep
+
+    def broadcast(self, jobs: Sequence[Dict], parse_mode: str = "HTML",
+                  disable_web_page_preview: bool = True) -> Dict:
+        """
+        群发
+
+        Args:
+            jobs: [{"chat_id": ..., "texts": [...], "thread_id": 可选}, ...]，
+                  每个 job 的消息按顺序送达（前一条送达后才发送下一条）
+            parse_mode: 解析模式
+            disable_web_page_preview: 是否关闭链接预览
+
+        Returns:
+            {
+                "results": [{"chat_id", "thread_id", "success", "ids", "message", "retries", "latency"}, ...],  # 与 jobs 顺序一致
+                "sent": 90,            # 已送达的消息数
+                "failed": 1,           # 未全部送达的会话数
+                "requests": 96,        # 实际发出的请求数
+                "throttled": 4,        # 收到 429 的次数
+                "elapsed": 3.1,        # 秒
+                "throughput": 29.0,    # 每秒送达的消息数
+            }
+        """
+        start = self.clock()
+        global_bucket = TokenBucket(self.global_rate, max(1.0, self.global_rate), start)
+        chat_buckets: Dict[str, TokenBucket] = {}
+        queues: List[deque] = []
+        results: List[Dict] = []
+        # (可发送时刻, 序号, job 下标)；同一时刻按 jobs 顺序
+        heap = []
+        for index, job in enumerate(jobs):
+            chat_id = str(job["chat_id"])
+            if chat_id not in chat_buckets:
+                rate = self.group_rate if is_group_chat(chat_id) else self.chat_rate
+                chat_buckets[chat_id] = TokenBucket(rate, 1.0, start)
+            queues.append(deque(job["texts"]))
+            results.append({"chat_id": chat_id, "thread_id": job.get("thread_id"), "success": True,
+                            "ids": [], "message": "", "retries": 0, "latency": 0.0})
+            if queues[index]:
+                heap.append((start, index, index))
+        heapq.heapify(heap)
+
+        requests = throttled = 0
+        sequence = len(jobs)
+        attempts = [0] * len(jobs)
+        while heap:
+            ready, _, index = heapq.heappop(heap)
+            result = results[index]
+            bucket = chat_buckets[result["chat_id"]]
+            now = self.clock()
+            # 该会话的令牌还没补上：按实际可用时刻放回，先发其他会话
+            available = max(ready, bucket.available_at(now))
+            if available > now and heap and heap[0][0] < available:
+                sequence += 1
+                heapq.heappush(heap, (available, sequence, index))
+                continue
+
+            now = self._wait_until(max(available, global_bucket.available_at(now)))
+            global_bucket.consume(now)
+            bucket.consume(now)
+
+            response = self.sender.send_message(
+                chat_id=result["chat_id"],
+                text=queues[index][0],
+                parse_mode=parse_mode,
+                disable_web_page_preview=disable_web_page_preview,
+                message_thread_id=result["thread_id"],
+            )
+            requests += 1
+            now = self.clock()
+
+            if response.get("success"):
+                queues[index].popleft()
+                result["ids"].append(response.get("id"))
+                attempts[index] = 0
+                if queues[index]:
+                    sequence += 1
+                    heapq.heappush(heap, (bucket.available_at(now), sequence, index))
+                else:
+                    result["latency"] = now - start
+                continue
+
+            error_code = response.get("error_code")
+            if error_code == 429:
+                throttled += 1
+            retryable = error_code == 429 or error_code is None or error_code >= 500
+            attempts[index] += 1
+            if not retryable or attempts[index] > self.max_retries:
+                result["success"] = False
+                result["message"] = f"part {len(result['ids']) + 1}: {response.get('message')}"
+                queues[index].clear()
+                result["latency"] = now - start
+                continue
+            result["retries"] += 1
+            delay = response.get("retry_after") or self.backoff * 2 ** (attempts[index] - 1)
+            sequence += 1
+            heapq.heappush(heap, (now + delay, sequence, index))
+
+        elapsed = self.clock() - start
+        sent = sum(len(r["ids"]) for r in results)
+        for r in results:
+            if r["success"]:
+                r["message"] = f"sent {len(r['ids'])}"
+        return {
+            "results": results,
+            "sent": sent,
+            "failed": sum(1 for r in results if not r["success"]),
+            "requests": requests,
+            "throttled": throttled,
+            "elapsed": elapsed,
+            "throughput": sent / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def close(self) -> None:
+        """关闭复用的连接"""
+        self.sender.close()
+
+    def _wait_until(self, moment: float) -> float:
+        """等待到 moment，返回当前时刻"""
+        now = self.clock()
+        if moment > now:
+            self.sleep(moment - now)
+            now = self.clock()
+        return now
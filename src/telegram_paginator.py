@@ -0,0 +1,188 @@
+"""
+Telegram Paginator - 把 HTML parse_mode 文本拆成多条消息
+优先在分区（空行）边界拆分，其次在行边界，单行过长时才按字符切开；
+跨页未闭合的标签在页尾补齐闭合、在下一页开头重新打开，保证每条消息的 HTML 合法
+"""
+import re
+from typing import List, Tuple
+
+from src.config import TELEGRAM_MESSAGE_LIMIT
+
+# 页码标记（多页时追加在每页末尾）预留的长度
+PAGE_MARKER_RESERVE = 16
+
+# 分区被拆到下一页时，在续页开头重复分区标题并加上该后缀
+CONTINUED_SUFFIX = " (cont.)"
+
+_TAG = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9-]*)[^>]*>")
+# 切分单元：标签、实体或单个字符（不会在标签/实体内部切开）
+_TOKEN = re.compile(r"<[^>]*>|&[#a-zA-Z0-9]+;|.", re.S)
+
+OpenTags = List[Tuple[str, str]]  # [(标签名, 原始开始标签), ...]
+
+
+def message_length(text: str) -> int:
+    """Telegram 按 UTF-16 码元计算长度（emoji 等占 2 个）"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def scan_tags(open_tags: OpenTags, text: str) -> OpenTags:
+    """
+    在已打开的标签基础上扫描一段文本，返回扫描后仍未闭合的标签
+
+    Args:
+        open_tags: 扫描前未闭合的标签
+        text: HTML 片段
+
+    Returns:
+        新的未闭合标签列表（不修改入参）
+    """
+    stack = list(open_tags)
+    for match in _TAG.finditer(text):
+        closing, name = match.group(1), match.group(2).lower()
+        if not closing:
+            stack.append((name, match.group(0)))
+            continue
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i][0] == name:
+                del stack[i:]
+                break
+    return stack
+
+
+def close_tags(open_tags: OpenTags) -> str:
+    """按打开的逆序生成闭合标签"""
+    return "".join(f"</{name}>" for name, _ in reversed(open_tags))
+
+
+def reopen_tags(open_tags: OpenTags) -> str:
+    """按原顺序重新打开标签"""
+    return "".join(tag for _, tag in open_tags)
+
+
+class TelegramPaginator:
+    """按分区/行边界把文本装入不超过长度上限的页"""
+
+    def __init__(self, limit: int = None):
+        """
+        初始化
+
+        Args:
+            limit: 单条消息长度上限（UTF-16 码元），默认 TELEGRAM_MESSAGE_LIMIT
+        """
+        self.limit = limit or TELEGRAM_MESSAGE_LIMIT
+        self.budget = self.limit - PAGE_MARKER_RESERVE
+        self.pages: List[str] = []
+        self.lines: List[str] = []
+        self.size = 0
+        self.open: OpenTags = []
+
+    # ------------------------------------------------------------------
+
+    def add_section(self, section: str) -> None:
+        """
+        追加一个分区（第一行视为标题）；整体放得下时不拆开
+
+        Args:
+            section: 分区文本（多行）
+        """
+        lines = section.split("\n")
+        block = ([""] if self.lines else []) + lines
+        if self._fits(block):
+            self._extend(block)
+            return
+        if self.lines:
+            self._break()
+            if self._fits(lines):
+                self._extend(lines)
+                return
+
+        # 单页放不下：逐行装入，续页重复标题
+        header = lines[0] if len(lines) > 1 else None
+        for i, line in enumerate(lines):
+            if self._fits([line]):
+                self._extend([line])
+                continue
+            if self.lines:
+                self._break()
+                if header is not None and i > 0 and self._fits([header + CONTINUED_SUFFIX, line]):
+                    self._extend([header + CONTINUED_SUFFIX, line])
+                    continue
+                if self._fits([line]):
+                    self._extend([line])
+                    continue
+            self._add_long_line(line)
+
+    def finish(self) -> List[str]:
+        """
+        结束分页
+
+        Returns:
+            消息列表；多于一页时每页末尾追加页码
+        """
+        if self.lines:
+            self._break()
+        pages, self.pages = self.pages, []
+        if len(pages) > 1:
+            pages = [f"{page}\n<i>{i}/{len(pages)}</i>" for i, page in enumerate(pages, 1)]
+        return pages
+
+    # ------------------------------------------------------------------
+
+    def _prefix(self) -> str:
+        """新页第一行前需要重新打开的标签"""
+        return "" if self.lines else reopen_tags(self.open)
+
+    def _cost(self, lines: List[str]) -> Tuple[int, OpenTags]:
+        """追加 lines 后的页长度（含补齐的闭合标签）和未闭合标签"""
+        text = "\n".join(lines)
+        open_tags = scan_tags(self.open, text)
+        size = self.size + (1 if self.lines else 0) + message_length(self._prefix() + text)
+        return size + message_length(close_tags(open_tags)), open_tags
+
+    def _fits(self, lines: List[str]) -> bool:
+        return self._cost(lines)[0] <= self.budget
+
+    def _extend(self, lines: List[str]) -> None:
+        # 重新打开的前缀标签已在 self.open 中，只扫描新增内容
+        text = "\n".join(lines)
+        self.open, text = scan_tags(self.open, text), self._prefix() + text
+        self.size += (1 if self.lines else 0) + message_length(text)
+        self.lines.append(text)
+
+    def _break(self) -> None:
+        """结束当前页：补齐闭合标签，未闭合的标签留待下一页重新打开"""
+        self.pages.append("\n".join(self.lines) + close_tags(self.open))
+        self.lines = []
+        self.size = 0
+
+    def _add_long_line(self, line: str) -> None:
+        """单行超过整页上限：按标签/实体/字符切开，每段单独成页"""
+        chunk = ""
+        for token in _TOKEN.findall(line):
+            if chunk and not self._fits([chunk + token]):
+                self._extend([chunk])
+                self._break()
+                chunk = ""
+            chunk += token
+        if chunk:
+            self._extend([chunk])
+
+
+def paginate_html(text: str, limit: int = None) -> List[str]:
+    """
+    把 Telegram HTML 文本拆成多条消息
+
+    Args:
+        text: 完整文本，分区之间用空行分隔
+        limit: 单条消息长度上限，默认 TELEGRAM_MESSAGE_LIMIT
+
+    Returns:
+        按顺序排列的消息列表（空文本返回空列表）
+    """
+    paginator = TelegramPaginator(limit)
+    for section in re.split(r"\n\s*\n", text.strip()):
+        if section.strip():
+            paginator.add_section(section)
+    return paginator.finish()
+
@@ -1,19 +1,28 @@
 """
 Telegram Sender - 通过 Telegram Bot 发送消息
 
-使用 Bot API: https://api.telegram.org/bot<token>/sendMessage
+使用 Bot API: https://api.telegram.org/bot<token>/sendMessage（地址可用 TELEGRAM_API_BASE 覆盖）
 """
 
-from typing import Dict, Optional
+import time
+from typing import Dict, List, Optional
 import requests
 
+from src.config import TELEGRAM_API_BASE, TELEGRAM_SEND_INTERVAL
+
 
 class TelegramSender:
     """Telegram Bot 发送器"""
 
-    def __init__(self, bot_token: str, timeout: int = 30):
+    def __init__(self, bot_token: str, timeout: int = 30, interval: float = None, api_base: str = None):
         self.bot_token = bot_token
         self.timeout = timeout
+        self.api_base = (api_base or TELEGRAM_API_BASE).rstrip("/")
+        # 同一会话连续发送的最小间隔（秒）
+        self.interval = TELEGRAM_SEND_INTERVAL if interval is None else interval
+        # 复用连接（keep-alive），多条消息只建立一次 TLS 连接
+        self.session = requests.Session()
+        self._last_sent = 0.0
 
     def send_message(
         self,
@@ -23,12 +32,21 @@ class TelegramSender:
         disable_web_page_preview: bool = True,
         message_thread_id: Optional[int] = None,
     ) -> Dict:
+        """
+        发送一条消息
+
+        Returns:
+            {"success": bool, "message": str, "id": message_id}；
+            失败时另有 "error_code"（Bot API 错误码或 HTTP 状态码，网络错误为 None）和
+            "retry_after"（429 时 Bot API 要求等待的秒数）
+        """
+        # 配置缺失时按 Bot API 对应的错误码返回（401 / 400），调用方不会当作可重试的网络错误
         if not self.bot_token:
-            return {"success": False, "message": "TELEGRAM_BOT_TOKEN is empty", "id": None}
+            return {"success": False, "message": "TELEGRAM_BOT_TOKEN is empty", "id": None, "error_code": 401}
         if not chat_id:
-            return {"success": False, "message": "TELEGRAM_CHAT_ID is empty", "id": None}
+            return {"success": False, "message": "TELEGRAM_CHAT_ID is empty", "id": None, "error_code": 400}
 
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+        url = f"{self.api_base}/bot{self.bot_token}/sendMessage"
         payload = {
             "chat_id": chat_id,
             "text": text,
@@ -39,12 +57,88 @@ class TelegramSender:
             payload["message_thread_id"] = message_thread_id
 
         try:
-            resp = requests.post(url, json=payload, timeout=self.timeout)
-            resp.raise_for_status()
-            data = resp.json()
-            if not data.get("ok"):
-                return {"success": False, "message": str(data), "id": None, "response": data}
-            message_id = (data.get("result") or {}).get("message_id")
-            return {"success": True, "message": "sent", "id": message_id, "response": data}
+            resp = self.session.post(url, json=payload, timeout=self.timeout)
         except Exception as e:
-            return {"success": False, "message": str(e), "id": None}
+            return {"success": False, "message": str(e), "id": None, "error_code": None, "retry_after": None}
+
+        # 出错时 Bot API 同样返回 JSON（error_code / description / parameters.retry_after）
+        try:
+            data = resp.json()
+        except ValueError:
+            data = {"ok": False, "error_code": resp.status_code, "description": f"HTTP {resp.status_code}"}
+        if not resp.ok or not data.get("ok"):
+            return {
+                "success": False,
+                "message": data.get("description") or str(data),
+                "id": None,
+                "error_code": data.get("error_code", resp.status_code),
+                "retry_after": (data.get("parameters") or {}).get("retry_after"),
+                "response": data,
+            }
+        message_id = (data.get("result") or {}).get("message_id")
+        return {"success": True, "message": "sent", "id": message_id, "response": data}
+
+    def send_messages(
+        self,
+        chat_id: str,
+        texts: List[str],
+        parse_mode: str = "HTML",
+        disable_web_page_preview: bool = True,
+        message_thread_id: Optional[int] = None,
+    ) -> Dict:
+        """
+        按顺序发送多条消息（同一连接，相邻两条之间至少间隔 interval 秒）
+
+        某一条失败时停止发送后续消息，避免读者收到缺页的报告
+
+        Args:
+            chat_id: 会话 ID
+            texts: 消息列表（通常来自 HTMLReporter.generate_telegram_messages）
+            parse_mode: 解析模式
+            disable_web_page_preview: 是否关闭链接预览
+            message_thread_id: 话题群 thread id
+
+        Returns:
+            {
+                "success": True,         # 全部发送成功
+                "message": "sent 3/3",
+                "ids": [101, 102, 103],  # 已送达消息的 message_id（按顺序）
+                "sent": 3,
+                "total": 3,
+            }
+            失败时另有 "retry_after"（被 429 限流时 Bot API 要求等待的秒数）
+        """
+        ids = []
+        for text in texts:
+            self._wait_interval()
+            result = self.send_message(
+                chat_id=chat_id,
+                text=text,
+                parse_mode=parse_mode,
+                disable_web_page_preview=disable_web_page_preview,
+                message_thread_id=message_thread_id,
+            )
+            self._last_sent = time.monotonic()
+            if not result.get("success"):
+                return {
+                    "success": False,
+                    "message": f"part {len(ids) + 1}/{len(texts)}: {result.get('message')}",
+                    "ids": ids,
+                    "sent": len(ids),
+                    "total": len(texts),
+                    "retry_after": result.get("retry_after"),
+                }
+            ids.append(result.get("id"))
+
+        return {"success": True, "message": f"sent {len(ids)}/{len(texts)}", "ids": ids,
+                "sent": len(ids), "total": len(texts)}
+
+    def close(self) -> None:
+        """关闭复用的连接"""
+        self.session.close()
+
+    def _wait_interval(self) -> None:
+        """距上一条发送不足 interval 秒时等待"""
+        remaining = self._last_sent + self.interval - time.monotonic()
+        if self._last_sent and remaining > 0:
+            time.sleep(remaining)
@@ -2,273 +2,471 @@
 Trend Analyzer - 趋势计算引擎
 计算技能的排名变化、安装量变化、新晋/掉榜等趋势
 """
-from typing import Dict, List
+import heapq
 from datetime import datetime, timedelta
-
-from src.database import Database
-from src.config import SURGE_THRESHOLD
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.database import DIFF_STATUSES, Database, TREND_SECTIONS
+from src.db_writer import DBWriter
+from src.trend_engine import TrendEngine, aggregate_owners, delta_records
+from src.config import (
+    SURGE_THRESHOLD,
+    SURGE_MODE,
+    SURGE_PERCENTILE,
+    SURGE_WINDOW_DAYS,
+    SURGE_MIN_SAMPLES,
+    ANOMALY_Z_THRESHOLD,
+    ANOMALY_MIN_OBSERVATIONS,
+    TREND_SECTION_LIMITS,
+    TREND_STORE_LIMIT,
+)
+from src.quantile_sketch import TDigest
+from src.momentum import update_skill_stats
+from src.forecast import Forecaster
+from src.skill_record import SkillRecord, as_records, summary_overlay, to_report_dict
 
 
 class TrendAnalyzer:
     """趋势计算引擎"""
 
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, writer: DBWriter = None):
         """
         初始化
 
         Args:
-            db: 数据库实例
+            db: 数据库实例（读）
+            writer: 可选的后台写入线程；提供时快照写入经其入队，否则直接写 db
         """
         self.db = db
+        self.writer = writer
 
-    def calculate_trends(self, today_data: List[Dict], date: str, ai_summaries: Dict = None) -> Dict:
+    def calculate_trends(self, today_data: List[Dict], date: str, ai_summaries: Dict = None,
+                         lookback_days: int = None) -> Dict:
         """
         计算今日趋势
 
         Args:
-            today_data: 今日技能列表
+            today_data: 今日技能列表（SkillRecord 或 dict，不会被修改）
             date: 今日日期 YYYY-MM-DD
             ai_summaries: AI 分析的技能详情 {name: detail}
+            lookback_days: 对比窗口天数；为空时与上一期快照对比
 
         Returns:
             {
                 "date": "2026-01-23",
-                "top_20": [...],           # Top 20 (带 AI 总结)
-                "rising_top5": [...],      # 上升幅度 Top 5
-                "falling_top5": [...],     # 下降幅度 Top 5
+                "previous_date": "2026-01-20",  # 对比的快照日期（无则为 None）
+                "top_20": [...],           # Top N (带 AI 总结，条数见 TREND_SECTION_LIMITS)
+                "rising_top5": [...],      # 上升幅度 Top N
+                "falling_top5": [...],     # 下降幅度 Top N
                 "new_entries": [...],      # 新晋榜单
                 "dropped_entries": [...],  # 跌出榜单
-                "surging": []              # 安装量暴涨 (>30%)
+                "surge_threshold": 0.3,    # 本期使用的暴涨阈值（固定值或历史分位数）
+                "surging": [],             # 安装量暴涨 (>= surge_threshold)
+                "momentum": [...],         # 7 天动量 Top N（EWMA，见 momentum.py）
+                "anomalies": [...],        # 增长率偏离自身基线的技能（|z| >= 阈值）
+                "owner_leaders": [...],    # 安装量增长最多的 owner（见 aggregate_owners）
+                "predicted_entrants": [...]  # 预计下一次运行进入 Top N 的技能（见 forecast.py）
             }
         """
-        # 获取昨日数据
-        yesterday_data = self.db.get_yesterday_data(date)
+        # 获取上一期快照（工作流每 3 天运行一次，不能假定昨天有数据）
+        previous_date, yesterday_data = self.db.get_previous_snapshot_data(date, lookback_days)
 
         # 构建昨日数据的映射
         yesterday_map = {s["name"]: s for s in yesterday_data} if yesterday_data else {}
 
-        # 计算变化
-        today_with_delta = self._calculate_deltas(today_data, yesterday_map)
+        # 计算变化（生成新的不可变记录，不修改传入的榜单）
+        today_with_delta = self._calculate_deltas(as_records(today_data), yesterday_data)
+
+        # 增量更新统计状态、单次遍历完成全部分区、owner 聚合
+        state = self.db.get_skill_stats([s["name"] for s in today_with_delta])
+        surge_threshold = self._resolve_surge_threshold(date)
+        scored = self.score_snapshot(date, today_with_delta, yesterday_map, state, surge_threshold)
+        sections = scored["sections"]
 
-        # 保存今日数据（包含变化值）
-        self.db.save_today_data(date, today_with_delta)
+        # 保存今日数据（包含变化值）、物化趋势和统计状态
+        (self.writer or self.db).save_today_data(date, today_with_delta, **self.snapshot_writes(scored))
 
-        # 获取 AI 摘要
+        # 预测下一次运行进入 Top N 的技能（历史取自数据库，当天以本期榜单为准）
+        sections["predicted_entrants"] = Forecaster(self.db).predicted_entrants(today_with_delta, date)
+
+        # 报告边界：截断各分区，转换为 dict 并叠加 AI 摘要
         if ai_summaries is None:
             ai_summaries = self.db.get_all_skill_details()
+        report = {
+            section: self._to_report(skills[:TREND_SECTION_LIMITS.get(section) or None], ai_summaries)
+            for section, skills in sections.items()
+            if section != "owner_leaders"
+        }
 
-        # 找出各种趋势
         results = {
             "date": date,
-            "top_20": self._get_top_20_with_summary(today_with_delta, ai_summaries),
-            "rising_top5": self._get_top_movers(today_with_delta, direction="up", limit=5, ai_summaries=ai_summaries),
-            "falling_top5": self._get_top_movers(today_with_delta, direction="down", limit=5, ai_summaries=ai_summaries),
-            "new_entries": self._find_new_entries(today_with_delta, yesterday_map, ai_summaries),
-            "dropped_entries": self._find_dropped_entries(today_with_delta, yesterday_map, ai_summaries),
-            "surging": self._find_surging_skills(today_with_delta, ai_summaries)
+            "previous_date": previous_date,
+            "top_20": report["top"],
+            "rising_top5": report["rising"],
+            "falling_top5": report["falling"],
+            "new_entries": report["new"],
+            "dropped_entries": report["dropped"],
+            "surge_threshold": scored["surge_threshold"],
+            "surging": report["surging"],
+            "momentum": report["momentum"],
+            "anomalies": report["anomalies"],
+            "owner_leaders": sections["owner_leaders"],
+            "predicted_entrants": report["predicted_entrants"],
         }
 
         return results
 
-    def _calculate_deltas(self, today: List[Dict], yesterday_map: Dict[str, Dict]) -> List[Dict]:
+    def score_snapshot(self, date: str, today_with_delta: List[SkillRecord], yesterday_map: Dict[str, Dict],
+                       state: Dict[str, Dict], surge_threshold: float) -> Dict:
         """
-        计算排名和安装量变化
+        由已计算变化值的快照得到统计状态、趋势分区和 owner 聚合（不读写数据库）
 
         Args:
-            today: 今日技能列表
-            yesterday_map: 昨日技能映射 {name: skill}
+            date: 快照日期 YYYY-MM-DD
+            today_with_delta: 带变化值的技能记录
+            yesterday_map: 对比快照的技能映射
+            state: 更新前的统计状态 {name: row}
+            surge_threshold: 暴涨阈值
 
         Returns:
-            包含变化值的技能列表
+            {
+                "sections": {...},   # 见 _classify，另含 owner_leaders
+                "stats": [...],      # 更新后的统计状态（与 today_with_delta 顺序一致）
+                "owners": [...],     # owner 聚合
+                "rate_sketch": TDigest,  # 本期 installs_rate 分布
+                "surge_threshold": 0.3,
+            }
         """
-        for skill in today:
-            name = skill["name"]
+        # 增量更新每个技能的 EWMA / 动量 / z-score 基线
+        stats = update_skill_stats(today_with_delta, date, state, ANOMALY_MIN_OBSERVATIONS)
+
+        # 单次遍历完成全部分区
+        sections, rates = self._classify(today_with_delta, yesterday_map, stats, surge_threshold)
+
+        # owner 级聚合（分组向量运算）
+        owners = aggregate_owners(today_with_delta, stats)
+        sections["owner_leaders"] = self._owner_leaders(owners)
+
+        return {
+            "sections": sections,
+            "stats": stats,
+            "owners": owners,
+            "rate_sketch": TDigest().update(rates),
+            "surge_threshold": surge_threshold,
+        }
 
-            if name in yesterday_map:
-                yesterday_skill = yesterday_map[name]
+    @staticmethod
+    def snapshot_writes(scored: Dict) -> Dict:
+        """
+        score_snapshot 结果中需要与快照同一事务写入的部分
 
-                # 排名变化（昨日排名 - 今日排名，正数=上升）
-                yesterday_rank = yesterday_skill.get("rank", skill["rank"])
-                skill["rank_delta"] = yesterday_rank - skill["rank"]
+        Args:
+            scored: score_snapshot 的返回值
 
-                # 安装量变化
-                yesterday_installs = yesterday_skill.get("installs", skill["installs"])
-                installs_delta = skill["installs"] - yesterday_installs
-                skill["installs_delta"] = installs_delta
+        Returns:
+            save_today_data 的关键字参数（trends / stats / rate_sketch / owners）
+        """
+        store_limit = TREND_STORE_LIMIT or None
+        sketch = scored["rate_sketch"]
+        return {
+            "trends": {section: scored["sections"][section][:store_limit] for section in TREND_SECTIONS},
+            "stats": scored["stats"],
+            "rate_sketch": (int(sketch.count), sketch.to_json()),
+            "owners": scored["owners"],
+        }
 
-                # 安装量变化率
-                if yesterday_installs > 0:
-                    skill["installs_rate"] = round(installs_delta / yesterday_installs, 4)
-                else:
-                    skill["installs_rate"] = 0
-            else:
-                # 新技能，没有历史数据
-                skill["rank_delta"] = 0
-                skill["installs_delta"] = 0
-                skill["installs_rate"] = 0
+    def _calculate_deltas(self, today: List[SkillRecord], yesterday: List[Dict]) -> List[SkillRecord]:
+        """
+        计算排名和安装量变化（向量化，见 TrendEngine）
 
-        return today
+        Args:
+            today: 今日技能记录
+            yesterday: 对比快照的技能列表
+
+        Returns:
+            包含变化值的新记录列表
+        """
+        engine = TrendEngine(today)
+        engine.add_snapshot(None, yesterday)
+        return delta_records(today, engine.compute())
 
-    def _get_top_20_with_summary(self, today: List[Dict], ai_summaries: Dict) -> List[Dict]:
+    def calculate_window_deltas(self, today: List[Dict], date: str,
+                                lookback_windows: Sequence[Optional[int]] = (None, 7, 30)) -> Dict:
         """
-        获取 Top 20 并附加 AI 摘要
+        一次性计算多个对比窗口的变化（不写库、不修改 today）
 
         Args:
             today: 今日技能列表
-            ai_summaries: AI 摘要映射
+            date: 今日日期 YYYY-MM-DD
+            lookback_windows: 对比窗口天数；None 表示上一期快照
 
         Returns:
-            Top 20 技能列表（带 AI 摘要）
+            {
+                "names": [...],                 # 行顺序与 today 一致
+                "windows": [...],               # 与列一一对应
+                "dates": [...],                 # 各窗口实际对比的快照日期
+                "rank_delta": ndarray[n, w], ...  # 见 TrendEngine.compute
+            }
         """
-        top_20 = today[:20]
+        engine = TrendEngine.from_database(self.db, today, date, lookback_windows)
+        result = engine.compute()
+        result["names"] = engine.names
+        result["windows"] = list(lookback_windows)
+        result["dates"] = list(engine.dates)
+        return result
 
-        for skill in top_20:
-            name = skill["name"]
-            if name in ai_summaries:
-                summary = ai_summaries[name]
-                skill["summary"] = summary.get("summary", "")
-                skill["description"] = summary.get("description", "")
-                skill["use_case"] = summary.get("use_case", "")
-                skill["solves"] = summary.get("solves", [])
-                skill["category"] = summary.get("category", "")
-                skill["category_zh"] = summary.get("category_zh", "")
-            else:
-                skill["summary"] = ""
-                skill["description"] = ""
-                skill["use_case"] = ""
-                skill["solves"] = []
-                skill["category"] = ""
-                skill["category_zh"] = ""
-
-        return top_20
-
-    def _get_top_movers(self, today: List[Dict], direction: str = "up", limit: int = 5, ai_summaries: Dict = None) -> List[Dict]:
+    def compare_snapshots(self, date: str, lookback_days: int = None, from_date: str = None) -> Dict:
         """
-        获取排名变化最大的技能
+        比较数据库中任意两期快照（集合差异在 SQL 中完成，见 Database.iter_snapshot_diff）
+
+        用于「上个月以来有什么变化」之类的临时对比，不写库。
 
         Args:
-            today: 今日技能列表
-            direction: "up"=上升, "down"=下降
-            limit: 返回数量
-            ai_summaries: AI 摘要映射
+            date: 新一期快照日期 YYYY-MM-DD
+            lookback_days: 对比窗口天数，见 get_previous_snapshot_date
+            from_date: 显式指定对比基准日期（优先于 lookback_days）
 
         Returns:
-            技能列表
+            {
+                "date": "2026-01-23",
+                "previous_date": "2025-12-23",   # 无可对比快照时为 None，其余字段为空
+                "counts": {"new": n, "dropped": n, "moved": n, "unchanged": n},
+                "new_entries": [...],            # 按当前名次
+                "dropped_entries": [...],        # 按上一期名次（附 yesterday_rank）
+                "rising": [...],                 # 名次上升最多（条数见 TREND_SECTION_LIMITS）
+                "falling": [...],
+            }
         """
-        # 过滤有变化的技能
-        if direction == "up":
-            movers = [s for s in today if s.get("rank_delta", 0) > 0]
-            movers.sort(key=lambda x: x["rank_delta"], reverse=True)
-        else:
-            movers = [s for s in today if s.get("rank_delta", 0) < 0]
-            movers.sort(key=lambda x: x["rank_delta"])
-
-        # 取前 N 个
-        result = movers[:limit]
-
-        # 附加 AI 摘要
-        if ai_summaries:
-            for skill in result:
-                name = skill["name"]
-                if name in ai_summaries:
-                    summary = ai_summaries[name]
-                    skill["summary"] = summary.get("summary", "")
-                    skill["category_zh"] = summary.get("category_zh", "")
+        previous_date = from_date or self.db.get_previous_snapshot_date(date, lookback_days)
+        counts = dict.fromkeys(DIFF_STATUSES, 0)
+        buckets = {section: TopK(TREND_SECTION_LIMITS.get(section, 0))
+                   for section in ("new", "dropped", "rising", "falling")}
+
+        if previous_date:
+            for i, row in enumerate(self.db.iter_snapshot_diff(previous_date, date, ("new", "dropped", "moved"))):
+                counts[row["status"]] += 1
+                if row["status"] == "new":
+                    buckets["new"].push(-i, row)
+                elif row["status"] == "dropped":
+                    row["yesterday_rank"] = row["previous_rank"]
+                    buckets["dropped"].push(-i, row)
+                elif row["rank_delta"] > 0:
+                    buckets["rising"].push((row["rank_delta"], -i), row)
+                else:
+                    buckets["falling"].push((-row["rank_delta"], -i), row)
+            counts["unchanged"] = self.db.count_snapshot_diff(previous_date, date)["unchanged"]
 
-        return result
+        return {
+            "date": date,
+            "previous_date": previous_date,
+            "counts": counts,
+            "new_entries": buckets["new"].items(),
+            "dropped_entries": buckets["dropped"].items(),
+            "rising": buckets["rising"].items(),
+            "falling": buckets["falling"].items(),
+        }
 
-    def _find_new_entries(self, today: List[Dict], yesterday_map: Dict[str, Dict], ai_summaries: Dict = None) -> List[Dict]:
+    def _resolve_surge_threshold(self, date: str, history: TDigest = None) -> float:
         """
-        找出新晋榜单的技能
+        确定本期暴涨阈值
+
+        SURGE_MODE=percentile 时合并历史各期的 installs_rate 草图，取 SURGE_PERCENTILE
+        分位数；历史样本不足 SURGE_MIN_SAMPLES 或结果非正时回退到固定 SURGE_THRESHOLD。
 
         Args:
-            today: 今日技能列表
-            yesterday_map: 昨日技能映射
-            ai_summaries: AI 摘要映射
+            date: 今日日期 YYYY-MM-DD
+            history: 可选，已合并好的历史草图（回放时由调用方维护）；为空时从数据库读取
 
         Returns:
-            新晋技能列表
+            暴涨阈值（变化率，0.3 = 30%）
         """
-        new_entries = [s for s in today if s["name"] not in yesterday_map]
+        if SURGE_MODE != "percentile":
+            return SURGE_THRESHOLD
 
-        # 附加 AI 摘要
-        if ai_summaries:
-            for skill in new_entries:
-                name = skill["name"]
-                if name in ai_summaries:
-                    summary = ai_summaries[name]
-                    skill["summary"] = summary.get("summary", "")
-                    skill["category_zh"] = summary.get("category_zh", "")
+        if history is None:
+            history = TDigest.merge_all(
+                TDigest.from_json(data) for data in self.db.get_rate_sketches(date, surge_window_start(date))
+            )
+        if history.count < SURGE_MIN_SAMPLES:
+            return SURGE_THRESHOLD
 
-        return new_entries
+        value = history.quantile(SURGE_PERCENTILE)
+        return round(value, 4) if value and value > 0 else SURGE_THRESHOLD
 
-    def _find_dropped_entries(self, today: List[Dict], yesterday_map: Dict[str, Dict], ai_summaries: Dict = None) -> List[Dict]:
+    def _classify(self, today: List[Dict], yesterday_map: Dict[str, Dict], stats: List[Dict],
+                  surge_threshold: float) -> Tuple[Dict[str, List[Dict]], List[float]]:
         """
-        找出跌出榜单的技能
+        单次遍历把每个技能同时归入所有趋势分区
+
+        有上限的分区用有界堆选 top-k（O(n log k)），不对完整列表排序；
+        同分时保持榜单顺序。
 
         Args:
-            today: 今日技能列表
-            yesterday_map: 昨日技能映射
-            ai_summaries: AI 摘要映射
+            today: 今日技能列表（已计算变化值）
+            yesterday_map: 对比快照的技能映射
+            stats: 与 today 顺序一致的统计状态
+            surge_threshold: 暴涨阈值
 
         Returns:
-            跌出榜单的技能列表
+            ({section: [skill, ...]}, 本期 installs_rate 样本)
+            section 包括 top / rising / falling / new / dropped / surging / momentum / anomalies；
+            物化分区按 max(报告上限, TREND_STORE_LIMIT) 保留，报告时再截断
         """
-        today_names = {s["name"] for s in today}
-        dropped = []
+        buckets = {section: TopK(self._bucket_limit(section)) for section in TREND_SECTIONS}
+        momentum = TopK(TREND_SECTION_LIMITS.get("momentum", 0))
+        anomalies = TopK(TREND_SECTION_LIMITS.get("anomalies", 0))
+        top_limit = TREND_SECTION_LIMITS.get("top", 0)
+
+        top = today[:top_limit] if top_limit else list(today)
+        rates = []
+        today_names = set()
 
-        for name, yesterday_skill in yesterday_map.items():
+        for i, (skill, row) in enumerate(zip(today, stats)):
+            name = skill["name"]
+            today_names.add(name)
+
+            previous = yesterday_map.get(name)
+            if previous is None:
+                buckets["new"].push(-i, skill)
+            elif previous.get("installs", 0) > 0:
+                # installs_rate 分布只统计有上一期安装量的技能
+                rates.append(skill["installs_rate"])
+
+            rank_delta = skill.get("rank_delta", 0)
+            if rank_delta > 0:
+                buckets["rising"].push((rank_delta, -i), skill)
+            elif rank_delta < 0:
+                buckets["falling"].push((-rank_delta, -i), skill)
+
+            if skill.get("installs_rate", 0) >= surge_threshold:
+                buckets["surging"].push(-i, skill)
+
+            if row["observations"] > 0 and row["momentum_7d"] > 0:
+                momentum.push((row["momentum_7d"], -i), (skill, row))
+
+            if abs(row["last_zscore"]) >= ANOMALY_Z_THRESHOLD:
+                anomalies.push((abs(row["last_zscore"]), -i), (skill, row))
+
+        for j, (name, yesterday_skill) in enumerate(yesterday_map.items()):
             if name not in today_names:
-                dropped.append({
+                buckets["dropped"].push(-j, {
                     "name": name,
                     "yesterday_rank": yesterday_skill.get("rank"),
                     "installs": yesterday_skill.get("installs", 0),
                     "url": yesterday_skill.get("url", "")
                 })
 
-                # 尝试附加 AI 摘要
-                if ai_summaries and name in ai_summaries:
-                    summary = ai_summaries[name]
-                    dropped[-1]["summary"] = summary.get("summary", "")
-                    dropped[-1]["category_zh"] = summary.get("category_zh", "")
+        sections = {section: bucket.items() for section, bucket in buckets.items()}
+        sections["top"] = top
+        sections["momentum"] = [
+            {
+                "name": skill["name"],
+                "rank": skill["rank"],
+                "installs": skill["installs"],
+                "url": skill.get("url", ""),
+                "momentum_3d": row["momentum_3d"],
+                "momentum_7d": row["momentum_7d"],
+                "momentum_30d": row["momentum_30d"],
+            }
+            for skill, row in momentum.items()
+        ]
+        sections["anomalies"] = [
+            {
+                "name": skill["name"],
+                "rank": skill["rank"],
+                "installs": skill["installs"],
+                "url": skill.get("url", ""),
+                "zscore": row["last_zscore"],
+                "growth": row["last_growth"],
+            }
+            for skill, row in anomalies.items()
+        ]
+        return sections, rates
+
+    @staticmethod
+    def _owner_leaders(owners: List[Dict]) -> List[Dict]:
+        """
+        选出安装量增长最多的 owner（同增长时排名更高者优先）
 
-        return dropped
+        Args:
+            owners: aggregate_owners 的结果
 
-    def _find_surging_skills(self, today: List[Dict], ai_summaries: Dict = None) -> List[Dict]:
+        Returns:
+            owner 聚合行列表，条数见 TREND_SECTION_LIMITS["owner_leaders"]
+        """
+        leaders = TopK(TREND_SECTION_LIMITS.get("owner_leaders", 0))
+        for row in owners:
+            if row["installs_delta"] > 0:
+                leaders.push((row["installs_delta"], -row["best_rank"]), row)
+        return leaders.items()
+
+    @staticmethod
+    def _bucket_limit(section: str) -> int:
+        """物化分区需要保留的条数（0 表示不限）"""
+        report_limit = TREND_SECTION_LIMITS.get(section, 0)
+        if not TREND_STORE_LIMIT or not report_limit:
+            return 0
+        return max(TREND_STORE_LIMIT, report_limit)
+
+    def _to_report(self, skills: List, ai_summaries: Dict) -> List[Dict]:
         """
-        找出安装量暴涨的技能
+        把分区中的记录转换为报告用的 dict，并叠加 AI 摘要
+
+        每个分区得到独立的 dict，同一技能出现在多个分区时互不影响。
 
         Args:
-            today: 今日技能列表
-            ai_summaries: AI 摘要映射
+            skills: 分区内的记录（或 dict）
+            ai_summaries: AI 摘要映射 {name: detail}
 
         Returns:
-            暴涨技能列表
+            dict 列表
         """
-        surging = []
+        return [to_report_dict(skill, summary_overlay(ai_summaries.get(skill["name"]))) for skill in skills]
+
+
+class TopK:
+    """
+    有界 top-k 选择（最小堆，堆顶为当前第 k 名）
+
+    key 越大越靠前，需保证唯一（通常带上行号）；limit 为 0 时保留全部，
+    取结果时一次性排序。
+    """
+
+    def __init__(self, limit: int = 0):
+        self.limit = limit
+        self._heap: List[Tuple] = []
+
+    def push(self, key, item) -> None:
+        """加入候选"""
+        if not self.limit:
+            self._heap.append((key, item))
+        elif len(self._heap) < self.limit:
+            heapq.heappush(self._heap, (key, item))
+        elif key > self._heap[0][0]:
+            heapq.heapreplace(self._heap, (key, item))
+
+    def items(self) -> List:
+        """按 key 降序返回保留的候选"""
+        return [item for _, item in sorted(self._heap, key=itemgetter(0), reverse=True)]
 
-        for skill in today:
-            rate = skill.get("installs_rate", 0)
-            if rate >= SURGE_THRESHOLD:
-                surging.append(skill)
+    def __len__(self) -> int:
+        return len(self._heap)
 
-        # 附加 AI 摘要
-        if ai_summaries:
-            for skill in surging:
-                name = skill["name"]
-                if name in ai_summaries:
-                    summary = ai_summaries[name]
-                    skill["summary"] = summary.get("summary", "")
-                    skill["category_zh"] = summary.get("category_zh", "")
 
-        return surging
+def surge_window_start(date: str) -> Optional[str]:
+    """分位数阈值统计窗口的起始日期（SURGE_WINDOW_DAYS 为 0 时不限）"""
+    if not SURGE_WINDOW_DAYS:
+        return None
+    return (datetime.strptime(date, "%Y-%m-%d") - timedelta(days=SURGE_WINDOW_DAYS)).strftime("%Y-%m-%d")
 
 
-def analyze_trends(today_data: List[Dict], date: str, db: Database = None, ai_summaries: Dict = None) -> Dict:
+def analyze_trends(today_data: List[Dict], date: str, db: Database = None, ai_summaries: Dict = None,
+                   lookback_days: int = None) -> Dict:
     """便捷函数：分析趋势"""
     if db is None:
         db = Database()
         db.connect()
 
     analyzer = TrendAnalyzer(db)
-    return analyzer.calculate_trends(today_data, date, ai_summaries)
+    return analyzer.calculate_trends(today_data, date, ai_summaries, lookback_days)
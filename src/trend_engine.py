@@ -0,0 +1,263 @@
+"""
+Trend Engine - 向量化趋势计算
+把当前榜单与若干历史快照对齐成 (技能 × 快照) 矩阵，一次性计算所有技能、
+所有对比窗口的排名变化、安装量变化、变化率和暴涨标记
+"""
+from itertools import repeat
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.config import SURGE_THRESHOLD
+from src.skill_record import SkillRecord
+
+
+class TrendEngine:
+    """
+    向量化趋势引擎
+
+    行 = 当前榜单中的技能（保持传入顺序），列 = 历史快照。
+    历史快照中缺失的技能用 NaN 表示（视为新晋，变化值为 0）。
+    """
+
+    def __init__(self, today: List[Dict]):
+        """
+        初始化
+
+        Args:
+            today: 当前榜单技能列表（需包含 name/rank/installs）
+        """
+        n = len(today)
+        self.names = list(map(itemgetter("name"), today))
+        self.ranks = _column(today, "rank", n)
+        self.installs = _column(today, "installs", n)
+        self.dates: List[str] = []
+        self._rank_columns: List[np.ndarray] = []
+        self._installs_columns: List[np.ndarray] = []
+
+        # 名称 -> 行号，用于对齐历史快照（重名时保留首次出现的行）
+        self._rows = dict(zip(reversed(self.names), range(n - 1, -1, -1)))
+
+    def add_snapshot(self, date: str, snapshot: List[Dict]) -> int:
+        """
+        对齐并加入一期历史快照
+
+        Args:
+            date: 快照日期 YYYY-MM-DD
+            snapshot: 该期技能列表（需包含 name/rank/installs）
+
+        Returns:
+            该快照的列号
+        """
+        ranks = np.full(len(self.names), np.nan)
+        installs = np.full(len(self.names), np.nan)
+
+        if snapshot and len(self.names):
+            m = len(snapshot)
+            rows = np.fromiter(map(self._rows.get, map(itemgetter("name"), snapshot), repeat(-1)),
+                               dtype=np.int64, count=m)
+            matched = rows >= 0
+            ranks[rows[matched]] = _column(snapshot, "rank", m)[matched]
+            installs[rows[matched]] = _column(snapshot, "installs", m)[matched]
+
+        self.dates.append(date)
+        self._rank_columns.append(ranks)
+        self._installs_columns.append(installs)
+        return len(self.dates) - 1
+
+    def compute(self, columns: Sequence[int] = None, surge_threshold: float = None) -> Dict[str, np.ndarray]:
+        """
+        计算当前榜单相对各历史快照的变化
+
+        Args:
+            columns: 参与计算的快照列号，默认全部
+            surge_threshold: 暴涨阈值，默认使用配置中的 SURGE_THRESHOLD
+
+        Returns:
+            {
+                "present": bool[n, w],       # 该技能在对比快照中存在
+                "rank_delta": int64[n, w],   # 对比排名 - 当前排名（正数=上升）
+                "installs_delta": int64[n, w],
+                "installs_rate": float64[n, w],   # 对比安装量为 0 或缺失时为 0
+                "rate_defined": bool[n, w],  # installs_rate 是否由除法得出
+                "surging": bool[n, w],
+            }
+            其中 n 为技能数，w 为对比窗口数
+        """
+        if columns is None:
+            columns = range(len(self.dates))
+        columns = list(columns)
+        threshold = SURGE_THRESHOLD if surge_threshold is None else surge_threshold
+
+        n = len(self.names)
+        if not columns:
+            prev_ranks = np.full((n, 0), np.nan)
+            prev_installs = np.full((n, 0), np.nan)
+        else:
+            prev_ranks = np.stack([self._rank_columns[c] for c in columns], axis=1)
+            prev_installs = np.stack([self._installs_columns[c] for c in columns], axis=1)
+
+        present = ~np.isnan(prev_ranks)
+        rank_delta = np.where(present, prev_ranks - self.ranks[:, None], 0).astype(np.int64)
+        installs_delta = np.where(present, self.installs[:, None] - prev_installs, 0).astype(np.int64)
+
+        rate_defined = present & (prev_installs > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            installs_rate = np.where(rate_defined, installs_delta / prev_installs, 0.0)
+
+        return {
+            "present": present,
+            "rank_delta": rank_delta,
+            "installs_delta": installs_delta,
+            "installs_rate": installs_rate,
+            "rate_defined": rate_defined,
+            "surging": np.round(installs_rate, 4) >= threshold,
+        }
+
+    @classmethod
+    def from_database(cls, db, today: List[Dict], date: str,
+                      lookback_windows: Sequence[Optional[int]] = (None,)) -> "TrendEngine":
+        """
+        为多个对比窗口加载历史快照（每个窗口一次索引查询）
+
+        Args:
+            db: Database 实例
+            today: 当前榜单技能列表
+            date: 当前日期 YYYY-MM-DD
+            lookback_windows: 对比窗口天数；None 表示上一期快照
+
+        Returns:
+            TrendEngine，列号与 lookback_windows 一一对应；
+            没有对应快照的窗口为全 NaN 列（日期为 None）
+        """
+        engine = cls(today)
+        loaded = {}
+        for window in lookback_windows:
+            previous_date = db.get_previous_snapshot_date(date, window)
+            if previous_date is None:
+                engine.add_snapshot(None, [])
+                continue
+            if previous_date not in loaded:
+                loaded[previous_date] = db.get_skills_by_date(previous_date)
+            engine.add_snapshot(previous_date, loaded[previous_date])
+        return engine
+
+
+def _column(skills: List[Dict], key: str, count: int) -> np.ndarray:
+    """把技能列表中的某个数值字段取成 float64 数组"""
+    return np.array(list(map(itemgetter(key), skills)), dtype=np.float64).reshape(count)
+
+
+def apply_deltas(today: List[Dict], deltas: Dict[str, np.ndarray], column: int = 0) -> List[Dict]:
+    """
+    把某个对比窗口的变化值写回技能字典（rank_delta / installs_delta / installs_rate）
+
+    Args:
+        today: 当前榜单技能列表（与 TrendEngine 行顺序一致）
+        deltas: TrendEngine.compute 的返回值
+        column: 使用的窗口列
+
+    Returns:
+        写回后的 today
+    """
+    for skill, rd, idelta, rate in zip(today, *_delta_columns(deltas, column)):
+        skill["rank_delta"] = rd
+        skill["installs_delta"] = idelta
+        skill["installs_rate"] = rate
+
+    return today
+
+
+def delta_records(today: List[SkillRecord], deltas: Dict[str, np.ndarray], column: int = 0) -> List[SkillRecord]:
+    """
+    apply_deltas 的不可变版本：为每条记录生成带变化值的新记录
+
+    Args:
+        today: 当前榜单记录（与 TrendEngine 行顺序一致）
+        deltas: TrendEngine.compute 的返回值
+        column: 使用的窗口列
+
+    Returns:
+        新的记录列表，today 不变
+    """
+    return [
+        skill.with_deltas(rd, idelta, rate)
+        for skill, rd, idelta, rate in zip(today, *_delta_columns(deltas, column))
+    ]
+
+
+def _delta_columns(deltas: Dict[str, np.ndarray], column: int):
+    """取出某个窗口的 rank_delta / installs_delta / installs_rate 列（Python 标量）"""
+    rate_defined = deltas["rate_defined"][:, column].tolist()
+    installs_rate = [
+        round(rate, 4) if defined else 0
+        for rate, defined in zip(deltas["installs_rate"][:, column].tolist(), rate_defined)
+    ]
+    return deltas["rank_delta"][:, column].tolist(), deltas["installs_delta"][:, column].tolist(), installs_rate
+
+
+def aggregate_owners(today: List[Dict], stats: List[Dict] = None) -> List[Dict]:
+    """
+    按 owner 分组聚合当前榜单（np.unique + bincount 分组运算，不按 owner 循环）
+
+    Args:
+        today: 当前榜单技能列表（已计算变化值，需包含 owner/rank/installs/installs_delta）
+        stats: 与 today 顺序一致的统计状态（见 momentum.update_skill_stats），用于动量分数
+
+    Returns:
+        每个 owner 一行，按 owner 排序:
+        {
+            "owner": "remotion-dev/skills",
+            "skills": 3,              # 上榜技能数
+            "total_installs": 12000,
+            "installs_delta": 800,    # 各技能 installs_delta 之和
+            "best_rank": 1,
+            "top_skill": "remotion-best-practices",  # 排名最高的技能
+            "momentum": 0.12,         # 按安装量加权的 7 天动量
+        }
+    """
+    n = len(today)
+    if n == 0:
+        return []
+
+    owners = np.array([skill.get("owner") or "" for skill in today], dtype=object)
+    keys, groups = np.unique(owners, return_inverse=True)
+    k = len(keys)
+
+    ranks = _column(today, "rank", n)
+    installs = _column(today, "installs", n)
+    installs_delta = np.fromiter((skill.get("installs_delta", 0) for skill in today), dtype=np.float64, count=n)
+    if stats:
+        momentum = np.fromiter(
+            (row["momentum_7d"] if row["observations"] > 0 else 0.0 for row in stats),
+            dtype=np.float64, count=n,
+        )
+    else:
+        momentum = np.zeros(n)
+
+    counts = np.bincount(groups, minlength=k)
+    total = np.bincount(groups, weights=installs, minlength=k)
+    delta = np.bincount(groups, weights=installs_delta, minlength=k)
+    weighted = np.bincount(groups, weights=installs * momentum, minlength=k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.where(total > 0, weighted / total, 0.0)
+
+    # 每组排名最高的技能：按 (owner, rank) 排序后取每组第一行
+    order = np.lexsort((ranks, groups))
+    starts = np.flatnonzero(np.r_[True, np.diff(groups[order]) != 0])
+    top_rows = order[starts]
+
+    return [
+        {
+            "owner": owner,
+            "skills": int(count),
+            "total_installs": int(installs_sum),
+            "installs_delta": int(delta_sum),
+            "best_rank": int(ranks[row]),
+            "top_skill": today[row]["name"],
+            "momentum": round(float(momentum_score), 6),
+        }
+        for owner, count, installs_sum, delta_sum, row, momentum_score
+        in zip(keys.tolist(), counts.tolist(), total.tolist(), delta.tolist(), top_rows.tolist(), score.tolist())
+    ]
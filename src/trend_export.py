@@ -0,0 +1,365 @@
+"""
+Trend Export - 机器可读的趋势导出（NDJSON / JSON）
+下游看板和 trending-skills 插件直接读取这些文件，无需解析通知或打开 SQLite：
+
+    {EXPORT_DIR}/{date}/snapshot.ndjson   完整榜单，每行一个技能
+    {EXPORT_DIR}/{date}/trends.ndjson     calculate_trends 的各分区、owner 聚合和分类概览
+    {EXPORT_DIR}/{date}/summary.json      紧凑摘要（计数、Top 10、各分区技能名、文件路径）
+    {EXPORT_DIR}/latest.json              最新一期的 summary.json
+
+每个 NDJSON 文件第一行是 header（schema 名、版本、字段顺序），其后每行一条记录，
+"type" 字段区分记录类型。字段顺序固定，新增字段只追加在末尾并递增 EXPORT_SCHEMA_VERSION。
+
+- 记录按预编译的字段顺序序列化（构造时生成等价的 f-string 函数），不经过 json.dumps(dict)
+- 快照从数据库游标分批读取，经生成器逐行写出，内存占用与榜单长度无关
+"""
+import json
+import math
+import os
+import re
+import shutil
+from datetime import datetime, timedelta
+from json.encoder import encode_basestring
+from typing import Callable, Dict, Iterable, Iterator, Sequence, Tuple
+
+from src.config import DB_RETENTION_DAYS, EXPORT_DIR
+from src.database import Database
+
+EXPORT_SCHEMA_VERSION = 1
+
+Schema = Tuple[Tuple[str, str], ...]  # ((字段名, 类型), ...)，类型为 int / float / str / json
+
+# 快照记录：与 skills_daily 读取列顺序一致（按位置访问数据库行）
+SNAPSHOT_SCHEMA: Schema = (
+    ("rank", "int"),
+    ("name", "str"),
+    ("owner", "str"),
+    ("installs", "int"),
+    ("installs_delta", "int"),
+    ("installs_rate", "float"),
+    ("rank_delta", "int"),
+    ("url", "str"),
+)
+
+# 趋势分区记录：各分区字段的并集，不适用的字段为 null
+ENTRY_SCHEMA: Schema = (
+    ("section", "str"),
+    ("position", "int"),
+    ("rank", "int"),
+    ("name", "str"),
+    ("owner", "str"),
+    ("installs", "int"),
+    ("url", "str"),
+    ("rank_delta", "int"),
+    ("installs_delta", "int"),
+    ("installs_rate", "float"),
+    ("previous_rank", "int"),
+    ("momentum_7d", "float"),
+    ("zscore", "float"),
+    ("projected_rank", "int"),
+    ("projected_installs", "int"),
+    ("summary", "str"),
+    ("category", "str"),
+    ("category_zh", "str"),
+    ("solves", "json"),
+)
+
+OWNER_SCHEMA: Schema = (
+    ("owner", "str"),
+    ("skills", "int"),
+    ("total_installs", "int"),
+    ("installs_delta", "int"),
+    ("best_rank", "int"),
+    ("top_skill", "str"),
+    ("momentum", "float"),
+)
+
+CATEGORY_SCHEMA: Schema = (
+    ("category", "str"),
+    ("category_zh", "str"),
+    ("count", "int"),
+    ("installs", "int"),
+    ("installs_share", "float"),
+    ("share_delta", "float"),
+    ("installs_delta", "int"),
+    ("new_skills", "int"),
+    ("momentum", "float"),
+)
+
+# 导出分区名 -> calculate_trends 结果中的键
+EXPORT_SECTIONS = (
+    ("top", "top_20"),
+    ("rising", "rising_top5"),
+    ("falling", "falling_top5"),
+    ("new", "new_entries"),
+    ("dropped", "dropped_entries"),
+    ("surging", "surging"),
+    ("momentum", "momentum"),
+    ("anomalies", "anomalies"),
+    ("predicted_entrants", "predicted_entrants"),
+)
+
+# summary.json 中 Top 榜单的条数
+SUMMARY_TOP_N = 10
+
+_DATE_DIR = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+# ----------------------------------------------------------------------
+# 预编译序列化
+# ----------------------------------------------------------------------
+
+def _int(value) -> str:
+    return "null" if value is None else str(int(value))
+
+
+def _float(value) -> str:
+    if value is None:
+        return "null"
+    value = float(value)
+    return repr(value) if math.isfinite(value) else "null"
+
+
+def _str(value) -> str:
+    return "null" if value is None else encode_basestring(str(value))
+
+
+def _json(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+_ENCODERS = {"int": "_int", "float": "_float", "str": "_str", "json": "_json"}
+_NAMESPACE = {"_int": _int, "_float": _float, "_str": _str, "_json": _json}
+
+
+def compile_encoder(record_type: str, schema: Schema, access: str = "get",
+                    leading: Sequence[str] = ()) -> Callable[..., str]:
+    """
+    按固定字段顺序预编译一条记录的序列化函数
+
+    Args:
+        record_type: 记录的 "type" 字段值
+        schema: ((字段名, 类型), ...)
+        access: 字段读取方式：get（dict / SkillRecord，缺失为 null）或 index（按位置读取元组/数据库行）
+        leading: 作为前置参数传入的字段（如分区名、位置），不从记录中读取
+
+    Returns:
+        encode(*leading, record) -> 以换行结尾的一行 JSON
+    """
+    parts = [f'{{{{"type":{encode_basestring(record_type)}']
+    index = 0
+    for name, kind in schema:
+        if name in leading:
+            value = name
+        elif access == "index":
+            value = f"r[{index}]"
+            index += 1
+        else:
+            value = f'r.get("{name}")'
+        parts.append(f',"{name}":{{{_ENCODERS[kind]}({value})}}')
+    parts.append("}}\\n")
+
+    code = f"lambda {', '.join([*leading, 'r'])}: f'{''.join(parts)}'"
+    return eval(compile(code, "<encoder>", "eval"), dict(_NAMESPACE))
+
+
+def header_line(schema_name: str, date: str, schema: Schema, record_types: Sequence[str]) -> str:
+    """NDJSON 文件的第一行（schema 名、版本、日期、字段顺序）"""
+    return json.dumps({
+        "type": "header",
+        "schema": schema_name,
+        "version": EXPORT_SCHEMA_VERSION,
+        "date": date,
+        "record_types": list(record_types),
+        "fields": [name for name, _ in schema],
+    }, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+_encode_snapshot = compile_encoder("skill", SNAPSHOT_SCHEMA, access="index")
+_encode_entry = compile_encoder("entry", ENTRY_SCHEMA, leading=("section", "position"))
+_encode_owner = compile_encoder("owner", OWNER_SCHEMA)
+_encode_category = compile_encoder("category", CATEGORY_SCHEMA)
+
+
+# ----------------------------------------------------------------------
+# 行生成器
+# ----------------------------------------------------------------------
+
+def iter_snapshot_lines(date: str, rows: Iterable[Sequence]) -> Iterator[str]:
+    """
+    快照 NDJSON 行（header + 每个技能一行）
+
+    Args:
+        date: 快照日期
+        rows: 按 SNAPSHOT_SCHEMA 列顺序的行（如 Database.iter_skills_by_date）
+    """
+    yield header_line("skills-trending/snapshot", date, SNAPSHOT_SCHEMA, ["skill"])
+    for row in rows:
+        yield _encode_snapshot(row)
+
+
+def iter_trend_lines(trends: Dict, date: str) -> Iterator[str]:
+    """
+    趋势 NDJSON 行：header，各分区的 entry，owner 聚合，分类概览
+
+    Args:
+        trends: calculate_trends 的结果（可附带 categories）
+        date: 报告日期
+    """
+    yield header_line("skills-trending/trends", date, ENTRY_SCHEMA, ["entry", "owner", "category"])
+    for section, key in EXPORT_SECTIONS:
+        for position, skill in enumerate(trends.get(key) or []):
+            if "yesterday_rank" in skill and "previous_rank" not in skill:
+                skill = {**skill, "previous_rank": skill["yesterday_rank"]}
+            yield _encode_entry(section, position, skill)
+    for owner in trends.get("owner_leaders") or []:
+        yield _encode_owner(owner)
+    for category in trends.get("categories") or []:
+        yield _encode_category(category)
+
+
+def build_summary(trends: Dict, date: str, skills_count: int, files: Dict[str, str]) -> Dict:
+    """
+    紧凑摘要
+
+    Args:
+        trends: calculate_trends 的结果
+        date: 报告日期
+        skills_count: 快照中的技能数
+        files: 同一期导出文件的相对路径
+
+    Returns:
+        可直接 json.dump 的字典
+    """
+    return {
+        "schema": "skills-trending/summary",
+        "version": EXPORT_SCHEMA_VERSION,
+        "date": date,
+        "previous_date": trends.get("previous_date"),
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "skills": skills_count,
+        "surge_threshold": trends.get("surge_threshold"),
+        "counts": {section: len(trends.get(key) or []) for section, key in EXPORT_SECTIONS},
+        "top": [
+            {"rank": s["rank"], "name": s["name"], "installs": s["installs"], "rank_delta": s.get("rank_delta", 0)}
+            for s in (trends.get("top_20") or [])[:SUMMARY_TOP_N]
+        ],
+        "sections": {
+            section: [s["name"] for s in trends.get(key) or []]
+            for section, key in EXPORT_SECTIONS if section != "top"
+        },
+        "owners": [o["owner"] for o in trends.get("owner_leaders") or []],
+        "categories": [
+            {"category": c["category"], "category_zh": c.get("category_zh"), "count": c["count"],
+             "installs_share": c.get("installs_share"), "momentum": c.get("momentum")}
+            for c in trends.get("categories") or []
+        ],
+        "files": files,
+    }
+
+
+# ----------------------------------------------------------------------
+# 写文件
+# ----------------------------------------------------------------------
+
+def write_lines(path: str, lines: Iterable[str]) -> int:
+    """
+    逐行写入文件（先写临时文件再替换，读取方不会看到写了一半的文件）
+
+    Returns:
+        写入的行数（不含 header）
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    count = -1
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        for line in lines:
+            f.write(line)
+            count += 1
+    os.replace(tmp, path)
+    return max(count, 0)
+
+
+def write_json(path: str, data: Dict) -> None:
+    """写入紧凑 JSON（原子替换）"""
+    write_lines(path, [json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n"])
+
+
+class TrendExporter:
+    """把一期快照和趋势结果导出为 NDJSON / JSON"""
+
+    def __init__(self, db: Database, export_dir: str = None):
+        """
+        初始化
+
+        Args:
+            db: 数据库实例（快照从数据库流式读取）
+            export_dir: 导出目录，默认 EXPORT_DIR
+        """
+        self.db = db
+        self.export_dir = export_dir or EXPORT_DIR
+
+    def export(self, trends: Dict, date: str) -> Dict:
+        """
+        导出一期
+
+        Args:
+            trends: calculate_trends 的结果
+            date: 快照日期 YYYY-MM-DD（快照需已写入数据库）
+
+        Returns:
+            {"dir": 导出目录, "skills": 快照行数, "entries": 趋势记录行数, "files": {...}}
+        """
+        files = {
+            "snapshot": f"{date}/snapshot.ndjson",
+            "trends": f"{date}/trends.ndjson",
+            "summary": f"{date}/summary.json",
+        }
+        skills = write_lines(self._path(files["snapshot"]),
+                             iter_snapshot_lines(date, self.db.iter_skills_by_date(date)))
+        entries = write_lines(self._path(files["trends"]), iter_trend_lines(trends, date))
+
+        summary = build_summary(trends, date, skills, files)
+        write_json(self._path(files["summary"]), summary)
+        if date >= self._latest_date():
+            write_json(self._path("latest.json"), summary)
+
+        return {"dir": self.export_dir, "skills": skills, "entries": entries, "files": files}
+
+    def prune(self, days: int = None) -> int:
+        """
+        删除早于保留期的导出目录（与数据库保留期一致）
+
+        Returns:
+            删除的目录数
+        """
+        cutoff = (datetime.now() - timedelta(days=days or DB_RETENTION_DAYS)).strftime("%Y-%m-%d")
+        removed = 0
+        if not os.path.isdir(self.export_dir):
+            return 0
+        for name in os.listdir(self.export_dir):
+            path = self._path(name)
+            if _DATE_DIR.match(name) and name < cutoff and os.path.isdir(path):
+                shutil.rmtree(path)
+                removed += 1
+        return removed
+
+    def _latest_date(self) -> str:
+        """latest.json 当前指向的日期（不存在时为空串）"""
+        try:
+            with open(self._path("latest.json"), encoding="utf-8") as f:
+                return json.load(f).get("date") or ""
+        except (OSError, ValueError):
+            return ""
+
+    def _path(self, relative: str) -> str:
+        return os.path.join(self.export_dir, relative)
+
+
+def export_trends(trends: Dict, date: str, db: Database = None) -> Dict:
+    """便捷函数：导出一期趋势"""
+    if db is None:
+        db = Database()
+        db.connect()
+
+    return TrendExporter(db).export(trends, date)
@@ -0,0 +1,44 @@
+"""
+Webhook Sender - 把报告摘要以 JSON POST 到任意地址
+
+请求体为 {"event": "skills_trending.report", "date": ..., "summary": {...}}，
+summary 与导出的 summary.json 格式相同（见 trend_export.build_summary）
+"""
+
+from typing import Dict
+import requests
+
+
+class WebhookSender:
+    """通用 Webhook 发送器"""
+
+    def __init__(self, timeout: float = 30):
+        self.timeout = timeout
+        # 复用连接（keep-alive），同一主机的多个地址只建立一次连接
+        self.session = requests.Session()
+
+    def send(self, url: str, payload: Dict) -> Dict:
+        """
+        发送一次 POST 请求
+
+        Args:
+            url: Webhook 地址
+            payload: JSON 请求体
+
+        Returns:
+            {"success": bool, "message": str, "id": 响应头中的请求 ID（没有时为 None）}
+        """
+        if not url:
+            return {"success": False, "message": "WEBHOOK_URL is empty", "id": None}
+
+        try:
+            resp = self.session.post(url, json=payload, timeout=self.timeout)
+            resp.raise_for_status()
+            return {"success": True, "message": f"HTTP {resp.status_code}",
+                    "id": resp.headers.get("X-Request-Id")}
+        except Exception as e:
+            return {"success": False, "message": str(e), "id": None}
+
+    def close(self) -> None:
+        """关闭复用的连接"""
+        self.session.close()